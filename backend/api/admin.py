@@ -1,6 +1,18 @@
 from django.contrib import admin
 
-from .models import UserProfile, Item, Borrow, Category, ItemInstance, BorrowLog
+from .models import (
+    AnalysisJob,
+    Borrow,
+    BorrowLog,
+    BorrowStatusCounter,
+    Category,
+    DataVersion,
+    Item,
+    ItemInstance,
+    Notification,
+    RFIDCard,
+    UserProfile,
+)
 
 
 @admin.register(UserProfile)
@@ -10,6 +22,14 @@ class UserProfileAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "user__email")
 
 
+@admin.register(RFIDCard)
+class RFIDCardAdmin(admin.ModelAdmin):
+    list_display = ("uid", "user", "label", "is_active", "created_at")
+    list_filter = ("is_active",)
+    search_fields = ("uid", "user__username", "label")
+    raw_id_fields = ("user",)
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("name", "description", "created_at")
@@ -47,3 +67,30 @@ class BorrowLogAdmin(admin.ModelAdmin):
     search_fields = ("borrow__item__name", "performed_by__username", "description")
     readonly_fields = ("created_at",)
 
+
+
+@admin.register(BorrowStatusCounter)
+class BorrowStatusCounterAdmin(admin.ModelAdmin):
+    list_display = ("status", "count", "updated_at")
+    readonly_fields = ("status", "count", "updated_at")
+
+
+@admin.register(DataVersion)
+class DataVersionAdmin(admin.ModelAdmin):
+    list_display = ("scope", "version", "updated_at")
+    readonly_fields = ("scope", "version", "updated_at")
+
+
+@admin.register(AnalysisJob)
+class AnalysisJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "requested_by", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("created_at", "started_at", "finished_at")
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "kind", "title", "read", "created_at")
+    list_filter = ("kind", "read")
+    search_fields = ("user__username", "title")
+    raw_id_fields = ("user", "borrow")
@@ -0,0 +1,52 @@
+import copy
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .services.ttl_cache import TTLCache
+
+# token key -> Token with user and user.profile already loaded. Signals only
+# invalidate this process, so the TTL is what bounds how long a token revoked
+# or a user deactivated on another worker keeps working here.
+principal_cache = TTLCache(
+    maxsize=getattr(settings, "AUTH_PRINCIPAL_CACHE_SIZE", 2048),
+    ttl=getattr(settings, "AUTH_PRINCIPAL_CACHE_TTL", 5),
+)
+
+
+def invalidate_user(user_id):
+    """Forget cached principals for a user (called from api.signals)"""
+    principal_cache.delete_where(lambda token: token.user_id == user_id)
+
+
+def invalidate_token(key):
+    principal_cache.delete(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that loads token, user and profile in one joined query.
+
+    The result is cached per process for a few seconds, so the role checks
+    in the views (``user.profile``) never need a second query and a burst of
+    requests from one client costs one lookup. Entries are dropped when the
+    user, profile or token changes in this process; other processes catch up
+    within the TTL. Each request gets its own copy, so nothing a view sets on
+    ``request.user`` leaks into other requests.
+    """
+
+    def authenticate_credentials(self, key):
+        token = principal_cache.get(key)
+        if token is None:
+            try:
+                token = Token.objects.select_related("user", "user__profile").get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed("Invalid token.")
+            principal_cache.set(key, token)
+        token = copy.deepcopy(token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+
+        return (token.user, token)
@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
 from api.models import Item, ItemInstance, Borrow, BorrowLog
+from api.services import borrow_counters
 
 User = get_user_model()
 
@@ -117,6 +118,7 @@ class Command(BaseCommand):
                 },
             )
             if created:
+                borrow_counters.record_transition(None, borrow.status)
                 self.stdout.write(
                     self.style.SUCCESS(
                         f"✓ Created borrow: {borrow.borrower.username} - {borrow.item.name} ({borrow.status})"
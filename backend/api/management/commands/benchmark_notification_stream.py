@@ -0,0 +1,109 @@
+"""
+Database load of the notification SSE stream with many idle borrowers.
+Opens --clients concurrent event streams in-process (the same generator the
+view serves), keeps them idle for --duration seconds and reports how many
+queries the streams issued (captured on the connection, so cache reads
+through the DatabaseCache count too), next to what the same borrowers cost
+when each polls 'borrower_notification_count' every --poll-every seconds.
+On PostgreSQL the database-wide transaction count is reported as well.
+"""
+import asyncio
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.services import notification_stream
+
+# Synthetic user ids; idle streams never need a real row
+FIRST_USER_ID = 10 ** 9
+
+# Queries behind one borrower_notification_count poll before the inbox table
+LEGACY_QUERIES_PER_POLL = 3
+
+
+def _pg_transactions():
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = current_database()"
+        )
+        return cursor.fetchone()[0]
+
+
+def _table(sql):
+    """First table named in FROM/INTO/UPDATE, for the per-table breakdown"""
+    words = sql.replace('"', " ").split()
+    for keyword, name in zip(words, words[1:]):
+        if keyword.upper() in ("FROM", "INTO", "UPDATE"):
+            return name
+    return words[0].upper() if words else "?"
+
+
+class Command(BaseCommand):
+    help = "Measure DB load of the notification stream at N idle connected borrowers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds to hold the streams open")
+        parser.add_argument("--poll-every", type=float, default=30.0, help="Interval of the legacy badge poll")
+
+    def handle(self, *args, **options):
+        clients = max(options["clients"], 1)
+        duration = options["duration"]
+        broadcaster = notification_stream.broadcaster
+
+        xacts_before = _pg_transactions()
+        polls_before = broadcaster.polls
+        started = time.perf_counter()
+        # async_to_sync keeps the streams' thread-sensitive DB calls on this
+        # thread, so this connection sees every query they make
+        with CaptureQueriesContext(connection) as captured:
+            opened = async_to_sync(self._run)(clients, duration)
+        elapsed = time.perf_counter() - started
+        xacts_after = _pg_transactions()
+
+        polls = broadcaster.polls - polls_before
+        stream_queries = len(captured)
+        by_table = Counter(_table(query["sql"]) for query in captured.captured_queries)
+        legacy_queries = clients * (elapsed / options["poll_every"]) * LEGACY_QUERIES_PER_POLL
+
+        self.stdout.write(f"{opened} streams held for {elapsed:.1f}s (poll interval {broadcaster.poll_interval}s)")
+        self.stdout.write(
+            f"  stream:  {stream_queries} queries measured ({polls} shared polls), "
+            f"{stream_queries / elapsed:.2f} queries/s"
+        )
+        for table, count in by_table.most_common():
+            self.stdout.write(f"    {table}: {count}")
+        self.stdout.write(
+            f"  polling: ~{legacy_queries:.0f} queries "
+            f"({clients} clients x 1 poll/{options['poll_every']:.0f}s x {LEGACY_QUERIES_PER_POLL} COUNTs), "
+            f"{legacy_queries / elapsed:.2f} queries/s"
+        )
+        if xacts_before is not None:
+            self.stdout.write(f"  postgres transactions during run: {xacts_after - xacts_before}")
+        self.stdout.write(self.style.SUCCESS("✓ Done"))
+
+    async def _run(self, clients, duration):
+        async def hold(user_id, ready):
+            stream = notification_stream.event_stream(user_id)
+            try:
+                # First chunk is the initial unread event; the stream is subscribed by then
+                await stream.__anext__()
+                ready.append(user_id)
+                while True:
+                    await stream.__anext__()
+            finally:
+                await stream.aclose()
+
+        ready = []
+        tasks = [asyncio.create_task(hold(FIRST_USER_ID + n, ready)) for n in range(clients)]
+        await asyncio.sleep(duration)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return len(ready)
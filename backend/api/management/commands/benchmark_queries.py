@@ -0,0 +1,168 @@
+"""
+Query benchmarks for the hot dashboard endpoints.
+Counts queries and times each scenario against whatever data is in the database
+(use 'seed_benchmark_data' first for a realistic volume).
+Exits with an error if a variant that should run a fixed number of queries
+starts scaling with the data, so it doubles as a query-count regression check.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Borrow, Category, Item
+from api.services import borrow_counters
+from api.services.borrow_stats import borrow_status_counts
+from api.services.inventory_stats import category_item_rows, category_summaries, inventory_availability
+
+
+def _legacy_status_counts():
+    """Per-status COUNT queries as the views used to run them"""
+    return {
+        "total_borrows": Borrow.objects.count(),
+        "active_borrows": Borrow.objects.filter(status=Borrow.Status.ACTIVE).count(),
+        "late_borrows": Borrow.objects.filter(status=Borrow.Status.LATE).count(),
+        "returned_borrows": Borrow.objects.filter(status=Borrow.Status.RETURNED).count(),
+        "not_returned_borrows": Borrow.objects.filter(status=Borrow.Status.NOT_RETURNED).count(),
+    }
+
+
+def _aggregate_status_counts():
+    return borrow_status_counts()
+
+
+def _legacy_inventory():
+    """One borrowed-count query per item, as admin_inventory used to do"""
+    rows = []
+    for item in Item.objects.all():
+        borrowed_count = Borrow.objects.filter(
+            item=item,
+            status__in=[Borrow.Status.ACTIVE, Borrow.Status.LATE]
+        ).count()
+        rows.append((item.id, item.quantity - borrowed_count))
+    return rows
+
+
+def _annotated_inventory():
+    return inventory_availability(sort="-utilization")
+
+
+def _legacy_category_tree():
+    """Per-item instance counts for every category, as admin_categories used to do"""
+    rows = []
+    for category in Category.objects.all():
+        items = Item.objects.filter(category=category)
+        rows.append((
+            category.id,
+            items.count(),
+            sum(item.instances.count() for item in items),
+            sum(item.instances.filter(status="AVAILABLE").count() for item in items),
+        ))
+    return rows
+
+
+def _grouped_category_tree():
+    return category_summaries()
+
+
+def _benchmark_category():
+    return Category.objects.filter(items__isnull=False).order_by("id").first()
+
+
+def _legacy_category_items():
+    """Instances plus six COUNT queries per item, as admin_category_items used to do"""
+    category = _benchmark_category()
+    rows = []
+    for item in Item.objects.filter(category=category):
+        instances = item.instances.all()
+        rows.append((
+            [instance.reference_id for instance in instances],
+            instances.count(),
+            *(instances.filter(status=status).count()
+              for status in ("AVAILABLE", "IN_USE", "FAULTY", "IN_REPAIR", "OUT_OF_STOCK")),
+        ))
+    return rows
+
+
+def _grouped_category_items():
+    return category_item_rows(_benchmark_category())
+
+
+SCENARIOS = {
+    "stats": [
+        ("legacy per-status counts", _legacy_status_counts),
+        ("single aggregate", _aggregate_status_counts),
+        ("counter table", borrow_counters.status_counts),
+    ],
+    "inventory": [
+        ("legacy per-item counts", _legacy_inventory),
+        ("annotated subquery", _annotated_inventory),
+    ],
+    "categories": [
+        ("legacy category tree", _legacy_category_tree),
+        ("grouped category tree", _grouped_category_tree),
+        ("legacy category items", _legacy_category_items),
+        ("grouped category items", _grouped_category_items),
+    ],
+}
+
+# Variants whose query count must not depend on table size
+CONSTANT_QUERY_VARIANTS = {
+    _aggregate_status_counts: 1,
+    borrow_counters.status_counts: 1,
+    _annotated_inventory: 1,
+    _grouped_category_tree: 2,
+    # category lookup + items + instance prefetch + grouped counts
+    _grouped_category_items: 4,
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark query count and latency of dashboard queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            choices=sorted(SCENARIOS),
+            action="append",
+            help="Scenario to run (repeatable, defaults to all)",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per variant")
+
+    def handle(self, *args, **options):
+        scenarios = options["scenario"] or sorted(SCENARIOS)
+        repeat = max(options["repeat"], 1)
+
+        self.stdout.write(f"Borrow rows: {Borrow.objects.count()}  Item rows: {Item.objects.count()}")
+        failures = []
+        for name in scenarios:
+            self.stdout.write(self.style.SUCCESS(f"\n== {name} =="))
+            for label, func in SCENARIOS[name]:
+                query_count = self._run_variant(label, func, repeat)
+                expected = CONSTANT_QUERY_VARIANTS.get(func)
+                if expected is not None and query_count != expected:
+                    failures.append(f"{name}/{label}: expected {expected} queries, ran {query_count}")
+
+        if failures:
+            raise CommandError("Query count regression:\n  " + "\n  ".join(failures))
+
+    def _run_variant(self, label, func, repeat):
+        # Warm-up run doubles as the query counter
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        query_count = len(ctx.captured_queries)
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f"  {label:<28} queries={query_count:<4} "
+            f"median={statistics.median(timings):8.2f} ms  "
+            f"min={min(timings):8.2f} ms  max={max(timings):8.2f} ms"
+        )
+        return query_count
@@ -0,0 +1,113 @@
+"""
+Print the query plan of every hot query issued by api/views.py.
+Run against a large dataset (see 'seed_benchmark_data') to check that each
+filter is served by one of the composite/partial indexes.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import Borrow, BorrowLog, ItemInstance, Notification
+from api.services import borrow_rollup
+from api.services.borrow_stats import borrow_status_counts
+from api.services.inventory_stats import items_with_availability
+
+PAGE = 51  # default page size + 1, as KeysetPaginator fetches
+
+
+def _hot_queries(ctx):
+    """(name, queryset or callable) pairs mirroring the filters in api/views.py.
+
+    Callables are for aggregates, which execute immediately; the SQL they
+    send is captured and explained instead.
+    """
+    now = ctx["now"]
+    borrower_id = ctx["borrower_id"]
+    borrow_id = ctx["borrow_id"]
+    item_id = ctx["item_id"]
+    own = Borrow.objects.filter(borrower_id=borrower_id)
+
+    return [
+        ("admin_all_borrows page", Borrow.objects.order_by("-borrow_date", "-id")[:PAGE]),
+        ("admin_active_borrows page",
+         Borrow.objects.filter(status=Borrow.Status.ACTIVE).order_by("-borrow_date", "-id")[:PAGE]),
+        ("pending_borrow_requests page",
+         Borrow.objects.filter(status=Borrow.Status.PENDING).order_by("-created_at", "-id")[:PAGE]),
+        ("admin_inventory", items_with_availability()),
+        ("admin_reports_analytics top items", lambda: borrow_rollup.window_top_items(now)),
+        ("admin_reports_analytics top borrowers", borrow_rollup.top_borrowers),
+        ("overdue ACTIVE borrows",
+         Borrow.objects.filter(status=Borrow.Status.ACTIVE, due_date__lt=now).order_by("due_date")),
+        ("borrower_stats", lambda: borrow_status_counts(own)),
+        ("borrower_my_borrows active",
+         own.filter(status__in=[Borrow.Status.ACTIVE, Borrow.Status.LATE]).order_by("-borrow_date")),
+        ("borrower_notifications inbox",
+         Notification.objects.filter(user_id=borrower_id).order_by("-created_at")[:50]),
+        ("borrower_notification_count",
+         Notification.objects.filter(user_id=borrower_id, read=False)
+         .order_by().values("kind").annotate(n=Count("id"))),
+        ("admin_borrow_detail logs", BorrowLog.objects.filter(borrow_id=borrow_id).order_by("-created_at")),
+        ("borrow returns lookup",
+         Borrow.objects.filter(item_instance__reference_id__in=ctx["reference_ids"],
+                               status__in=[Borrow.Status.ACTIVE, Borrow.Status.LATE])
+         .values_list("id", "status", "item_instance_id", "item_instance__reference_id")),
+        ("borrow reservation",
+         ItemInstance.objects.filter(item_id=item_id, status=ItemInstance.ItemStatus.AVAILABLE)[:1]),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on the hot view queries and print their plans"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Use EXPLAIN ANALYZE (executes the queries; PostgreSQL only)",
+        )
+        parser.add_argument("--only", help="Only explain queries whose name contains this text")
+
+    def handle(self, *args, **options):
+        busiest = (
+            Borrow.objects.order_by().values("borrower_id")
+            .annotate(n=Count("id")).order_by("-n").first()
+        )
+        latest = Borrow.objects.order_by("-id").values("id", "item_id").first()
+        ctx = {
+            "now": timezone.now(),
+            "borrower_id": busiest["borrower_id"] if busiest else 0,
+            "borrow_id": latest["id"] if latest else 0,
+            "item_id": latest["item_id"] if latest else 0,
+            "reference_ids": list(
+                ItemInstance.objects.filter(status=ItemInstance.ItemStatus.IN_USE)
+                .values_list("reference_id", flat=True)[:50]
+            ),
+        }
+
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options = {"analyze": True, "buffers": True}
+
+        self.stdout.write(f"Database: {connection.vendor}  Borrow rows: {Borrow.objects.count()}")
+        for name, queryset in _hot_queries(ctx):
+            if options["only"] and options["only"] not in name:
+                continue
+            self.stdout.write(self.style.SUCCESS(f"\n== {name} =="))
+            if callable(queryset):
+                self.stdout.write(self._explain_callable(queryset, explain_options))
+            else:
+                self.stdout.write(queryset.explain(**explain_options))
+
+    def _explain_callable(self, func, explain_options):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        prefix = connection.ops.explain_query_prefix(**explain_options)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                cursor.execute(f"{prefix} {query['sql']}")
+                plans.append("\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall()))
+        return "\n\n".join(plans)
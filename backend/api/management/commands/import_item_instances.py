@@ -0,0 +1,46 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import instance_import
+
+
+class Command(BaseCommand):
+    help = "Bulk-register item instances from a CSV or JSON file (columns: item, reference_id, status, notes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file to import")
+        parser.add_argument(
+            "--format",
+            dest="fmt",
+            choices=instance_import.FORMATS,
+            help="File format (defaults to the file extension)",
+        )
+        parser.add_argument("--batch-size", type=int, default=instance_import.DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate rows without inserting them")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["fmt"] or os.path.splitext(path)[1].lstrip(".").lower()
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as fh:
+                rows = instance_import.parse_rows(fh.read(), fmt)
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except instance_import.InstanceImportError as exc:
+            raise CommandError(str(exc))
+
+        result = instance_import.import_instances(
+            rows, batch_size=max(options["batch_size"], 1), dry_run=options["dry_run"]
+        )
+
+        for error in result["errors"]:
+            self.stdout.write(
+                self.style.WARNING(f"  row {error['row']} ({error['reference_id'] or '-'}): {error['detail']}")
+            )
+
+        verb = "Validated" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {verb} {result['created']} instance(s) across {len(result['items'])} item(s), "
+            f"skipped {result['skipped']} row(s)"
+        ))
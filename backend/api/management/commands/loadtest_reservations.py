@@ -0,0 +1,164 @@
+"""
+Concurrency check for borrow reservations.
+Fires many simultaneous borrow requests at one item from a thread pool (each
+thread has its own database connection) and verifies that no ItemInstance
+was handed to more than one borrow. The same workload is first sent from a
+single thread, and the concurrent run's throughput is reported against it. Needs PostgreSQL: SQLite ignores
+SELECT ... FOR UPDATE. All rows are tagged with the ``loadtest_`` prefix and
+removed afterwards unless --keep is given.
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import Borrow, Item, ItemInstance, UserProfile
+from api.services import borrow_counters
+from api.views import borrower_request_borrow, create_borrow_request
+
+User = get_user_model()
+
+LOADTEST_PREFIX = "loadtest_"
+
+ENDPOINTS = {
+    "create": ("/api/borrow-requests/create/", create_borrow_request),
+    "borrower": ("/api/borrower/request-borrow/", borrower_request_borrow),
+}
+
+
+class Command(BaseCommand):
+    help = "Load-test concurrent borrow reservations and check that no instance is double-allocated"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent worker threads")
+        parser.add_argument("--requests", type=int, default=500, help="Total borrow requests to send")
+        parser.add_argument("--instances", type=int, default=100, help="Free units of the test item")
+        parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="create")
+        parser.add_argument("--keep", action="store_true", help="Keep the test rows for inspection")
+        parser.add_argument("--no-baseline", action="store_true", help="Skip the single-thread baseline run")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Reservation load tests need PostgreSQL (row locks are not enforced on this database).")
+
+        threads = max(options["threads"], 1)
+        total = max(options["requests"], 1)
+        endpoint = ENDPOINTS[options["endpoint"]]
+
+        baseline = None
+        if not options["no_baseline"] and threads > 1:
+            # Same workload from one thread: the throughput concurrency has to beat
+            self._clear()
+            item, users = self._setup(options["instances"], total)
+            _, elapsed = self._fire(endpoint, item, users, 1, total)
+            baseline = total / elapsed
+            self.stdout.write(f"baseline: {total} requests from 1 thread in {elapsed:.2f}s ({baseline:.0f} req/s)")
+
+        self._clear()
+        item, users = self._setup(options["instances"], total)
+        statuses, elapsed = self._fire(endpoint, item, users, threads, total)
+
+        try:
+            self._report(item, options["instances"], total, threads, statuses, elapsed, baseline)
+        finally:
+            if not options["keep"]:
+                self._clear()
+
+    def _fire(self, endpoint, item, users, threads, total):
+        path, view = endpoint
+        factory = APIRequestFactory()
+        due_date = (timezone.now() + timedelta(days=3)).isoformat()
+        first_wave = min(threads, total)
+        start_gate = threading.Barrier(first_wave)
+
+        def send(index):
+            if index < first_wave:
+                # Line up the first wave so it hits the database at the same moment
+                start_gate.wait()
+            try:
+                request = factory.post(path, {"item_id": item.id, "due_date": due_date}, format="json")
+                force_authenticate(request, user=users[index])
+                return view(request).status_code
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = Counter(pool.map(send, range(total)))
+        return statuses, time.perf_counter() - started
+
+    def _setup(self, instance_count, user_count):
+        item = Item.objects.create(name=f"{LOADTEST_PREFIX}item", quantity=instance_count, available=instance_count)
+        ItemInstance.objects.bulk_create(
+            ItemInstance(item=item, reference_id=f"{LOADTEST_PREFIX}{item.id}_{n}")
+            for n in range(instance_count)
+        )
+        # One borrower per request, so the "already pending" check never masks a race
+        User.objects.bulk_create(
+            User(username=f"{LOADTEST_PREFIX}user{n}", is_active=True) for n in range(user_count)
+        )
+        users = list(User.objects.filter(username__startswith=LOADTEST_PREFIX).order_by("id"))
+        UserProfile.objects.bulk_create(
+            UserProfile(
+                user=user,
+                role=UserProfile.Roles.STUDENT,
+                requested_role=UserProfile.Roles.STUDENT,
+                is_approved=True,
+            )
+            for user in users
+        )
+        # Reload so force_authenticate carries users with their profile attached
+        users = list(User.objects.filter(username__startswith=LOADTEST_PREFIX).select_related("profile").order_by("id"))
+        return item, users
+
+    def _report(self, item, instance_count, total, threads, statuses, elapsed, baseline=None):
+        throughput = total / elapsed
+        self.stdout.write(
+            f"{total} requests from {threads} threads in {elapsed:.2f}s ({throughput:.0f} req/s), "
+            f"responses: {dict(sorted(statuses.items()))}"
+        )
+        if baseline:
+            self.stdout.write(f"throughput vs 1-thread baseline: {throughput / baseline:.2f}x")
+
+        borrows = Borrow.objects.filter(item=item)
+        doubled = list(
+            borrows.order_by().values("item_instance").annotate(n=Count("id")).filter(n__gt=1)
+        )
+        created = borrows.count()
+        in_use = ItemInstance.objects.filter(item=item, status=ItemInstance.ItemStatus.IN_USE).count()
+        item.refresh_from_db(fields=["available"])
+
+        problems = []
+        if doubled:
+            problems.append(f"{len(doubled)} instance(s) allocated to more than one borrow")
+        if created != statuses.get(201, 0):
+            problems.append(f"{statuses.get(201, 0)} successful responses but {created} borrows stored")
+        if created != min(total, instance_count):
+            problems.append(f"expected {min(total, instance_count)} borrows, got {created}")
+        if in_use != created:
+            problems.append(f"{in_use} instances IN_USE for {created} borrows")
+        if item.available != instance_count - in_use:
+            problems.append(f"Item.available is {item.available}, expected {instance_count - in_use}")
+
+        if problems:
+            raise CommandError("Reservation check failed:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {created} borrows, each on a distinct instance; Item.available = {item.available}"
+        ))
+
+    def _clear(self):
+        with transaction.atomic():
+            test_borrows = Borrow.objects.filter(borrower__username__startswith=LOADTEST_PREFIX)
+            removed = dict(test_borrows.order_by().values_list("status").annotate(n=Count("id")))
+            test_borrows.delete()
+            borrow_counters.apply_deltas({status: -n for status, n in removed.items()})
+        Item.objects.filter(name__startswith=LOADTEST_PREFIX).delete()
+        User.objects.filter(username__startswith=LOADTEST_PREFIX).delete()
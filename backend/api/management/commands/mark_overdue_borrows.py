@@ -0,0 +1,26 @@
+"""
+Move overdue ACTIVE borrows to LATE.
+Safe to run from cron as often as needed, e.g. every 15 minutes:
+    */15 * * * * cd /app/backend && python manage.py mark_overdue_borrows
+"""
+from django.core.management.base import BaseCommand
+
+from api.services import overdue
+
+
+class Command(BaseCommand):
+    help = "Mark ACTIVE borrows past their due date as LATE"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=overdue.DEFAULT_CHUNK_SIZE, help="Borrows per transaction")
+        parser.add_argument("--limit", type=int, help="Stop after marking this many borrows")
+        parser.add_argument("--dry-run", action="store_true", help="Only report how many borrows are overdue")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = overdue.overdue_active().count()
+            self.stdout.write(f"{count} ACTIVE borrow(s) are overdue")
+            return
+
+        marked = overdue.mark_overdue(chunk_size=max(options["chunk_size"], 1), limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"✓ Marked {marked} overdue borrow(s) as LATE"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.services import borrow_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the borrow status counters from the Borrow table, or verify them with --verify"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare counters against the Borrow table; exit with an error on drift",
+        )
+
+    def handle(self, *args, **options):
+        verify = options["verify"]
+        drift = borrow_counters.rebuild(dry_run=verify)
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("✓ Borrow status counters match the Borrow table"))
+            return
+
+        for borrow_status, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(
+                self.style.WARNING(f"  {borrow_status}: counter={stored} actual={actual}")
+            )
+
+        if verify:
+            raise CommandError(f"{len(drift)} borrow status counter(s) drifted")
+        self.stdout.write(self.style.SUCCESS(f"✓ Rebuilt {len(drift)} counter(s)"))
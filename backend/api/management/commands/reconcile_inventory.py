@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Item
+from api.services import inventory_state
+
+
+class Command(BaseCommand):
+    help = "Recount Item.quantity/available from item instances, or verify them with --verify"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare item counters against their instances; exit with an error on drift",
+        )
+
+    def handle(self, *args, **options):
+        verify = options["verify"]
+        drift = inventory_state.reconcile(dry_run=verify)
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("✓ Item quantities match their instances"))
+            return
+
+        names = dict(Item.objects.filter(id__in=drift).values_list("id", "name"))
+        for item_id, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"  {names.get(item_id, item_id)} (#{item_id}): "
+                    f"quantity={stored[0]} available={stored[1]} "
+                    f"actual quantity={actual[0]} available={actual[1]}"
+                )
+            )
+
+        if verify:
+            raise CommandError(f"{len(drift)} item(s) drifted")
+        self.stdout.write(self.style.SUCCESS(f"✓ Reconciled {len(drift)} item(s)"))
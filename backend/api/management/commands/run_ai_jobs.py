@@ -0,0 +1,48 @@
+"""
+Worker process for queued AI analysis jobs.
+Run alongside the web service, e.g. `python manage.py run_ai_jobs`.
+"""
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.services import ai_jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued AI analysis jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--stale-after", type=int, default=300, help="Requeue RUNNING jobs older than this many seconds")
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options["stale_after"])
+        self.stdout.write("AI job worker started")
+
+        try:
+            while True:
+                close_old_connections()
+                requeued = ai_jobs.requeue_stale(stale_after)
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)"))
+
+                job = ai_jobs.claim_next()
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                started = time.perf_counter()
+                job = ai_jobs.run_job(job)
+                elapsed = time.perf_counter() - started
+                style = self.style.SUCCESS if job.status == job.JobStatus.SUCCEEDED else self.style.ERROR
+                self.stdout.write(style(f"Job {job.id} ({job.kind}) {job.status} in {elapsed:.1f}s"))
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write("AI job worker stopped")
@@ -0,0 +1,184 @@
+"""
+Seed a large synthetic dataset for query benchmarks.
+All rows are tagged with the ``bench_`` prefix so they can be cleared again.
+"""
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models import Borrow, Category, Item, ItemInstance, UserProfile
+from api.services import borrow_counters
+
+User = get_user_model()
+
+BENCH_PREFIX = "bench_"
+
+# Roughly what a long-running lab looks like: mostly returned history
+STATUS_WEIGHTS = [
+    (Borrow.Status.RETURNED, 70),
+    (Borrow.Status.ACTIVE, 10),
+    (Borrow.Status.LATE, 5),
+    (Borrow.Status.PENDING, 5),
+    (Borrow.Status.REJECTED, 7),
+    (Borrow.Status.NOT_RETURNED, 3),
+]
+
+
+@contextmanager
+def _without_auto_now(model, *field_names):
+    """Let bulk_create keep explicit values for auto_now/auto_now_add fields"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic users, items and borrows for benchmarks (prefixed with 'bench_')"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--borrows", type=int, default=1_000_000, help="Number of borrows to create")
+        parser.add_argument("--items", type=int, default=500, help="Number of item types to create")
+        parser.add_argument("--instances-per-item", type=int, default=10)
+        parser.add_argument("--users", type=int, default=2000, help="Number of borrower accounts")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=730, help="Spread borrow dates over this many days")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed")
+        parser.add_argument("--clear", action="store_true", help="Delete previously seeded benchmark data and exit")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            self._clear()
+            return
+
+        rng = random.Random(options["seed"])
+        batch_size = options["batch_size"]
+
+        category, _ = Category.objects.get_or_create(
+            name=Category.CategoryType.DEVICES,
+            defaults={"description": "Electronic devices like laptops, tablets, phones"},
+        )
+
+        users = self._seed_users(options["users"], batch_size)
+        items = self._seed_items(category, options["items"], options["instances_per_item"], batch_size)
+        self._seed_borrows(rng, users, items, options["borrows"], options["days"], batch_size)
+
+        self.stdout.write(self.style.SUCCESS("\n✓ Benchmark data seeded"))
+
+    def _seed_users(self, count, batch_size):
+        existing = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+        new_users = [
+            User(username=f"{BENCH_PREFIX}borrower{i}", is_active=True)
+            for i in range(existing, count)
+        ]
+        # bulk_create skips post_save, so profiles are created explicitly below
+        User.objects.bulk_create(new_users, batch_size=batch_size)
+
+        users = list(User.objects.filter(username__startswith=BENCH_PREFIX).only("id"))
+        missing = User.objects.filter(username__startswith=BENCH_PREFIX, profile__isnull=True)
+        UserProfile.objects.bulk_create(
+            [
+                UserProfile(
+                    user=user,
+                    role=UserProfile.Roles.STUDENT,
+                    requested_role=UserProfile.Roles.STUDENT,
+                    is_approved=True,
+                )
+                for user in missing
+            ],
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"✓ {len(users)} benchmark users")
+        return users
+
+    def _seed_items(self, category, count, instances_per_item, batch_size):
+        existing = Item.objects.filter(name__startswith=BENCH_PREFIX).count()
+        Item.objects.bulk_create(
+            [
+                Item(
+                    name=f"{BENCH_PREFIX}item{i}",
+                    category=category,
+                    quantity=instances_per_item,
+                    available=instances_per_item,
+                )
+                for i in range(existing, count)
+            ],
+            batch_size=batch_size,
+        )
+
+        items = list(Item.objects.filter(name__startswith=BENCH_PREFIX).only("id"))
+        seeded = set(
+            ItemInstance.objects.filter(item__name__startswith=BENCH_PREFIX)
+            .values_list("item_id", flat=True)
+            .distinct()
+        )
+        ItemInstance.objects.bulk_create(
+            [
+                ItemInstance(item=item, reference_id=f"{BENCH_PREFIX}{item.id}_{n}")
+                for item in items
+                if item.id not in seeded
+                for n in range(instances_per_item)
+            ],
+            batch_size=batch_size,
+        )
+        self.stdout.write(f"✓ {len(items)} benchmark items")
+        return items
+
+    def _seed_borrows(self, rng, users, items, count, days, batch_size):
+        existing = Borrow.objects.filter(borrower__username__startswith=BENCH_PREFIX).count()
+        remaining = max(count - existing, 0)
+        statuses = [s for s, _ in STATUS_WEIGHTS]
+        weights = [w for _, w in STATUS_WEIGHTS]
+        now = timezone.now()
+
+        created = 0
+        with _without_auto_now(Borrow, "borrow_date", "created_at", "updated_at"):
+            while created < remaining:
+                size = min(batch_size, remaining - created)
+                batch = []
+                for borrow_status in rng.choices(statuses, weights, k=size):
+                    borrow_date = now - timedelta(seconds=rng.randint(0, days * 86400))
+                    due_date = borrow_date + timedelta(days=rng.randint(1, 14))
+                    returned = borrow_status in (Borrow.Status.RETURNED, Borrow.Status.NOT_RETURNED)
+                    batch.append(Borrow(
+                        item=rng.choice(items),
+                        borrower=rng.choice(users),
+                        borrow_date=borrow_date,
+                        due_date=due_date,
+                        return_date=due_date if returned else None,
+                        status=borrow_status,
+                        created_at=borrow_date,
+                        updated_at=due_date if returned else borrow_date,
+                    ))
+                with transaction.atomic():
+                    Borrow.objects.bulk_create(batch)
+                    borrow_counters.apply_deltas(Counter(borrow.status for borrow in batch))
+                created += size
+                self.stdout.write(f"  → {existing + created}/{count} borrows")
+
+        self.stdout.write(f"✓ {existing + created} benchmark borrows")
+
+    def _clear(self):
+        with transaction.atomic():
+            bench_borrows = Borrow.objects.filter(borrower__username__startswith=BENCH_PREFIX)
+            removed = dict(
+                bench_borrows.order_by().values_list("status").annotate(n=Count("id"))
+            )
+            bench_borrows.delete()
+            borrow_counters.apply_deltas({status: -n for status, n in removed.items()})
+        self.stdout.write(f"✓ Deleted {sum(removed.values())} borrows")
+        Item.objects.filter(name__startswith=BENCH_PREFIX).delete()
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS("✓ Benchmark data cleared"))
@@ -0,0 +1,34 @@
+"""
+Migration operations shared by the api migrations
+"""
+
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """CREATE INDEX CONCURRENTLY on PostgreSQL, a plain AddIndex elsewhere (SQLite in development).
+
+    Building an index on a large, busy table without CONCURRENTLY blocks its
+    writes until the build finishes. The migration using it must set
+    ``atomic = False``.
+    """
+
+    atomic = False
+
+    def _postgres_operation(self, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return None
+        from django.contrib.postgres.operations import AddIndexConcurrently as PostgresAddIndexConcurrently
+
+        return PostgresAddIndexConcurrently(self.model_name, self.index)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        operation = self._postgres_operation(schema_editor) or super()
+        operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        operation = self._postgres_operation(schema_editor) or super()
+        operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"Concurrently create index {self.index.name} on model {self.model_name}"
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+BORROW_STATUSES = ['PENDING', 'ACTIVE', 'RETURNED', 'LATE', 'NOT_RETURNED', 'REJECTED']
+
+
+def seed_counters(apps, schema_editor):
+    Borrow = apps.get_model('api', 'Borrow')
+    BorrowStatusCounter = apps.get_model('api', 'BorrowStatusCounter')
+    counts = dict(Borrow.objects.values_list('status').annotate(n=Count('id')).order_by())
+    BorrowStatusCounter.objects.bulk_create([
+        BorrowStatusCounter(status=status, count=counts.get(status, 0))
+        for status in BORROW_STATUSES
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_alter_borrowlog_action'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BorrowStatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending Approval'), ('ACTIVE', 'Active'), ('RETURNED', 'Returned'), ('LATE', 'Late'), ('NOT_RETURNED', 'Not Returned'), ('REJECTED', 'Rejected')], max_length=20, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['status'],
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
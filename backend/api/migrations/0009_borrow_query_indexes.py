@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+from api.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0008_borrowstatuscounter'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='iteminstance',
+            index=models.Index(fields=['item', 'status'], name='iteminstance_item_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrow',
+            index=models.Index(fields=['borrower', 'status', 'updated_at'], name='borrow_borrower_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrow',
+            index=models.Index(fields=['item', 'status'], name='borrow_item_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrow',
+            index=models.Index(fields=['-borrow_date', '-id'], name='borrow_date_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrow',
+            index=models.Index(fields=['status', '-borrow_date', '-id'], name='borrow_status_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrow',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['-created_at', '-id'], name='borrow_pending_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrow',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['due_date'], name='borrow_active_due_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='borrowlog',
+            index=models.Index(fields=['borrow', '-created_at'], name='borrowlog_borrow_created_idx'),
+        ),
+    ]
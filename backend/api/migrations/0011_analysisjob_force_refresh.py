@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_analysisjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='force_refresh',
+            field=models.BooleanField(default=False, help_text='Bypass the AI response cache'),
+        ),
+    ]
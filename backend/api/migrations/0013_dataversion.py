@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-17 16:25
+
+from django.db import migrations, models
+
+
+DATA_SCOPES = ['catalog', 'borrows']
+
+
+def seed_versions(apps, schema_editor):
+    DataVersion = apps.get_model('api', 'DataVersion')
+    DataVersion.objects.bulk_create([DataVersion(scope=scope, version=1) for scope in DATA_SCOPES])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['scope'],
+            },
+        ),
+        migrations.RunPython(seed_versions, migrations.RunPython.noop),
+    ]
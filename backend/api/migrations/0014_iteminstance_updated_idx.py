@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='iteminstance',
+            index=models.Index(fields=['updated_at'], name='iteminstance_updated_idx'),
+        ),
+    ]
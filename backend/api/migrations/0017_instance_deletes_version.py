@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 18:40
+
+from django.db import migrations
+
+
+def seed_version(apps, schema_editor):
+    DataVersion = apps.get_model('api', 'DataVersion')
+    DataVersion.objects.get_or_create(scope='instance_deletes', defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_borrow_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_version, migrations.RunPython.noop),
+    ]
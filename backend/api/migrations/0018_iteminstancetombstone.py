@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+def drop_version(apps, schema_editor):
+    DataVersion = apps.get_model('api', 'DataVersion')
+    DataVersion.objects.filter(scope='instance_deletes').delete()
+
+
+def seed_version(apps, schema_editor):
+    DataVersion = apps.get_model('api', 'DataVersion')
+    DataVersion.objects.get_or_create(scope='instance_deletes', defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_instance_deletes_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemInstanceTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('instance_id', models.BigIntegerField()),
+                ('reference_id', models.CharField(max_length=50)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(drop_version, seed_version),
+    ]
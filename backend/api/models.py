@@ -32,6 +32,36 @@ class UserProfile(models.Model):
         return f"{self.user.username} - {self.role}"
 
 
+class RFIDCard(models.Model):
+    """RFID badge issued to a user; the scan stations resolve taps by card UID"""
+    uid = models.CharField(max_length=64, unique=True, help_text="Card UID as read by the scanner (hex, no separators)")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="rfid_cards",
+    )
+    label = models.CharField(max_length=100, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "RFID card"
+        ordering = ['uid']
+
+    @staticmethod
+    def normalize_uid(raw):
+        """Scanners differ in case and separators ("04:a2:19 ..." vs "04A219...")"""
+        return "".join(ch for ch in str(raw) if ch.isalnum()).upper()
+
+    def save(self, *args, **kwargs):
+        self.uid = self.normalize_uid(self.uid)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.uid} ({self.user.username})"
+
+
 class Category(models.Model):
     """Equipment categories like Devices, Computer Parts, etc."""
     class CategoryType(models.TextChoices):
@@ -84,6 +114,11 @@ class ItemInstance(models.Model):
 
     class Meta:
         ordering = ['reference_id']
+        indexes = [
+            models.Index(fields=['item', 'status'], name='iteminstance_item_status_idx'),
+            # Incremental refresh of the scan stations' reference index
+            models.Index(fields=['updated_at'], name='iteminstance_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.item.name} - {self.reference_id}"
@@ -131,6 +166,28 @@ class Borrow(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Borrower dashboard, my-borrows and notification filters
+            models.Index(fields=['borrower', 'status', 'updated_at'], name='borrow_borrower_status_idx'),
+            # Borrowed count per item in the inventory listing
+            models.Index(fields=['item', 'status'], name='borrow_item_status_idx'),
+            # Keyset pagination of the borrow listings
+            models.Index(fields=['-borrow_date', '-id'], name='borrow_date_id_idx'),
+            models.Index(fields=['status', '-borrow_date', '-id'], name='borrow_status_date_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='borrow_pending_created_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+            # Overdue lookups only ever look at ACTIVE borrows
+            models.Index(
+                fields=['due_date'],
+                name='borrow_active_due_idx',
+                condition=models.Q(status='ACTIVE'),
+            ),
+        ]
+
     def __str__(self):
         return f"{self.borrower.username} - {self.item.name}"
 
@@ -164,6 +221,159 @@ class BorrowLog(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['borrow', '-created_at'], name='borrowlog_borrow_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.borrow.id} - {self.action} by {self.performed_by}"
+
+
+class BorrowStatusCounter(models.Model):
+    """Denormalized borrow count per status, updated with every status transition"""
+    status = models.CharField(max_length=20, choices=Borrow.Status.choices, unique=True)
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['status']
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class DataVersion(models.Model):
+    """Version counter per data scope, bumped on every write; used for ETags"""
+    scope = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['scope']
+
+    def __str__(self):
+        return f"{self.scope}: v{self.version}"
+
+
+class ItemInstanceTombstone(models.Model):
+    """Deleted item instance, kept so the reference index can drop it without a full reload"""
+    instance_id = models.BigIntegerField()
+    reference_id = models.CharField(max_length=50)
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.reference_id} (deleted {self.deleted_at})"
+
+
+class BorrowDailyRollup(models.Model):
+    """Borrows per (day, item, borrower role) for closed days; kept by 'refresh_borrow_rollup'"""
+    day = models.DateField()
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="daily_rollups")
+    borrower_role = models.CharField(max_length=20, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves the day-range scans of the analytics windows
+            models.UniqueConstraint(fields=['day', 'item', 'borrower_role'], name='borrow_rollup_day_item_role_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.item_id} {self.borrower_role}: {self.count}"
+
+
+class BorrowerRollup(models.Model):
+    """All-time borrow count per borrower up to the rollup checkpoint"""
+    borrower = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="borrow_rollup",
+    )
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count'], name='borrower_rollup_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.borrower_id}: {self.count}"
+
+
+class RollupCheckpoint(models.Model):
+    """How far a rollup has been refreshed (last closed day covered)"""
+    name = models.CharField(max_length=50, unique=True)
+    covered_until = models.DateField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.covered_until}"
+
+
+class AnalysisJob(models.Model):
+    """AI analysis queued by the admin endpoints and run by the 'run_ai_jobs' worker"""
+    class Kind(models.TextChoices):
+        INVENTORY = "INVENTORY", "Inventory Analysis"
+        BORROW_PATTERNS = "BORROW_PATTERNS", "Borrow Pattern Analysis"
+        CUSTOM = "CUSTOM", "Custom Analysis"
+
+    class JobStatus(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        SUCCEEDED = "SUCCEEDED", "Succeeded"
+        FAILED = "FAILED", "Failed"
+
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    payload = models.JSONField(default=dict, help_text="Analytics data captured when the job was queued")
+    result = models.JSONField(null=True, blank=True, help_text="Response body once the job has finished")
+    error = models.TextField(blank=True)
+    force_refresh = models.BooleanField(default=False, help_text="Bypass the AI response cache")
+    attempts = models.PositiveIntegerField(default=0)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="analysis_jobs",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='analysisjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.status})"
+
+
+class Notification(models.Model):
+    """Borrower inbox entry, written when a request is decided or a borrow goes overdue"""
+    class Kind(models.TextChoices):
+        APPROVED = "APPROVED", "Request Approved"
+        REJECTED = "REJECTED", "Request Rejected"
+        OVERDUE = "OVERDUE", "Item Overdue"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    borrow = models.ForeignKey(Borrow, on_delete=models.CASCADE, null=True, blank=True, related_name="notifications")
+    metadata = models.JSONField(default=dict, blank=True, help_text="Item name, reference ID, due date, etc.")
+    read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'read', '-created_at'], name='notification_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user} ({'read' if self.read else 'unread'})"
@@ -0,0 +1,158 @@
+"""
+Response cache for AI analyses
+
+Entries are keyed by provider name plus a SHA-256 of the formatted prompt, so
+the same analytics data never hits the provider API twice within the TTL.
+Only real provider answers are cached; rule-based fallbacks are not.
+
+The default backend is Django's shared cache (CACHES), so a clear reaches
+every worker. The local backend is per process: clearing it, and its entry
+count, only cover the worker that served the request. Hit/miss counters are
+always per worker.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from .ttl_cache import TTLCache
+
+
+class InProcessBackend:
+    """LRU + TTL cache local to the worker process"""
+
+    name = "local"
+    shared = False
+
+    def __init__(self, ttl: float, max_entries: int):
+        self._cache = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str):
+        self._cache.set(key, value)
+
+    def clear(self):
+        self._cache.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._cache)
+
+
+class DjangoCacheBackend:
+    """Shared cache through Django's cache framework (e.g. Redis or database cache)"""
+
+    name = "django"
+    shared = True
+
+    def __init__(self, ttl: float, alias: str = "default", prefix: str = "ai-analysis"):
+        self.alias = alias
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @property
+    def _cache(self):
+        # caches[] hands out a per-thread connection, so look it up on each use
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.prefix}:generation"
+
+    def _generation(self) -> int:
+        generation = self._cache.get(self._generation_key)
+        if generation is None:
+            self._cache.add(self._generation_key, 1, timeout=None)
+            generation = self._cache.get(self._generation_key, 1)
+        return generation
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(f"{self.prefix}:{key}", version=self._generation())
+
+    def set(self, key: str, value: str):
+        self._cache.set(f"{self.prefix}:{key}", value, timeout=self.ttl, version=self._generation())
+
+    def clear(self):
+        # Entries of older generations are never read again and expire on their own
+        try:
+            self._cache.incr(self._generation_key)
+        except ValueError:
+            self._cache.set(self._generation_key, 2, timeout=None)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class AIResponseCache:
+    """Content-addressed cache in front of the provider calls, with hit/miss counters"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def make_key(provider_name: str, prompt: str) -> str:
+        # Whitespace differences do not change what the model is asked
+        normalized = " ".join(prompt.split())
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return f"{provider_name}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        if self.enabled:
+            self.backend.set(key, value)
+
+    def record_refresh(self):
+        with self._lock:
+            self.refreshes += 1
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend.name if self.enabled else None,
+                # Whether entries (and clearing) span all workers; counters never do
+                "shared": self.backend.shared if self.enabled else False,
+                "entries": self.backend.size() if self.enabled else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def build_cache_from_settings() -> AIResponseCache:
+    """AI_CACHE_BACKEND is 'django' (default), 'local' or 'none'"""
+    from django.conf import settings
+
+    backend_name = getattr(settings, "AI_CACHE_BACKEND", "django")
+    ttl = getattr(settings, "AI_CACHE_TTL", 900)
+    if backend_name == "none":
+        return AIResponseCache(None)
+    if backend_name == "django":
+        return AIResponseCache(DjangoCacheBackend(ttl, alias=getattr(settings, "AI_CACHE_ALIAS", "default")))
+    return AIResponseCache(InProcessBackend(ttl, getattr(settings, "AI_CACHE_MAX_ENTRIES", 256)))
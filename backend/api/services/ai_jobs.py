@@ -0,0 +1,117 @@
+"""
+Background AI analysis jobs
+
+The admin AI endpoints capture their analytics data into an AnalysisJob and
+return straight away; the 'run_ai_jobs' worker claims queued jobs with
+SELECT ... FOR UPDATE SKIP LOCKED and makes the slow provider call outside
+the web workers.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import AnalysisJob
+from .ai_service import ai_service
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue(kind: str, payload: Dict[str, Any], user=None, refresh: bool = False) -> AnalysisJob:
+    return AnalysisJob.objects.create(kind=kind, payload=payload, requested_by=user, force_refresh=refresh)
+
+
+def claim_next() -> Optional[AnalysisJob]:
+    """Mark the oldest queued job RUNNING and return it, or None if the queue is empty.
+
+    Concurrent workers skip rows another worker has locked, so each job is
+    claimed exactly once.
+    """
+    with transaction.atomic():
+        job = (
+            AnalysisJob.objects.select_for_update(skip_locked=True)
+            .filter(status=AnalysisJob.JobStatus.QUEUED)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = AnalysisJob.JobStatus.RUNNING
+        job.started_at = timezone.now()
+        job.attempts = F("attempts") + 1
+        job.save(update_fields=["status", "started_at", "attempts"])
+    job.refresh_from_db(fields=["attempts"])
+    return job
+
+
+def _execute(job: AnalysisJob) -> Dict[str, Any]:
+    """Run the provider call and build the same body the synchronous endpoint returns"""
+    payload = job.payload
+    if job.kind == AnalysisJob.Kind.INVENTORY:
+        return {
+            "ai_available": True,
+            "analytics": payload,
+            "ai_analysis": ai_service.analyze_inventory(payload, refresh=job.force_refresh),
+        }
+    if job.kind == AnalysisJob.Kind.BORROW_PATTERNS:
+        return {
+            "ai_available": True,
+            "borrow_data": payload,
+            "ai_analysis": ai_service.analyze_borrow_patterns(payload, refresh=job.force_refresh),
+        }
+    if job.kind == AnalysisJob.Kind.CUSTOM:
+        return {
+            "ai_available": True,
+            "analysis_type": payload["analysis_type"],
+            "ai_analysis": ai_service.generate_custom_analysis(
+                payload["analysis_type"], payload.get("data", {}), refresh=job.force_refresh
+            ),
+        }
+    raise ValueError(f"Unknown analysis job kind: {job.kind}")
+
+
+def run_job(job: AnalysisJob) -> AnalysisJob:
+    try:
+        job.result = _execute(job)
+        job.status = AnalysisJob.JobStatus.SUCCEEDED
+        job.error = ""
+    except Exception as e:
+        logger.exception(f"Analysis job {job.id} failed")
+        job.status = AnalysisJob.JobStatus.FAILED
+        job.error = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["result", "status", "error", "finished_at"])
+    return job
+
+
+def requeue_stale(running_for: timedelta) -> int:
+    """Put jobs back on the queue whose worker died mid-run; give up after MAX_ATTEMPTS"""
+    cutoff = timezone.now() - running_for
+    stale = AnalysisJob.objects.filter(status=AnalysisJob.JobStatus.RUNNING, started_at__lt=cutoff)
+    stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=AnalysisJob.JobStatus.FAILED,
+        error="Worker did not finish the job.",
+        finished_at=timezone.now(),
+    )
+    return stale.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status=AnalysisJob.JobStatus.QUEUED, started_at=None
+    )
+
+
+def serialize_job(job: AnalysisJob) -> Dict[str, Any]:
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "error": job.error or None,
+        "result": job.result,
+    }
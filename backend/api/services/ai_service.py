@@ -6,9 +6,12 @@ Supports multiple AI providers and analysis types
 import os
 import requests
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
 
+from .ai_cache import AIResponseCache, build_cache_from_settings
+from .ai_transport import CircuitOpenError, ProviderTransport
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,10 +19,14 @@ class AIProvider(ABC):
     """Abstract base class for AI providers"""
 
     @abstractmethod
-    def analyze(self, prompt: str, context: Dict[str, Any] = None) -> str:
-        """Analyze data and return insights"""
+    def complete(self, prompt: str) -> Optional[str]:
+        """Call the provider API; returns None when the call fails"""
         pass
 
+    def analyze(self, prompt: str, context: Dict[str, Any] = None) -> str:
+        """Analyze data and return insights, falling back to rule-based analysis"""
+        return self.complete(prompt) or self._generate_fallback_analysis(context)
+
     @abstractmethod
     def is_available(self) -> bool:
         """Check if provider is available"""
@@ -31,18 +38,21 @@ class GoogleGeminiProvider(AIProvider):
 
     def __init__(self):
         self.api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
-        self.api_url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent"
-        self.timeout = 30
+        self.api_url = os.getenv(
+            "GOOGLE_GEMINI_API_URL",
+            "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent",
+        )
+        self.transport = ProviderTransport.from_env("gemini")
 
     def is_available(self) -> bool:
         """Check if Google Gemini API key is configured"""
         return bool(self.api_key)
 
-    def analyze(self, prompt: str, context: Dict[str, Any] = None) -> str:
+    def complete(self, prompt: str) -> Optional[str]:
         """Call Google Gemini API for analysis"""
         if not self.is_available():
             logger.warning("Google Gemini API key not configured")
-            return self._generate_fallback_analysis(context)
+            return None
 
         try:
             url = f"{self.api_url}?key={self.api_key}"
@@ -59,11 +69,10 @@ class GoogleGeminiProvider(AIProvider):
                 }
             }
 
-            response = requests.post(
+            response = self.transport.post(
                 url,
                 headers=headers,
                 json=payload,
-                timeout=self.timeout,
             )
 
             if response.status_code == 200:
@@ -71,18 +80,21 @@ class GoogleGeminiProvider(AIProvider):
                 if "candidates" in result and len(result["candidates"]) > 0:
                     text = result["candidates"][0]["content"]["parts"][0]["text"]
                     return text.strip()
-                return self._generate_fallback_analysis(context)
+                return None
             else:
                 logger.error(f"Google Gemini API error: {response.status_code}")
                 logger.error(f"Response: {response.text}")
-                return self._generate_fallback_analysis(context)
+                return None
 
+        except CircuitOpenError:
+            logger.warning("Google Gemini circuit open, using fallback analysis")
+            return None
         except requests.exceptions.Timeout:
             logger.error("Google Gemini API request timeout")
-            return self._generate_fallback_analysis(context)
+            return None
         except Exception as e:
             logger.error(f"Google Gemini API error: {str(e)}")
-            return self._generate_fallback_analysis(context)
+            return None
 
     def _generate_fallback_analysis(self, context: Dict[str, Any]) -> str:
         """Generate rule-based analysis when AI is unavailable"""
@@ -183,19 +195,19 @@ class OpenAIProvider(AIProvider):
 
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        self.api_url = "https://api.openai.com/v1/chat/completions"
+        self.api_url = os.getenv("OPENAI_API_URL", "https://api.openai.com/v1/chat/completions")
         self.model = "gpt-3.5-turbo"
-        self.timeout = 30
+        self.transport = ProviderTransport.from_env("openai")
 
     def is_available(self) -> bool:
         """Check if OpenAI API key is configured"""
         return bool(self.api_key)
 
-    def analyze(self, prompt: str, context: Dict[str, Any] = None) -> str:
+    def complete(self, prompt: str) -> Optional[str]:
         """Call OpenAI API for analysis"""
         if not self.is_available():
             logger.warning("OpenAI API key not configured")
-            return self._generate_fallback_analysis(context)
+            return None
 
         try:
             headers = {
@@ -218,11 +230,10 @@ class OpenAIProvider(AIProvider):
                 "temperature": 0.7
             }
 
-            response = requests.post(
+            response = self.transport.post(
                 self.api_url,
                 headers=headers,
                 json=payload,
-                timeout=self.timeout,
             )
 
             if response.status_code == 200:
@@ -231,14 +242,17 @@ class OpenAIProvider(AIProvider):
             else:
                 logger.error(f"OpenAI API error: {response.status_code}")
                 logger.error(f"Response: {response.text}")
-                return self._generate_fallback_analysis(context)
+                return None
 
+        except CircuitOpenError:
+            logger.warning("OpenAI circuit open, using fallback analysis")
+            return None
         except requests.exceptions.Timeout:
             logger.error("OpenAI API request timeout")
-            return self._generate_fallback_analysis(context)
+            return None
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
-            return self._generate_fallback_analysis(context)
+            return None
 
     def _generate_fallback_analysis(self, context: Dict[str, Any]) -> str:
         """Generate rule-based analysis when AI is unavailable"""
@@ -348,18 +362,18 @@ class HuggingFaceProvider(AIProvider):
         # Using Facebook's BART for summarization/text generation - very stable
         self.model = "facebook/bart-large-cnn"
         # Updated to new Hugging Face router endpoint
-        self.api_url = f"https://router.huggingface.co/models/{self.model}"
-        self.timeout = 30
+        self.api_url = os.getenv("HUGGINGFACE_API_URL", f"https://router.huggingface.co/models/{self.model}")
+        self.transport = ProviderTransport.from_env("huggingface")
 
     def is_available(self) -> bool:
         """Check if Hugging Face API key is configured"""
         return bool(self.api_key)
 
-    def analyze(self, prompt: str, context: Dict[str, Any] = None) -> str:
-        """Call Hugging Face API for analysis with fallback to rule-based analysis"""
+    def complete(self, prompt: str) -> Optional[str]:
+        """Call Hugging Face API for analysis"""
         if not self.is_available():
             logger.warning("Hugging Face API key not configured")
-            return self._generate_fallback_analysis(context)
+            return None
 
         try:
             headers = {"Authorization": f"Bearer {self.api_key}"}
@@ -373,31 +387,33 @@ class HuggingFaceProvider(AIProvider):
                 },
             }
 
-            response = requests.post(
+            response = self.transport.post(
                 self.api_url,
                 headers=headers,
                 json=payload,
-                timeout=self.timeout,
             )
 
             if response.status_code == 200:
                 result = response.json()
                 if isinstance(result, list) and len(result) > 0:
-                    return result[0].get("summary_text", "").strip()
+                    return result[0].get("summary_text", "").strip() or None
                 elif isinstance(result, dict):
-                    return result.get("summary_text", "").strip()
-                return self._generate_fallback_analysis(context)
+                    return result.get("summary_text", "").strip() or None
+                return None
             else:
                 logger.error(f"Hugging Face API error: {response.status_code}")
                 logger.error(f"Response: {response.text}")
-                return self._generate_fallback_analysis(context)
+                return None
 
+        except CircuitOpenError:
+            logger.warning("Hugging Face circuit open, using fallback analysis")
+            return None
         except requests.exceptions.Timeout:
             logger.error("Hugging Face API request timeout")
-            return self._generate_fallback_analysis(context)
+            return None
         except Exception as e:
             logger.error(f"Hugging Face API error: {str(e)}")
-            return self._generate_fallback_analysis(context)
+            return None
 
     def _generate_fallback_analysis(self, context: Dict[str, Any]) -> str:
         """Generate rule-based analysis when AI is unavailable"""
@@ -510,6 +526,40 @@ class AIService:
         }
         # Try Gemini first (free), then OpenAI, then Hugging Face
         self.active_provider = "gemini"
+        self._cache = None
+
+    @property
+    def cache(self) -> AIResponseCache:
+        """Response cache, built from settings on first use"""
+        if self._cache is None:
+            self._cache = build_cache_from_settings()
+        return self._cache
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def provider_health(self) -> Dict[str, Any]:
+        """Circuit breaker state of every provider transport"""
+        return {name: provider.transport.breaker.snapshot() for name, provider in self.providers.items()}
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    def _analyze(self, provider: AIProvider, prompt: str, context: Dict[str, Any], refresh: bool = False) -> str:
+        """Serve from the response cache, or call the provider and cache a real answer"""
+        key = self.cache.make_key(self.active_provider, prompt)
+        if refresh:
+            self.cache.record_refresh()
+        else:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        text = provider.complete(prompt)
+        if text:
+            self.cache.set(key, text)
+            return text
+        return provider._generate_fallback_analysis(context)
 
     def set_provider(self, provider_name: str):
         """Switch between AI providers"""
@@ -537,7 +587,7 @@ class AIService:
         provider = self.get_active_provider()
         return provider and provider.is_available()
 
-    def analyze_inventory(self, analytics_data: Dict[str, Any]) -> str:
+    def analyze_inventory(self, analytics_data: Dict[str, Any], refresh: bool = False) -> str:
         """Analyze inventory data and generate recommendations"""
         provider = self.get_active_provider()
         if not provider or not provider.is_available():
@@ -545,34 +595,34 @@ class AIService:
 
         # Format data for AI analysis
         prompt = self._format_inventory_prompt(analytics_data)
-        return provider.analyze(prompt, context=analytics_data)
+        return self._analyze(provider, prompt, analytics_data, refresh=refresh)
 
-    def analyze_borrow_patterns(self, borrow_data: Dict[str, Any]) -> str:
+    def analyze_borrow_patterns(self, borrow_data: Dict[str, Any], refresh: bool = False) -> str:
         """Analyze borrow patterns and trends"""
         provider = self.get_active_provider()
         if not provider or not provider.is_available():
             return None
 
         prompt = self._format_borrow_patterns_prompt(borrow_data)
-        return provider.analyze(prompt, context=borrow_data)
+        return self._analyze(provider, prompt, borrow_data, refresh=refresh)
 
-    def analyze_user_behavior(self, user_data: Dict[str, Any]) -> str:
+    def analyze_user_behavior(self, user_data: Dict[str, Any], refresh: bool = False) -> str:
         """Analyze user borrowing behavior"""
         provider = self.get_active_provider()
         if not provider or not provider.is_available():
             return None
 
         prompt = self._format_user_behavior_prompt(user_data)
-        return provider.analyze(prompt, context=user_data)
+        return self._analyze(provider, prompt, user_data, refresh=refresh)
 
-    def generate_custom_analysis(self, analysis_type: str, data: Dict[str, Any]) -> str:
+    def generate_custom_analysis(self, analysis_type: str, data: Dict[str, Any], refresh: bool = False) -> str:
         """Generate custom analysis for extensibility"""
         provider = self.get_active_provider()
         if not provider or not provider.is_available():
             return None
 
         prompt = self._format_custom_prompt(analysis_type, data)
-        return provider.analyze(prompt, context=data)
+        return self._analyze(provider, prompt, data, refresh=refresh)
 
     @staticmethod
     def _format_inventory_prompt(data: Dict[str, Any]) -> str:
@@ -0,0 +1,179 @@
+"""
+HTTP transport for AI providers
+
+One keep-alive ``requests.Session`` per provider, separate connect/read
+timeouts, bounded exponential backoff on errors that guarantee the provider
+never processed the request (calls are billed POSTs), and a circuit
+breaker that fails fast while a provider is down so callers drop straight to
+the rule-based fallback instead of waiting out the timeout on every request.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: the provider turned the request away unprocessed.
+# Other 5xx may come after the (billed) work was done, so they are not retried.
+RETRY_STATUSES = {429, 503}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Classic closed/open/half-open breaker.
+
+    After ``failure_threshold`` consecutive failed calls the circuit opens and
+    every call is rejected for ``reset_timeout`` seconds. Then one trial call
+    is let through: success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class ProviderTransport:
+    """Pooled, retrying, circuit-broken POST client for one provider"""
+
+    def __init__(
+        self,
+        name: str,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 20.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 4.0,
+        pool_size: int = 4,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        # Retries are handled below so they share the breaker and backoff budget
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls, name: str) -> "ProviderTransport":
+        """Build a transport configured by the AI_HTTP_* / AI_BREAKER_* environment variables"""
+        return cls(
+            name,
+            connect_timeout=_env_float("AI_HTTP_CONNECT_TIMEOUT", 3.05),
+            read_timeout=_env_float("AI_HTTP_READ_TIMEOUT", 20.0),
+            max_retries=int(_env_float("AI_HTTP_MAX_RETRIES", 2)),
+            backoff_base=_env_float("AI_HTTP_BACKOFF", 0.5),
+            backoff_max=_env_float("AI_HTTP_BACKOFF_MAX", 4.0),
+            breaker=CircuitBreaker(
+                failure_threshold=int(_env_float("AI_BREAKER_FAILURES", 3)),
+                reset_timeout=_env_float("AI_BREAKER_RESET", 60.0),
+            ),
+        )
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            delay = min(self.backoff_max, float(response.headers["Retry-After"]))
+        # Full jitter keeps several workers from retrying in lockstep
+        return random.uniform(0, delay)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST with retries. Raises CircuitOpenError without touching the network
+        while the circuit is open, and re-raises the last network error once the
+        retry budget is spent.
+
+        Only failures to connect are retried. A read timeout means the request
+        was sent and may be running (and billed), so it is raised at once.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.post(url, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # Includes ConnectTimeout; ReadTimeout falls to the clause below
+                logger.warning(f"{self.name} request failed (attempt {attempt + 1}): {e}")
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            except requests.exceptions.RequestException:
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES or response.status_code >= 500:
+                logger.warning(f"{self.name} returned {response.status_code} (attempt {attempt + 1})")
+                if last_attempt or response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_failure()
+                    return response
+                time.sleep(self._backoff(attempt, response))
+                continue
+
+            # Anything else (including 4xx) means the provider itself is up
+            self.breaker.record_success()
+            return response
@@ -0,0 +1,112 @@
+"""
+Batch approval/rejection of pending borrow requests
+
+All requested borrows are decided in one transaction: the PENDING rows are
+locked, moved with a single conditional UPDATE, and their BorrowLog entries
+written with one ``bulk_create``. IDs that are unknown or no longer pending
+are reported per ID instead of failing the batch.
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Borrow, BorrowLog
+from . import borrow_counters, inventory_state, notifications
+
+MAX_BATCH_SIZE = 500
+
+APPROVE = "approve"
+REJECT = "reject"
+DECISIONS = {
+    APPROVE: (Borrow.Status.ACTIVE, BorrowLog.ActionType.APPROVED, "approved"),
+    REJECT: (Borrow.Status.REJECTED, BorrowLog.ActionType.REJECTED, "rejected"),
+}
+
+
+class BatchDecisionError(ValueError):
+    """Raised for a batch request that cannot be processed at all"""
+
+
+def parse_borrow_ids(raw) -> List[int]:
+    if not isinstance(raw, list) or not raw:
+        raise BatchDecisionError("borrow_ids must be a non-empty list.")
+    if len(raw) > MAX_BATCH_SIZE:
+        raise BatchDecisionError(f"At most {MAX_BATCH_SIZE} borrow requests per batch.")
+    try:
+        ids = [int(value) for value in raw]
+    except (TypeError, ValueError):
+        raise BatchDecisionError("borrow_ids must contain integers.")
+    # Keep the caller's order but decide each ID once
+    return list(dict.fromkeys(ids))
+
+
+def decide(borrow_ids: Iterable[int], decision: str, handler, reason: str = "No reason provided") -> List[Dict[str, Any]]:
+    """Approve or reject pending borrows; returns ``[{"id", "outcome"}]`` in input order.
+
+    ``outcome`` is ``approved``/``rejected``, ``not_found``, or
+    ``already_<status>`` for borrows that were no longer pending.
+    """
+    if decision not in DECISIONS:
+        raise BatchDecisionError(f"decision must be one of: {', '.join(DECISIONS)}.")
+    new_status, action, outcome = DECISIONS[decision]
+    borrow_ids = list(borrow_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        pending = list(
+            Borrow.objects.select_for_update()
+            .filter(id__in=borrow_ids, status=Borrow.Status.PENDING)
+            .order_by("id")
+            .values_list("id", "item_instance_id")
+        )
+        decided_ids = [borrow_id for borrow_id, _ in pending]
+
+        if decided_ids:
+            changes = {"status": new_status, "handler": handler, "updated_at": now}
+            if decision == REJECT:
+                changes["notes"] = f"Rejected: {reason}"
+            Borrow.objects.filter(id__in=decided_ids, status=Borrow.Status.PENDING).update(**changes)
+
+            if decision == REJECT:
+                metadata = {"reason": reason, "rejected_at": now.isoformat(), "batch": True}
+                description = f"Borrow request rejected by {handler.username}"
+                inventory_state.release_instances(
+                    [instance_id for _, instance_id in pending], exclude_borrow_ids=decided_ids
+                )
+            else:
+                metadata = {"approved_at": now.isoformat(), "batch": True}
+                description = f"Borrow request approved by {handler.username}"
+            # Counters after the item rows (see borrow_counters lock order)
+            borrow_counters.record_transition(Borrow.Status.PENDING, new_status, count=len(decided_ids))
+
+            BorrowLog.objects.bulk_create([
+                BorrowLog(
+                    borrow_id=borrow_id,
+                    action=action,
+                    performed_by=handler,
+                    description=description,
+                    metadata=metadata,
+                )
+                for borrow_id in decided_ids
+            ])
+            notifications.notify_for_borrows(
+                decided_ids,
+                notifications.Kind.APPROVED if decision == APPROVE else notifications.Kind.REJECTED,
+                notes=changes.get("notes", ""),
+            )
+
+    others = dict(
+        Borrow.objects.filter(id__in=set(borrow_ids) - set(decided_ids)).values_list("id", "status")
+    )
+    decided = set(decided_ids)
+    results = []
+    for borrow_id in borrow_ids:
+        if borrow_id in decided:
+            results.append({"id": borrow_id, "outcome": outcome})
+        elif borrow_id in others:
+            results.append({"id": borrow_id, "outcome": f"already_{others[borrow_id].lower()}"})
+        else:
+            results.append({"id": borrow_id, "outcome": "not_found"})
+    return results
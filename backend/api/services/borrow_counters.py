@@ -0,0 +1,103 @@
+"""
+Materialized borrow status counters
+
+Every code path that creates a Borrow or changes its status calls
+``record_transition`` inside the same transaction, so dashboard endpoints can
+read the counts in O(1) instead of scanning the Borrow table.
+
+Lock order: a transaction that touches several kinds of rows locks them as
+ItemInstance rows, then Item rows (``inventory_state``), then counter rows.
+Callers therefore move the counters last, after any inventory change.
+"""
+
+from collections import Counter
+from typing import Dict, Optional
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from ..models import Borrow, BorrowStatusCounter
+from . import data_version
+from .borrow_stats import STATUS_KEYS
+
+
+def record_transition(old_status: Optional[str], new_status: Optional[str], count: int = 1):
+    """Move ``count`` borrows from ``old_status`` to ``new_status``.
+
+    Use ``old_status=None`` for newly created borrows and ``new_status=None``
+    for deleted ones. Must run inside the transaction that changes the rows.
+    """
+    if old_status == new_status or not count:
+        return
+    deltas = Counter()
+    if old_status:
+        deltas[old_status] -= count
+    if new_status:
+        deltas[new_status] += count
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas: Dict[str, int]):
+    """Apply several per-status deltas at once (used by bulk transitions)"""
+    if not any(deltas.values()):
+        return
+    with transaction.atomic():
+        now = timezone.now()
+        data_version.bump(data_version.BORROWS)
+        # Sorted so two transactions never take the counter rows in opposite order;
+        # ordering against other tables is the callers' job (see module docstring)
+        for borrow_status in sorted(deltas):
+            delta = deltas[borrow_status]
+            if not delta:
+                continue
+            updated = BorrowStatusCounter.objects.filter(status=borrow_status).update(
+                count=F("count") + delta, updated_at=now
+            )
+            if not updated:
+                BorrowStatusCounter.objects.get_or_create(status=borrow_status)
+                BorrowStatusCounter.objects.filter(status=borrow_status).update(
+                    count=F("count") + delta, updated_at=now
+                )
+
+
+def status_counts() -> Dict[str, int]:
+    """Read all status counters in one query, keyed like ``borrow_status_counts``"""
+    counts = dict(BorrowStatusCounter.objects.values_list("status", "count"))
+    result = {key: counts.get(borrow_status, 0) for borrow_status, key in STATUS_KEYS.items()}
+    result["total_borrows"] = sum(result.values())
+    return result
+
+
+def ground_truth() -> Dict[str, int]:
+    """Per-status counts straight from the Borrow table"""
+    return dict(
+        Borrow.objects.order_by().values_list("status").annotate(n=Count("id"))
+    )
+
+
+def rebuild(dry_run: bool = False) -> Dict[str, tuple]:
+    """Recount every status from the Borrow table and fix drifted counters.
+
+    Returns ``{status: (stored, actual)}`` for every counter that was off.
+    Counter rows are locked for the duration so in-flight transitions apply
+    their deltas after the recount rather than being lost.
+    """
+    with transaction.atomic():
+        stored = dict(
+            BorrowStatusCounter.objects.select_for_update().values_list("status", "count")
+        )
+        actual = ground_truth()
+        drift = {}
+        for borrow_status in Borrow.Status.values:
+            stored_count = stored.get(borrow_status)
+            actual_count = actual.get(borrow_status, 0)
+            if stored_count != actual_count:
+                drift[borrow_status] = (stored_count, actual_count)
+
+        if not dry_run:
+            for borrow_status, (_, actual_count) in drift.items():
+                BorrowStatusCounter.objects.update_or_create(
+                    status=borrow_status, defaults={"count": actual_count}
+                )
+    return drift
@@ -0,0 +1,112 @@
+"""
+Bulk return processing from scanned reference IDs
+
+A burst of scanned units is resolved to its open (ACTIVE or LATE) borrows
+with one query joined on the unique ``ItemInstance.reference_id``. The
+borrows are moved to RETURNED with one UPDATE, their instances freed with
+one UPDATE, and their RETURNED logs written with one ``bulk_create``, all in
+a single transaction.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Borrow, BorrowLog, ItemInstance
+from . import borrow_counters, inventory_state
+
+MAX_BATCH_SIZE = 500
+
+OPEN_STATUSES = (Borrow.Status.ACTIVE, Borrow.Status.LATE)
+
+
+class ReturnError(ValueError):
+    """Raised for a return batch that cannot be processed at all"""
+
+
+def parse_reference_ids(raw) -> List[str]:
+    if not isinstance(raw, list) or not raw:
+        raise ReturnError("reference_ids must be a non-empty list.")
+    if len(raw) > MAX_BATCH_SIZE:
+        raise ReturnError(f"At most {MAX_BATCH_SIZE} items per return batch.")
+    reference_ids = [str(value).strip() for value in raw if str(value).strip()]
+    if not reference_ids:
+        raise ReturnError("reference_ids must contain reference IDs.")
+    # Keep the scan order but return each unit once
+    return list(dict.fromkeys(reference_ids))
+
+
+def process_returns(reference_ids: Iterable[str], handler, notes: str = "") -> List[Dict[str, Any]]:
+    """Return the open borrows of the scanned units; returns ``[{"reference_id", "outcome"}]``.
+
+    ``outcome`` is ``returned`` (with ``borrow_id`` and ``was_late``),
+    ``not_borrowed`` for a known unit without an open borrow, or ``not_found``.
+    """
+    reference_ids = list(reference_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        open_borrows = list(
+            Borrow.objects.select_for_update(of=("self",))
+            .filter(item_instance__reference_id__in=reference_ids, status__in=OPEN_STATUSES)
+            .order_by("id")
+            .values_list("id", "status", "item_instance_id", "item_instance__reference_id")
+        )
+        returned = {}
+        for borrow_id, old_status, instance_id, reference_id in open_borrows:
+            # A unit has at most one open borrow; keep the oldest if data says otherwise
+            returned.setdefault(reference_id, (borrow_id, old_status, instance_id))
+
+        if returned:
+            borrow_ids = [borrow_id for borrow_id, _, _ in returned.values()]
+            Borrow.objects.filter(id__in=borrow_ids, status__in=OPEN_STATUSES).update(
+                status=Borrow.Status.RETURNED, return_date=now, updated_at=now
+            )
+            inventory_state.release_instances(
+                [instance_id for _, _, instance_id in returned.values()], exclude_borrow_ids=borrow_ids
+            )
+
+            # Counters after the item rows (see borrow_counters lock order)
+            moved = Counter(old_status for _, old_status, _ in returned.values())
+            deltas = {old_status: -count for old_status, count in moved.items()}
+            deltas[Borrow.Status.RETURNED] = len(borrow_ids)
+            borrow_counters.apply_deltas(deltas)
+
+            BorrowLog.objects.bulk_create([
+                BorrowLog(
+                    borrow_id=borrow_id,
+                    action=BorrowLog.ActionType.RETURNED,
+                    performed_by=handler,
+                    description=f"Item returned to {handler.username}" + (f": {notes}" if notes else ""),
+                    metadata={
+                        "reference_id": reference_id,
+                        "returned_at": now.isoformat(),
+                        "was_late": old_status == Borrow.Status.LATE,
+                        "batch": True,
+                    },
+                )
+                for reference_id, (borrow_id, old_status, _) in returned.items()
+            ])
+
+    missing = [reference_id for reference_id in reference_ids if reference_id not in returned]
+    known = set(
+        ItemInstance.objects.filter(reference_id__in=missing).values_list("reference_id", flat=True)
+    ) if missing else set()
+
+    results = []
+    for reference_id in reference_ids:
+        if reference_id in returned:
+            borrow_id, old_status, _ = returned[reference_id]
+            results.append({
+                "reference_id": reference_id,
+                "outcome": "returned",
+                "borrow_id": borrow_id,
+                "was_late": old_status == Borrow.Status.LATE,
+            })
+        elif reference_id in known:
+            results.append({"reference_id": reference_id, "outcome": "not_borrowed"})
+        else:
+            results.append({"reference_id": reference_id, "outcome": "not_found"})
+    return results
@@ -0,0 +1,240 @@
+"""
+Daily borrow rollups for the analytics views
+
+``BorrowDailyRollup`` holds borrows per (day, item, borrower role) and
+``BorrowerRollup`` the all-time count per borrower, both for closed days up
+to ``RollupCheckpoint.covered_until``. 'refresh_borrow_rollup' keeps them
+current by recomputing only the days touched since its last run. Readers add
+the raw borrows after the checkpoint (normally just today, served by the
+borrow_date index), so answers stay exact however long ago the last refresh
+ran, and fall back to the raw table entirely before the first one.
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from ..models import Borrow, BorrowDailyRollup, BorrowerRollup, Item, RollupCheckpoint
+
+CHECKPOINT = "borrow_daily"
+
+# Borrows stamped this long before the previous run are re-checked, so one
+# whose transaction committed after that run started is still counted
+REFRESH_OVERLAP = timedelta(minutes=10)
+
+# Top-item windows of the analytics views, in days including today
+WINDOWS = {"week_items": 7, "month_items": 30, "year_items": 365}
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _checkpoint() -> Optional[RollupCheckpoint]:
+    checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT).first()
+    if checkpoint is None or checkpoint.covered_until is None:
+        return None
+    return checkpoint
+
+
+def _write_days(borrows):
+    rows = (
+        borrows.order_by()
+        .annotate(day=TruncDate("borrow_date"))
+        .values("day", "item_id", "borrower__profile__role")
+        .annotate(n=Count("id"))
+    )
+    BorrowDailyRollup.objects.bulk_create(
+        [
+            BorrowDailyRollup(
+                day=row["day"],
+                item_id=row["item_id"],
+                borrower_role=row["borrower__profile__role"] or "",
+                count=row["n"],
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+def _write_borrowers(borrows):
+    rows = borrows.order_by().values("borrower_id").annotate(n=Count("id"))
+    BorrowerRollup.objects.bulk_create(
+        [BorrowerRollup(borrower_id=row["borrower_id"], count=row["n"]) for row in rows],
+        batch_size=1000,
+    )
+
+
+def _rebuild_all(cutoff) -> int:
+    closed = Borrow.objects.filter(borrow_date__lt=cutoff)
+    BorrowDailyRollup.objects.all().delete()
+    BorrowerRollup.objects.all().delete()
+    _write_days(closed)
+    _write_borrowers(closed)
+    return BorrowDailyRollup.objects.values("day").distinct().count()
+
+
+def _rebuild_days(days: List, cutoff) -> int:
+    if not days:
+        return 0
+    touched = Borrow.objects.filter(
+        borrow_date__gte=_day_start(min(days)), borrow_date__lt=cutoff, borrow_date__date__in=days
+    )
+    BorrowDailyRollup.objects.filter(day__in=days).delete()
+    _write_days(touched)
+
+    # A borrower's all-time count changes only if they borrowed on a touched day
+    borrower_ids = list(touched.order_by().values_list("borrower_id", flat=True).distinct())
+    BorrowerRollup.objects.filter(borrower_id__in=borrower_ids).delete()
+    _write_borrowers(Borrow.objects.filter(borrower_id__in=borrower_ids, borrow_date__lt=cutoff))
+    return len(days)
+
+
+def _touched_days(checkpoint: RollupCheckpoint, today) -> List:
+    # Every day that closed since the last run...
+    days = set()
+    day = checkpoint.covered_until + timedelta(days=1)
+    while day < today:
+        days.add(day)
+        day += timedelta(days=1)
+    # ...plus already-covered days that gained borrows after it ran
+    if checkpoint.last_run_at is not None:
+        late = (
+            Borrow.objects.filter(
+                borrow_date__gte=checkpoint.last_run_at - REFRESH_OVERLAP,
+                borrow_date__lt=_day_start(checkpoint.covered_until + timedelta(days=1)),
+            )
+            .annotate(day=TruncDate("borrow_date"))
+            .order_by()
+            .values_list("day", flat=True)
+            .distinct()
+        )
+        days.update(late)
+    return sorted(days)
+
+
+def _drifted(cutoff) -> bool:
+    """True when the rollups no longer add up to the raw closed borrows (rows were deleted)"""
+    closed = Borrow.objects.filter(borrow_date__lt=cutoff).count()
+    days_total = BorrowDailyRollup.objects.aggregate(n=Sum("count"))["n"] or 0
+    borrowers_total = BorrowerRollup.objects.aggregate(n=Sum("count"))["n"] or 0
+    return not (closed == days_total == borrowers_total)
+
+
+def refresh(full: bool = False, verify: bool = False, now=None) -> Dict[str, Any]:
+    """Bring the rollups up to yesterday; returns what was recomputed.
+
+    Only days that closed since the last run, or that gained borrows after it,
+    are recomputed. Deleted borrows leave no trace to find them by; with
+    ``verify`` the totals are compared against the whole borrow table (a
+    full-history count, so keep it to an occasional run) and a drift falls
+    back to a full rebuild.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    cutoff = _day_start(today)
+
+    with transaction.atomic():
+        checkpoint, _ = RollupCheckpoint.objects.get_or_create(name=CHECKPOINT)
+        # Serializes concurrent refreshes
+        checkpoint = RollupCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+
+        drifted = False
+        if full or checkpoint.covered_until is None:
+            full = True
+            days = _rebuild_all(cutoff)
+        else:
+            days = _rebuild_days(_touched_days(checkpoint, today), cutoff)
+            drifted = verify and _drifted(cutoff)
+            if drifted:
+                days = _rebuild_all(cutoff)
+
+        checkpoint.covered_until = today - timedelta(days=1)
+        checkpoint.last_run_at = now
+        checkpoint.save(update_fields=["covered_until", "last_run_at", "updated_at"])
+
+    return {"full": full or drifted, "drifted": drifted, "days": days, "covered_until": checkpoint.covered_until}
+
+
+def window_top_items(now=None, limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+    """Most borrowed items for each of ``WINDOWS``, shaped like the old per-window GROUP BY"""
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    checkpoint = _checkpoint()
+    first_live_day = (
+        checkpoint.covered_until + timedelta(days=1)
+        if checkpoint is not None
+        else today - timedelta(days=max(WINDOWS.values()) - 1)
+    )
+
+    # Raw borrows after the checkpoint, read once for all windows
+    live = list(
+        Borrow.objects.filter(borrow_date__gte=_day_start(first_live_day))
+        .annotate(day=TruncDate("borrow_date"))
+        .order_by()
+        .values("day", "item_id")
+        .annotate(n=Count("id"))
+        .values_list("day", "item_id", "n")
+    )
+
+    tops = {}
+    for key, window in WINDOWS.items():
+        first_day = today - timedelta(days=window - 1)
+        counts = Counter()
+        if checkpoint is not None and first_day < first_live_day:
+            counts.update(dict(
+                BorrowDailyRollup.objects.filter(day__gte=first_day, day__lt=first_live_day)
+                .order_by().values("item_id").annotate(n=Sum("count")).values_list("item_id", "n")
+            ))
+        for day, item_id, n in live:
+            if day >= first_day:
+                counts[item_id] += n
+        tops[key] = counts.most_common(limit)
+
+    names = dict(
+        Item.objects.filter(id__in={item_id for top in tops.values() for item_id, _ in top})
+        .values_list("id", "name")
+    )
+    return {
+        key: [{"item__name": names.get(item_id, ""), "item__id": item_id, "count": n} for item_id, n in top]
+        for key, top in tops.items()
+    }
+
+
+def _usernames(user_ids: Iterable[int]) -> Dict[int, str]:
+    return dict(get_user_model().objects.filter(id__in=list(user_ids)).values_list("id", "username"))
+
+
+def top_borrowers(limit: int = 10) -> List[Dict[str, Any]]:
+    """Borrowers with the most borrows over all history"""
+    checkpoint = _checkpoint()
+    if checkpoint is None:
+        return list(
+            Borrow.objects.values("borrower__username", "borrower__id")
+            .annotate(count=Count("id"))
+            .order_by("-count")[:limit]
+        )
+
+    live = dict(
+        Borrow.objects.filter(borrow_date__gte=_day_start(checkpoint.covered_until + timedelta(days=1)))
+        .order_by().values("borrower_id").annotate(n=Count("id")).values_list("borrower_id", "n")
+    )
+    # The final top N is either in the rollup's top N or borrowed since the checkpoint
+    counts = Counter(dict(BorrowerRollup.objects.order_by("-count").values_list("borrower_id", "count")[:limit]))
+    missing = [borrower_id for borrower_id in live if borrower_id not in counts]
+    counts.update(dict(BorrowerRollup.objects.filter(borrower_id__in=missing).values_list("borrower_id", "count")))
+    counts.update(live)
+
+    top = counts.most_common(limit)
+    names = _usernames(borrower_id for borrower_id, _ in top)
+    return [
+        {"borrower__username": names.get(borrower_id, ""), "borrower__id": borrower_id, "count": n}
+        for borrower_id, n in top
+    ]
@@ -0,0 +1,55 @@
+"""
+Borrow statistics - all status buckets computed in a single aggregate pass
+"""
+
+from typing import Dict, Iterable, Optional
+
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+
+from ..models import Borrow
+
+# Response key used for each status bucket
+STATUS_KEYS = {
+    Borrow.Status.PENDING: "pending_borrows",
+    Borrow.Status.ACTIVE: "active_borrows",
+    Borrow.Status.LATE: "late_borrows",
+    Borrow.Status.RETURNED: "returned_borrows",
+    Borrow.Status.NOT_RETURNED: "not_returned_borrows",
+    Borrow.Status.REJECTED: "rejected_borrows",
+}
+
+# Keys returned by the admin dashboard, reports and AI endpoints
+DASHBOARD_KEYS = (
+    "total_borrows",
+    "active_borrows",
+    "returned_borrows",
+    "late_borrows",
+    "not_returned_borrows",
+)
+
+
+def borrow_status_counts(queryset: Optional[QuerySet] = None, now=None) -> Dict[str, int]:
+    """Count every status bucket plus overdue borrows with one aggregate query.
+
+    The 'mark_overdue_borrows' sweep moves ACTIVE borrows to LATE once their
+    due date passes; ``overdue_borrows`` counts the ones it has not reached
+    yet (ACTIVE with a ``due_date`` in the past).
+    """
+    if queryset is None:
+        queryset = Borrow.objects.all()
+    now = now or timezone.now()
+
+    aggregates = {"total_borrows": Count("id")}
+    for borrow_status, key in STATUS_KEYS.items():
+        aggregates[key] = Count("id", filter=Q(status=borrow_status))
+    aggregates["overdue_borrows"] = Count(
+        "id", filter=Q(status=Borrow.Status.ACTIVE, due_date__lt=now)
+    )
+
+    return queryset.order_by().aggregate(**aggregates)
+
+
+def select_counts(counts: Dict[str, int], keys: Iterable[str] = DASHBOARD_KEYS) -> Dict[str, int]:
+    """Pick the given keys out of a ``borrow_status_counts`` result"""
+    return {key: counts[key] for key in keys}
@@ -0,0 +1,185 @@
+"""
+Bulk item-instance import - registers a shipment of tagged units in one pass
+
+Rows of ``(item, reference_id, status, notes)`` are validated against the
+database with one set-based query per batch, inserted with ``bulk_create``
+and the parent item counters are shifted once per affected item. Bad rows are
+reported back and skipped; they never abort the rest of the import.
+"""
+
+import csv
+import io
+import json
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import IntegrityError, transaction
+
+from ..models import Item, ItemInstance
+from . import inventory_state
+
+DEFAULT_BATCH_SIZE = 500
+
+# Rows accepted per request; a larger shipment is split into several imports
+MAX_ROWS = 5000
+
+FORMATS = ("csv", "json")
+
+
+class InstanceImportError(ValueError):
+    """Raised when the import file itself cannot be read"""
+
+
+def parse_rows(content: str, fmt: str) -> List[Dict[str, Any]]:
+    """Read CSV (with a header row) or a JSON list of objects into row dicts.
+
+    ``item`` may be given as an item id or an exact item name; ``item_id`` is
+    accepted as an alias.
+    """
+    if fmt not in FORMATS:
+        raise InstanceImportError(f"format must be one of: {', '.join(FORMATS)}.")
+
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        if not reader.fieldnames or "reference_id" not in reader.fieldnames:
+            raise InstanceImportError("CSV needs a header row with at least item and reference_id.")
+        rows = list(reader)
+    else:
+        try:
+            rows = json.loads(content)
+        except ValueError:
+            raise InstanceImportError("Invalid JSON.")
+        if isinstance(rows, dict):
+            rows = rows.get("instances")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise InstanceImportError("JSON must be a list of objects.")
+    return rows
+
+
+def _clean(value) -> str:
+    return str(value).strip() if value is not None else ""
+
+
+def _resolve_items(rows: List[Dict[str, Any]]) -> Dict[str, Optional[Item]]:
+    """Map every distinct ``item`` value to an Item (None when unknown or ambiguous) in one query"""
+    refs = {_clean(row.get("item", row.get("item_id"))) for row in rows}
+    refs.discard("")
+    ids = {int(ref) for ref in refs if ref.isdigit()}
+    names = {ref for ref in refs if not ref.isdigit()}
+
+    by_id = {}
+    by_name = {}
+    for item in Item.objects.filter(id__in=ids) | Item.objects.filter(name__in=names):
+        by_id[str(item.id)] = item
+        # Names are not unique across categories; ambiguous names resolve to None
+        by_name[item.name] = None if item.name in by_name else item
+
+    return {ref: by_id.get(ref) if ref.isdigit() else by_name.get(ref) for ref in refs}
+
+
+def import_instances(
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Validate and insert instance rows.
+
+    Returns ``{"created", "skipped", "items", "errors"}`` where ``items`` maps
+    item id to instances added and each error is ``{"row", "reference_id", "detail"}``
+    (rows are numbered from 1).
+    """
+    rows = list(rows)
+    items = _resolve_items(rows)
+    valid_statuses = set(ItemInstance.ItemStatus.values)
+    seen = Counter(_clean(row.get("reference_id")) for row in rows)
+    errors = []
+    candidates = []
+
+    for number, row in enumerate(rows, start=1):
+        reference_id = _clean(row.get("reference_id"))
+        item_ref = _clean(row.get("item", row.get("item_id")))
+        instance_status = _clean(row.get("status")).upper() or ItemInstance.ItemStatus.AVAILABLE
+
+        detail = None
+        if not reference_id:
+            detail = "Reference ID is required."
+        elif len(reference_id) > ItemInstance._meta.get_field("reference_id").max_length:
+            detail = "Reference ID is too long."
+        elif seen[reference_id] > 1:
+            detail = "Reference ID appears more than once in the import."
+        elif not item_ref:
+            detail = "Item is required."
+        elif items.get(item_ref) is None:
+            detail = f"Item '{item_ref}' not found or ambiguous."
+        elif instance_status not in valid_statuses:
+            detail = f"Invalid status '{instance_status}'."
+
+        if detail:
+            errors.append({"row": number, "reference_id": reference_id, "detail": detail})
+            continue
+        candidates.append((number, ItemInstance(
+            item=items[item_ref],
+            reference_id=reference_id,
+            status=instance_status,
+            notes=_clean(row.get("notes")),
+        )))
+
+    created = Counter()
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        inserted = _import_batch(batch, errors, dry_run)
+        for instance in inserted:
+            created[instance.item_id] += 1
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "created": sum(created.values()),
+        "skipped": len(errors),
+        "items": dict(created),
+        "errors": errors,
+    }
+
+
+def _import_batch(batch, errors, dry_run: bool) -> List[ItemInstance]:
+    """Insert one batch, dropping rows whose reference ID already exists.
+
+    A concurrent insert can still take a reference ID between the check and
+    the insert; the batch is then re-checked and retried once before its rows
+    are reported as failed.
+    """
+    for _ in range(2):
+        existing = set(
+            ItemInstance.objects.filter(
+                reference_id__in=[instance.reference_id for _, instance in batch]
+            ).values_list("reference_id", flat=True)
+        )
+        fresh = []
+        for number, instance in batch:
+            if instance.reference_id in existing:
+                errors.append({
+                    "row": number,
+                    "reference_id": instance.reference_id,
+                    "detail": "Reference ID already exists.",
+                })
+            else:
+                fresh.append((number, instance))
+        batch = fresh
+        instances = [instance for _, instance in batch]
+        if dry_run or not instances:
+            return instances
+
+        try:
+            with transaction.atomic():
+                ItemInstance.objects.bulk_create(instances)
+                inventory_state.record_transitions(
+                    (instance.item_id, None, instance.status) for instance in instances
+                )
+            return instances
+        except IntegrityError:
+            continue
+
+    errors.extend(
+        {"row": number, "reference_id": instance.reference_id, "detail": "Could not insert row, try again."}
+        for number, instance in batch
+    )
+    return []
@@ -0,0 +1,264 @@
+"""
+Item quantity/availability maintenance
+
+Every code path that creates, deletes or changes the status of an
+ItemInstance goes through this module inside its transaction, so the parent
+``Item.quantity`` and ``Item.available`` move by O(1) ``F()`` deltas instead of
+being recounted from the instance table on each change.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from ..models import Borrow, Item, ItemInstance
+from . import data_version
+
+AVAILABLE = ItemInstance.ItemStatus.AVAILABLE
+
+
+def _deltas(old_status: Optional[str], new_status: Optional[str], count: int = 1) -> Tuple[int, int]:
+    """``(quantity_delta, available_delta)`` for ``count`` instances moving between statuses"""
+    quantity = 0
+    available = 0
+    if old_status is None:
+        quantity += count
+    if new_status is None:
+        quantity -= count
+    if old_status == AVAILABLE:
+        available -= count
+    if new_status == AVAILABLE:
+        available += count
+    return quantity, available
+
+
+def apply_item_deltas(deltas: Dict[int, Tuple[int, int]]):
+    """Apply ``{item_id: (quantity_delta, available_delta)}`` in one UPDATE per item"""
+    with transaction.atomic():
+        # Sorted so two transactions never take the item rows in opposite order;
+        # callers lock instance rows before and counter rows after these
+        for item_id in sorted(deltas):
+            quantity, available = deltas[item_id]
+            if not quantity and not available:
+                continue
+            Item.objects.filter(id=item_id).update(
+                quantity=F("quantity") + quantity,
+                available=F("available") + available,
+            )
+
+
+def record_transition(item_id: int, old_status: Optional[str], new_status: Optional[str], count: int = 1):
+    """Move ``count`` instances of one item from ``old_status`` to ``new_status``.
+
+    Use ``old_status=None`` for new instances and ``new_status=None`` for
+    deleted ones. Must run inside the transaction that changes the rows.
+    """
+    if old_status == new_status or not count:
+        return
+    apply_item_deltas({item_id: _deltas(old_status, new_status, count)})
+
+
+def record_transitions(transitions: Iterable[Tuple[int, Optional[str], Optional[str]]]):
+    """Bulk form of ``record_transition`` for ``(item_id, old_status, new_status)`` tuples"""
+    totals = defaultdict(lambda: [0, 0])
+    for item_id, old_status, new_status in transitions:
+        if old_status == new_status:
+            continue
+        quantity, available = _deltas(old_status, new_status)
+        totals[item_id][0] += quantity
+        totals[item_id][1] += available
+    if totals:
+        apply_item_deltas({item_id: tuple(delta) for item_id, delta in totals.items()})
+        # Bulk instance writes bypass the post_save signal that bumps the catalog
+        data_version.bump(data_version.CATALOG)
+
+
+def create_instance(item: Item, **fields) -> ItemInstance:
+    with transaction.atomic():
+        instance = ItemInstance.objects.create(item=item, **fields)
+        record_transition(item.id, None, instance.status)
+    return instance
+
+
+def set_status(instance: ItemInstance, new_status: str) -> ItemInstance:
+    """Save ``instance`` with ``new_status`` and shift its item's counters.
+
+    The stored status is re-read under a row lock, so the delta is based on
+    what is in the database even if another request changed it meanwhile.
+    """
+    with transaction.atomic():
+        old_status = (
+            ItemInstance.objects.select_for_update()
+            .values_list("status", flat=True)
+            .get(pk=instance.pk)
+        )
+        instance.status = new_status
+        instance.save()
+        record_transition(instance.item_id, old_status, new_status)
+    return instance
+
+
+def _mark_in_use(instance: ItemInstance):
+    instance.status = ItemInstance.ItemStatus.IN_USE
+    instance.save(update_fields=["status", "updated_at"])
+    record_transition(instance.item_id, AVAILABLE, instance.status)
+
+
+def reserve_available(item_id: int) -> Optional[ItemInstance]:
+    """Lock one AVAILABLE instance of an item, mark it IN_USE and return it.
+
+    Rows already locked by concurrent reservations are skipped rather than
+    waited on, so simultaneous requests each get a different free unit.
+    Returns None when no unit is free. Call inside ``transaction.atomic`` so
+    the lock is held until the borrow row is written.
+    """
+    instance = (
+        ItemInstance.objects.select_for_update(skip_locked=True)
+        .filter(item_id=item_id, status=AVAILABLE)
+        .order_by("reference_id")
+        .first()
+    )
+    if instance is not None:
+        _mark_in_use(instance)
+    return instance
+
+
+def reserve_instance(instance: ItemInstance) -> bool:
+    """Mark a specific (scanned) instance IN_USE if it is still AVAILABLE.
+
+    Returns False when it is taken or another request holds its lock.
+    Call inside ``transaction.atomic``.
+    """
+    locked = (
+        ItemInstance.objects.select_for_update(skip_locked=True)
+        .filter(pk=instance.pk, status=AVAILABLE)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if locked is None:
+        return False
+    _mark_in_use(instance)
+    return True
+
+
+def reserve_instances(instance_ids: Iterable[int]) -> Tuple[Dict[int, ItemInstance], List[int]]:
+    """Lock a set of (scanned) instances together and mark the free ones IN_USE.
+
+    Rows are locked in id order so overlapping carts cannot deadlock. Returns
+    ``(reserved, unavailable_ids)``: ``reserved`` maps id to the instance (with
+    its item loaded); ``unavailable_ids`` lists ids that are missing, not
+    AVAILABLE or locked by another request. Nothing is changed unless every id
+    could be reserved. Call inside ``transaction.atomic``.
+    """
+    instance_ids = sorted(set(instance_ids))
+    locked = {
+        instance.id: instance
+        for instance in ItemInstance.objects.select_for_update(skip_locked=True, of=("self",))
+        .select_related("item")
+        .filter(id__in=instance_ids, status=AVAILABLE)
+        .order_by("id")
+    }
+    unavailable = [instance_id for instance_id in instance_ids if instance_id not in locked]
+    if unavailable or not locked:
+        return {}, unavailable
+
+    ItemInstance.objects.filter(id__in=list(locked)).update(
+        status=ItemInstance.ItemStatus.IN_USE, updated_at=timezone.now()
+    )
+    for instance in locked.values():
+        instance.status = ItemInstance.ItemStatus.IN_USE
+    record_transitions((instance.item_id, AVAILABLE, instance.status) for instance in locked.values())
+    return locked, []
+
+
+def release_instance(instance_id: Optional[int], exclude_borrow_id: Optional[int] = None):
+    """Put a reserved instance back to AVAILABLE unless another open borrow holds it"""
+    if instance_id is None:
+        return
+    release_instances([instance_id], [exclude_borrow_id] if exclude_borrow_id else [])
+
+
+def release_instances(instance_ids: Iterable[int], exclude_borrow_ids: Iterable[int] = ()) -> int:
+    """Set-based ``release_instance`` for many instances; returns how many were freed"""
+    instance_ids = [instance_id for instance_id in instance_ids if instance_id is not None]
+    if not instance_ids:
+        return 0
+    with transaction.atomic():
+        held = (
+            Borrow.objects.filter(
+                item_instance_id__in=instance_ids,
+                status__in=[Borrow.Status.PENDING, Borrow.Status.ACTIVE, Borrow.Status.LATE],
+            )
+            .exclude(id__in=list(exclude_borrow_ids))
+            .values("item_instance_id")
+        )
+        releasable = list(
+            ItemInstance.objects.select_for_update()
+            .filter(pk__in=instance_ids, status=ItemInstance.ItemStatus.IN_USE)
+            .exclude(pk__in=held)
+            .order_by("pk")
+            .values_list("pk", "item_id")
+        )
+        if not releasable:
+            return 0
+        ItemInstance.objects.filter(pk__in=[pk for pk, _ in releasable]).update(
+            status=AVAILABLE, updated_at=timezone.now()
+        )
+        record_transitions((item_id, ItemInstance.ItemStatus.IN_USE, AVAILABLE) for _, item_id in releasable)
+    return len(releasable)
+
+
+def delete_instance(instance: ItemInstance):
+    with transaction.atomic():
+        old_status = (
+            ItemInstance.objects.select_for_update()
+            .values_list("status", flat=True)
+            .get(pk=instance.pk)
+        )
+        item_id = instance.item_id
+        instance.delete()
+        record_transition(item_id, old_status, None)
+
+
+def _actual_counts(item_ids: Optional[Iterable[int]] = None) -> Dict[int, Tuple[int, int]]:
+    rows = ItemInstance.objects.all()
+    if item_ids is not None:
+        rows = rows.filter(item_id__in=item_ids)
+    rows = rows.order_by().values("item").annotate(
+        total=Count("id"),
+        available=Count("id", filter=Q(status=AVAILABLE)),
+    )
+    return {row["item"]: (row["total"], row["available"]) for row in rows}
+
+
+def reconcile(dry_run: bool = False) -> Dict[int, Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Compare every item's counters with its instances and fix the ones that drifted.
+
+    Returns ``{item_id: ((stored_quantity, stored_available), (quantity, available))}``.
+    Detection is one grouped count plus one scan of the item table; only
+    drifted items are locked, recounted and written back.
+    """
+    actual = _actual_counts()
+    drift = {}
+    for item_id, quantity, available in Item.objects.values_list("id", "quantity", "available").iterator():
+        counts = actual.get(item_id, (0, 0))
+        if (quantity, available) != counts:
+            drift[item_id] = ((quantity, available), counts)
+
+    if dry_run or not drift:
+        return drift
+
+    with transaction.atomic():
+        items = list(Item.objects.select_for_update().filter(id__in=drift).order_by("id"))
+        # Recount under the lock so transitions that landed after detection are not lost
+        actual = _actual_counts(drift)
+        fixed = []
+        for item in items:
+            item.quantity, item.available = actual.get(item.id, (0, 0))
+            fixed.append(item)
+        Item.objects.bulk_update(fixed, ["quantity", "available"], batch_size=500)
+        data_version.bump(data_version.CATALOG)
+    return drift
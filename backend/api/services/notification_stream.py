@@ -0,0 +1,190 @@
+"""
+Server-sent events for borrower notifications
+
+One ``NotificationBroadcaster`` per process polls the Notification table for
+rows newer than the last one it saw and fans them out to the connected
+borrowers' queues. Database load is one indexed primary-key range query per
+poll interval for the whole process, however many borrowers are connected,
+and none at all while nobody is connected. Event ids are notification ids, so
+a reconnecting EventSource resumes from its ``Last-Event-ID``.
+
+Ids are handed out when a row is inserted but become visible when its
+transaction commits, so a lower id can appear after a higher one was already
+read. The poller remembers the ids it skipped over and looks them up again
+for ``LATE_COMMIT_WINDOW``; a resume also re-reads the user's rows from that
+window. Each connection de-duplicates by id, so re-reads never send twice.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from datetime import timedelta
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from ..models import Notification
+from . import notifications
+
+logger = logging.getLogger(__name__)
+
+# Missed events replayed on reconnect
+RESUME_LIMIT = 100
+
+# Per-connection backlog; a client this far behind is better off reconnecting
+QUEUE_SIZE = 100
+
+# How long a transaction may sit between taking an id and committing it and
+# still have its notification delivered, in seconds
+LATE_COMMIT_WINDOW = 30.0
+
+# Skipped ids tracked at once (a sequence jump bigger than this is not a gap)
+MAX_GAPS = 1000
+
+# Event ids each connection remembers for de-duplication
+SEEN_IDS = 500
+
+
+def _load_new(after_id: int, gap_ids: Iterable[int] = (), limit: int = 500) -> List[Dict]:
+    gap_ids = list(gap_ids)
+    condition = Q(id__gt=after_id)
+    if gap_ids:
+        condition |= Q(id__in=gap_ids)
+    rows = Notification.objects.filter(condition).order_by("id")[:limit]
+    return [{"user_id": row.user_id, "event": notifications.serialize(row)} for row in rows]
+
+
+def _load_missed(user_id: int, after_id: int) -> List[Dict]:
+    # Rows from the late-commit window may sit below the client's last id
+    recent = timezone.now() - timedelta(seconds=LATE_COMMIT_WINDOW)
+    rows = (
+        Notification.objects.filter(user_id=user_id)
+        .filter(Q(id__gt=after_id) | Q(created_at__gte=recent))
+        .order_by("id")[:RESUME_LIMIT]
+    )
+    return [notifications.serialize(row) for row in rows]
+
+
+def _latest_id() -> int:
+    return Notification.objects.aggregate(latest=Max("id"))["latest"] or 0
+
+
+class NotificationBroadcaster:
+    """Shared poller that delivers new notifications to subscribed users"""
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._task: Optional[asyncio.Task] = None
+        self._last_id: Optional[int] = None
+        # Skipped ids below _last_id -> when they were first skipped
+        self._gaps: Dict[int, float] = {}
+        self.polls = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._subscribers[user_id].add(queue)
+        if self._last_id is None:
+            self._last_id = await sync_to_async(_latest_id)()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                # Forget the position; the next subscriber re-reads the latest id
+                self._last_id = None
+                self._gaps.clear()
+                self._task = None
+                return
+            try:
+                await self.poll_once()
+            except Exception:
+                logger.exception("Notification poll failed")
+
+    async def poll_once(self):
+        self.polls += 1
+        now = time.monotonic()
+        rows = await sync_to_async(_load_new)(self._last_id or 0, list(self._gaps))
+        for row in rows:
+            event_id = row["event"]["id"]
+            if self._gaps.pop(event_id, None) is None and event_id > (self._last_id or 0):
+                # Ids jumped over may still be committing
+                first_gap = max((self._last_id or 0) + 1, event_id - MAX_GAPS)
+                self._gaps.update(dict.fromkeys(range(first_gap, event_id), now))
+                self._last_id = event_id
+            for queue in list(self._subscribers.get(row["user_id"], ())):
+                try:
+                    queue.put_nowait(row["event"])
+                except asyncio.QueueFull:
+                    logger.warning(f"Dropping notification {row['event']['id']} for slow client")
+        # Past the window a gap is a rolled-back insert, not a slow commit
+        expired = now - LATE_COMMIT_WINDOW
+        self._gaps = {gap_id: skipped for gap_id, skipped in self._gaps.items() if skipped > expired}
+
+
+broadcaster = NotificationBroadcaster(getattr(settings, "NOTIFICATION_STREAM_POLL_INTERVAL", 2.0))
+
+
+def _format(event: Dict, unread: Dict[str, int]) -> str:
+    payload = json.dumps({"notification": event, **unread}, cls=DjangoJSONEncoder)
+    return f"id: {event['id']}\nevent: notification\ndata: {payload}\n\n"
+
+
+async def event_stream(user_id: int, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    """SSE lines for one borrower: missed notifications first, then live ones"""
+    heartbeat = getattr(settings, "NOTIFICATION_STREAM_HEARTBEAT", 15.0)
+    # Subscribe before replaying so nothing written in between is lost
+    queue = await broadcaster.subscribe(user_id)
+    try:
+        # Ids already sent on this connection, oldest first
+        seen: OrderedDict = OrderedDict()
+
+        def first_time(event_id: int) -> bool:
+            if event_id in seen:
+                return False
+            seen[event_id] = None
+            if len(seen) > SEEN_IDS:
+                seen.popitem(last=False)
+            return True
+
+        unread = await sync_to_async(notifications.unread_counts)(user_id)
+        yield f"retry: 5000\nevent: unread\ndata: {json.dumps(unread)}\n\n"
+
+        if last_event_id is not None:
+            for event in await sync_to_async(_load_missed)(user_id, last_event_id):
+                if first_time(event["id"]):
+                    yield _format(event, unread)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if not first_time(event["id"]):
+                continue
+            unread = await sync_to_async(notifications.unread_counts)(user_id)
+            yield _format(event, unread)
+    finally:
+        broadcaster.unsubscribe(user_id, queue)
@@ -0,0 +1,145 @@
+"""
+Borrower notification inbox
+
+Notifications are written when the event happens (approval, rejection,
+overdue sweep) instead of being re-derived from the Borrow table on every
+poll. Unread counts per kind are cached in the shared cache from CACHES, so
+every worker sees the same entry, and dropped whenever a user's inbox
+changes. The badge poll is usually a cache hit and otherwise one indexed
+grouped count.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from ..models import Borrow, Notification
+
+Kind = Notification.Kind
+
+
+def _count_key(user_id: int) -> str:
+    return f"notifications:unread:{user_id}"
+
+
+def invalidate_counts(user_ids: Iterable[int]):
+    keys = [_count_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        # Delete after commit so a concurrent poll cannot re-cache the old count
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def approved(borrow_id: int, user_id: int, item_name: str, reference_id: Optional[str] = None) -> Notification:
+    return Notification(
+        user_id=user_id,
+        borrow_id=borrow_id,
+        kind=Kind.APPROVED,
+        title="Request Approved",
+        message=f"Your request for {item_name} has been approved. Pick it up at the lab.",
+        metadata={"item_name": item_name, "reference_id": reference_id},
+    )
+
+
+def rejected(borrow_id: int, user_id: int, item_name: str, notes: str = "") -> Notification:
+    return Notification(
+        user_id=user_id,
+        borrow_id=borrow_id,
+        kind=Kind.REJECTED,
+        title="Request Rejected",
+        message=f"Your request for {item_name} was rejected. {notes}".strip(),
+        metadata={"item_name": item_name},
+    )
+
+
+def overdue(borrow_id: int, user_id: int, item_name: str, reference_id: Optional[str], due_date) -> Notification:
+    label = f"{item_name} ({reference_id})" if reference_id else item_name
+    return Notification(
+        user_id=user_id,
+        borrow_id=borrow_id,
+        kind=Kind.OVERDUE,
+        title="Item Overdue",
+        message=f"{label} is overdue. Please return it ASAP.",
+        metadata={"item_name": item_name, "reference_id": reference_id, "due_date": due_date.isoformat()},
+    )
+
+
+def notify(notifications: List[Notification]):
+    """Store notifications (one INSERT) and drop the cached counts of their recipients"""
+    if not notifications:
+        return
+    Notification.objects.bulk_create(notifications)
+    invalidate_counts(notification.user_id for notification in notifications)
+
+
+def notify_for_borrows(borrow_ids: Iterable[int], kind: str, notes: str = ""):
+    """Build and store one notification of ``kind`` per borrow, loading the borrows in one query"""
+    rows = Borrow.objects.filter(id__in=list(borrow_ids)).values_list(
+        "id", "borrower_id", "item__name", "item_instance__reference_id", "due_date"
+    )
+    batch = []
+    for borrow_id, user_id, item_name, reference_id, due_date in rows:
+        item_name = item_name or "your item"
+        if kind == Kind.APPROVED:
+            batch.append(approved(borrow_id, user_id, item_name, reference_id))
+        elif kind == Kind.REJECTED:
+            batch.append(rejected(borrow_id, user_id, item_name, notes))
+        else:
+            batch.append(overdue(borrow_id, user_id, item_name, reference_id, due_date))
+    notify(batch)
+
+
+def unread_counts(user_id: int) -> Dict[str, int]:
+    """``{"unread_count", "approved", "rejected", "overdue"}`` for the notification badge"""
+    key = _count_key(user_id)
+    counts = cache.get(key)
+    if counts is None:
+        by_kind = dict(
+            Notification.objects.filter(user_id=user_id, read=False)
+            .order_by()
+            .values_list("kind")
+            .annotate(n=Count("id"))
+        )
+        counts = {
+            "unread_count": sum(by_kind.values()),
+            "approved": by_kind.get(Kind.APPROVED, 0),
+            "rejected": by_kind.get(Kind.REJECTED, 0),
+            "overdue": by_kind.get(Kind.OVERDUE, 0),
+        }
+        cache.set(key, counts, getattr(settings, "NOTIFICATION_COUNT_CACHE_TTL", 300))
+    return counts
+
+
+def mark_read(user_id: int, ids: Optional[Iterable[int]] = None) -> int:
+    """Mark the given notifications (or all of them) read; returns how many changed"""
+    unread = Notification.objects.filter(user_id=user_id, read=False)
+    if ids is not None:
+        unread = unread.filter(id__in=list(ids))
+    with transaction.atomic():
+        updated = unread.update(read=True, read_at=timezone.now())
+        if updated:
+            invalidate_counts([user_id])
+    return updated
+
+
+def serialize(notification: Notification, now=None) -> Dict:
+    metadata = notification.metadata or {}
+    data = {
+        "id": notification.id,
+        "type": notification.kind,
+        "title": notification.title,
+        "message": notification.message,
+        "item_name": metadata.get("item_name"),
+        "reference_id": metadata.get("reference_id"),
+        "timestamp": notification.created_at,
+        "read": notification.read,
+        "borrow_id": notification.borrow_id,
+    }
+    if notification.kind == Kind.OVERDUE and metadata.get("due_date"):
+        due_date = datetime.fromisoformat(metadata["due_date"])
+        data["days_overdue"] = max(((now or timezone.now()) - due_date).days, 0)
+    return data
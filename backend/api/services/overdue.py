@@ -0,0 +1,69 @@
+"""
+Overdue sweep - moves ACTIVE borrows past their due date to LATE
+
+Run periodically (see 'mark_overdue_borrows'). Each chunk locks its rows with
+SKIP LOCKED, flips them with one UPDATE, writes their MARKED_LATE logs with
+one ``bulk_create``, shifts the status counters and notifies the borrowers,
+all in one transaction.
+Re-running is harmless: only borrows still ACTIVE and overdue are touched.
+"""
+
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Borrow, BorrowLog
+from . import borrow_counters, notifications
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def overdue_active(now=None):
+    """ACTIVE borrows whose due date has passed (served by borrow_active_due_idx)"""
+    return Borrow.objects.filter(status=Borrow.Status.ACTIVE, due_date__lt=now or timezone.now())
+
+
+def _mark_chunk(now, chunk_size: int) -> int:
+    with transaction.atomic():
+        rows = list(
+            overdue_active(now)
+            .select_for_update(skip_locked=True)
+            .order_by("due_date", "id")
+            .values_list("id", "due_date")[:chunk_size]
+        )
+        if not rows:
+            return 0
+        ids = [borrow_id for borrow_id, _ in rows]
+        updated = Borrow.objects.filter(id__in=ids, status=Borrow.Status.ACTIVE).update(
+            status=Borrow.Status.LATE, updated_at=now
+        )
+        borrow_counters.record_transition(Borrow.Status.ACTIVE, Borrow.Status.LATE, count=updated)
+        BorrowLog.objects.bulk_create([
+            BorrowLog(
+                borrow_id=borrow_id,
+                action=BorrowLog.ActionType.MARKED_LATE,
+                description="Marked late by the overdue sweep",
+                metadata={"due_date": due_date.isoformat(), "marked_at": now.isoformat()},
+            )
+            for borrow_id, due_date in rows
+        ])
+        notifications.notify_for_borrows(ids, notifications.Kind.OVERDUE)
+    return len(rows)
+
+
+def mark_overdue(now=None, chunk_size: int = DEFAULT_CHUNK_SIZE, limit: Optional[int] = None) -> int:
+    """Mark every overdue ACTIVE borrow LATE, ``chunk_size`` rows per transaction.
+
+    Rows locked by a concurrent request (e.g. a return in progress) are
+    skipped and picked up by the next run. Returns the number of borrows marked.
+    """
+    now = now or timezone.now()
+    marked = 0
+    while limit is None or marked < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - marked)
+        count = _mark_chunk(now, size)
+        marked += count
+        if count < size:
+            break
+    return marked
@@ -0,0 +1,140 @@
+"""
+In-process reference ID index for scan stations
+
+Each worker keeps ``reference_id -> instance summary`` in memory so a tray of
+scanned barcodes resolves with dictionary lookups. The index is tied to the
+catalog data version (see ``data_version``): a request whose version matches
+the one the index was built at costs a single-row query. When the version
+moved, only rows changed since the previous load are read: instances by
+``updated_at`` (served by ``iteminstance_updated_idx``), items whose own or
+category's ``updated_at`` moved, and the ``ItemInstanceTombstone`` rows that
+deletions leave behind. A full reload only happens on first use, or when the
+last load is older than the tombstones are kept for.
+"""
+
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Item, ItemInstance, ItemInstanceTombstone
+from . import data_version
+
+MAX_BATCH_SIZE = 500
+
+# Re-read rows this far behind the watermark, so a transaction that stamped
+# updated_at before an earlier refresh but committed after it is still seen
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+# Tombstones older than this are pruned; an index last loaded before then
+# may have missed deletions and rebuilds from scratch
+TOMBSTONE_RETENTION = timedelta(days=7)
+
+_INSTANCE_FIELDS = ("id", "reference_id", "item_id", "status", "notes", "updated_at")
+
+
+class ReferenceIndex:
+    """Versioned reference ID -> instance summary map, shared by one process's threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[Tuple[int, ...]] = None
+        self._loaded_at = None
+        self._by_reference: Dict[str, Tuple] = {}
+        self._reference_by_id: Dict[int, str] = {}
+        self._items: Dict[int, Tuple[str, str]] = {}
+        self.full_loads = 0
+        self.incremental_loads = 0
+
+    def lookup(self, reference_ids: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """``(matches, misses)`` for the given reference IDs, in input order"""
+        self.refresh()
+        matches, misses = [], []
+        for reference_id in reference_ids:
+            row = self._by_reference.get(reference_id)
+            if row is None:
+                misses.append(reference_id)
+            else:
+                matches.append(self._summary(row))
+        return matches, misses
+
+    def refresh(self):
+        version = data_version.current((data_version.CATALOG,))
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            stale = self._loaded_at is None or self._loaded_at - REFRESH_OVERLAP < timezone.now() - TOMBSTONE_RETENTION
+            if stale:
+                self._load_all()
+            else:
+                self._load_changed()
+            self._version = version
+
+    def _summary(self, row: Tuple) -> Dict[str, Any]:
+        instance_id, reference_id, item_id, instance_status, notes, _ = row
+        item_name, category = self._items.get(item_id, ("", "N/A"))
+        return {
+            "id": instance_id,
+            "reference_id": reference_id,
+            "item_name": item_name,
+            "item_id": item_id,
+            "category": category,
+            "status": instance_status,
+            "notes": notes,
+        }
+
+    def _item_entries(self, items) -> Dict[int, Tuple[str, str]]:
+        items = items.select_related("category").only("id", "name", "category__name")
+        return {
+            item.id: (item.name, item.category.get_name_display() if item.category else "N/A")
+            for item in items
+        }
+
+    def _store(self, row: Tuple):
+        instance_id, reference_id = row[0], row[1]
+        previous = self._reference_by_id.get(instance_id)
+        if previous is not None and previous != reference_id:
+            self._by_reference.pop(previous, None)
+        self._reference_by_id[instance_id] = reference_id
+        self._by_reference[reference_id] = row
+
+    def _forget(self, instance_id: int):
+        reference_id = self._reference_by_id.pop(instance_id, None)
+        # The reference ID may already belong to a newer instance
+        row = self._by_reference.get(reference_id)
+        if row is not None and row[0] == instance_id:
+            del self._by_reference[reference_id]
+
+    def _load_all(self):
+        started = timezone.now()
+        ItemInstanceTombstone.objects.filter(deleted_at__lt=started - TOMBSTONE_RETENTION).delete()
+        items = self._item_entries(Item.objects.all())
+        rows = list(ItemInstance.objects.order_by().values_list(*_INSTANCE_FIELDS))
+        # Build aside and swap, so concurrent lookups never see a half-filled map
+        self._items = items
+        self._by_reference = {row[1]: row for row in rows}
+        self._reference_by_id = {row[0]: row[1] for row in rows}
+        self._loaded_at = started
+        self.full_loads += 1
+
+    def _load_changed(self):
+        started = timezone.now()
+        since = self._loaded_at - REFRESH_OVERLAP
+        self._items.update(self._item_entries(
+            Item.objects.filter(Q(updated_at__gte=since) | Q(category__updated_at__gte=since))
+        ))
+        tombstones = ItemInstanceTombstone.objects.filter(deleted_at__gte=since).order_by()
+        for instance_id in tombstones.values_list("instance_id", flat=True):
+            self._forget(instance_id)
+        rows = ItemInstance.objects.order_by().filter(updated_at__gte=since).values_list(*_INSTANCE_FIELDS)
+        for row in rows:
+            self._store(row)
+        self._loaded_at = started
+        self.incremental_loads += 1
+
+
+index = ReferenceIndex()
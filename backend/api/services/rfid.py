@@ -0,0 +1,82 @@
+"""
+RFID badge resolution for the scan stations
+
+A tap is resolved to the user and profile with one query joined through the
+unique ``RFIDCard.uid`` index, and the result is kept in a small per-process
+LRU so repeated taps at a station skip the database. Entries are dropped by
+``api.signals`` when the card, user or profile changes; the TTL bounds how
+long another worker's changes can go unseen. Unknown badges are remembered
+too, for a few seconds only, so a scanner repeating an unregistered tap
+does not reach the database each time.
+
+Until every borrower has a card, a scanned value that matches no card is
+tried as a username (the original behaviour), unless RFID_USERNAME_FALLBACK
+is turned off.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from ..models import RFIDCard
+from .ttl_cache import TTLCache
+
+User = get_user_model()
+
+# normalized uid (or legacy username) -> User with profile loaded
+card_cache = TTLCache(
+    maxsize=getattr(settings, "RFID_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "RFID_CACHE_TTL", 300),
+)
+
+# Seconds a badge that matched nobody stays cached
+negative_ttl = getattr(settings, "RFID_NEGATIVE_CACHE_TTL", 5)
+
+_LEGACY_PREFIX = "username:"
+
+# Cached in place of a user for badges that matched nobody
+_UNKNOWN = object()
+
+
+def invalidate_card(uid: str):
+    card_cache.delete(RFIDCard.normalize_uid(uid))
+
+
+def invalidate_user(user_id: int, username: str = ""):
+    card_cache.delete_where(lambda user: user is not _UNKNOWN and user.id == user_id)
+    if username:
+        # A username that was unknown until now
+        card_cache.delete(_LEGACY_PREFIX + username)
+
+
+def _load(uid: str):
+    card = (
+        RFIDCard.objects.select_related("user", "user__profile")
+        .filter(uid=uid, is_active=True)
+        .first()
+    )
+    return card.user if card is not None else None
+
+
+def _load_legacy(username: str):
+    return User.objects.select_related("profile").filter(username=username).first()
+
+
+def _cached(key: str, load):
+    user = card_cache.get(key)
+    if user is None:
+        user = load()
+        if user is None:
+            # Short-lived, so a card issued in another worker works within seconds
+            card_cache.set(key, _UNKNOWN, ttl=negative_ttl)
+        else:
+            card_cache.set(key, user)
+    return None if user is _UNKNOWN else user
+
+
+def resolve(raw: str):
+    """User (with ``profile`` loaded) for a scanned badge, or None if unknown"""
+    uid = RFIDCard.normalize_uid(raw)
+    user = _cached(uid, lambda: _load(uid)) if uid else None
+    if user is None and getattr(settings, "RFID_USERNAME_FALLBACK", True):
+        user = _cached(_LEGACY_PREFIX + raw, lambda: _load_legacy(raw))
+    return user
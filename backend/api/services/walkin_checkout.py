@@ -0,0 +1,108 @@
+"""
+Multi-item walk-in checkout
+
+A handler's scanned cart is checked out in one transaction: every scanned
+instance is locked and marked IN_USE together, the ACTIVE borrows and their
+BorrowLog rows are written with one ``bulk_create`` each, and the counters
+move once for the whole cart. If any instance cannot be reserved nothing is
+written, so a cart is never half checked out.
+"""
+
+from datetime import datetime, time
+from typing import List
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models import Borrow, BorrowLog
+from . import borrow_counters, inventory_state
+
+MAX_CART_SIZE = 100
+
+
+class CheckoutError(ValueError):
+    """Raised when a cart cannot be checked out; nothing has been written"""
+
+
+class InstancesUnavailable(CheckoutError):
+    def __init__(self, instance_ids: List[int]):
+        self.instance_ids = instance_ids
+        super().__init__(f"{len(instance_ids)} item instance(s) are not available.")
+
+
+def parse_instance_ids(raw) -> List[int]:
+    if not isinstance(raw, list) or not raw:
+        raise CheckoutError("item_instance_ids must be a non-empty list.")
+    if len(raw) > MAX_CART_SIZE:
+        raise CheckoutError(f"At most {MAX_CART_SIZE} items per checkout.")
+    try:
+        ids = [int(value) for value in raw]
+    except (TypeError, ValueError):
+        raise CheckoutError("item_instance_ids must contain integers.")
+    if len(set(ids)) != len(ids):
+        raise CheckoutError("item_instance_ids contains the same instance more than once.")
+    return ids
+
+
+def parse_due_date(raw):
+    try:
+        value = parse_datetime(str(raw)) if raw else None
+        if value is None and raw:
+            day = parse_date(str(raw))
+            if day is not None:
+                value = datetime.combine(day, time.max)
+    except ValueError:
+        # Well-formed but impossible, such as 2024-02-30
+        value = None
+    if value is None:
+        raise CheckoutError("due_date must be an ISO date or datetime.")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def checkout(instance_ids: List[int], borrower_id: int, handler, due_date, notes: str = "Walk-in borrow") -> List[Borrow]:
+    """Create one ACTIVE borrow per instance for ``borrower_id``; all or nothing"""
+    User = get_user_model()
+    try:
+        borrower = User.objects.get(id=borrower_id)
+    except (User.DoesNotExist, TypeError, ValueError):
+        raise CheckoutError("Borrower not found.")
+
+    now = timezone.now()
+    with transaction.atomic():
+        reserved, unavailable = inventory_state.reserve_instances(instance_ids)
+        if unavailable:
+            raise InstancesUnavailable(unavailable)
+
+        borrows = Borrow.objects.bulk_create([
+            Borrow(
+                item=reserved[instance_id].item,
+                item_instance=reserved[instance_id],
+                borrower=borrower,
+                handler=handler,
+                due_date=due_date,
+                status=Borrow.Status.ACTIVE,  # Walk-in is immediately active
+                notes=notes,
+            )
+            for instance_id in instance_ids
+        ])
+        borrow_counters.record_transition(None, Borrow.Status.ACTIVE, count=len(borrows))
+
+        BorrowLog.objects.bulk_create([
+            BorrowLog(
+                borrow=borrow,
+                action=BorrowLog.ActionType.CREATED,
+                performed_by=handler,
+                description=f"Walk-in borrow processed by {handler.username}",
+                metadata={
+                    "borrow_type": "walk-in",
+                    "processed_at": now.isoformat(),
+                    "cart_size": len(borrows),
+                },
+            )
+            for borrow in borrows
+        ])
+    return borrows
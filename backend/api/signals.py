@@ -1,8 +1,11 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
 
-from .models import UserProfile
+from .authentication import invalidate_token, invalidate_user
+from .models import Category, Item, ItemInstance, ItemInstanceTombstone, RFIDCard, UserProfile
+from .services import data_version, rfid
 
 User = get_user_model()
 
@@ -27,3 +30,48 @@ def ensure_profile_for_user(sender, instance, created, **kwargs):
         instance.profile.requested_role = UserProfile.Roles.ADMIN
         instance.profile.is_approved = True
         instance.profile.save(update_fields=["role", "requested_role", "is_approved"])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    rfid.invalidate_user(instance.pk, instance.username)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+    rfid.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=RFIDCard)
+@receiver(post_delete, sender=RFIDCard)
+def invalidate_cached_card(sender, instance, **kwargs):
+    # Also covers a card whose uid was edited or that moved to another user
+    rfid.invalidate_card(instance.uid)
+    rfid.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=ItemInstance)
+@receiver(post_delete, sender=ItemInstance)
+def bump_catalog_version(sender, instance, **kwargs):
+    # Bulk writes (update/bulk_create) skip signals and bump explicitly
+    data_version.bump(data_version.CATALOG)
+
+
+@receiver(post_delete, sender=ItemInstance)
+def record_instance_tombstone(sender, instance, **kwargs):
+    # Also sent for instances removed by a cascade from Item or Category
+    ItemInstanceTombstone.objects.create(instance_id=instance.pk, reference_id=instance.reference_id)
@@ -1,3 +1,1014 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .authentication import CachedTokenAuthentication, principal_cache
+from .models import (
+    AnalysisJob,
+    Borrow,
+    BorrowDailyRollup,
+    BorrowerRollup,
+    BorrowLog,
+    BorrowStatusCounter,
+    Category,
+    Item,
+    ItemInstance,
+    Notification,
+    RFIDCard,
+    UserProfile,
+)
+from .services import ai_jobs, borrow_counters, borrow_export, borrow_rollup, inventory_state, overdue, reference_index, rfid
+from .services.ai_cache import AIResponseCache, DjangoCacheBackend, InProcessBackend
+from .services.ai_service import AIService, ai_service
+from .services.ai_transport import CircuitBreaker, CircuitOpenError, ProviderTransport
+from .services.notification_stream import NotificationBroadcaster
+from .services.reference_index import ReferenceIndex
+
+User = get_user_model()
+
+
+class ApiTestCase(TestCase):
+    """Shared fixtures: an approved handler and borrower plus helpers for inventory and borrows"""
+
+    def setUp(self):
+        self.handler = self.make_user("handler", UserProfile.Roles.HANDLER)
+        self.borrower = self.make_user("student", UserProfile.Roles.STUDENT)
+        self.client = APIClient()
+        self.client.force_authenticate(self.handler)
+
+    def make_user(self, username, role, approved=True):
+        user = User.objects.create_user(username=username, password="pw")
+        UserProfile.objects.filter(user=user).update(role=role, requested_role=role, is_approved=approved)
+        return User.objects.select_related("profile").get(pk=user.pk)
+
+    def make_item(self, name="Laptop", instances=2, prefix=None, category=None):
+        item = Item.objects.create(name=name, quantity=instances, available=instances, category=category)
+        prefix = prefix or name[:3].upper()
+        for n in range(instances):
+            ItemInstance.objects.create(item=item, reference_id=f"{prefix}{n:03d}")
+        return item
+
+    def make_borrow(self, instance, status=Borrow.Status.PENDING, borrower=None, borrow_date=None, **fields):
+        """Borrow on ``instance`` as the views would leave it (instance IN_USE, counters moved)"""
+        ItemInstance.objects.filter(pk=instance.pk).update(status=ItemInstance.ItemStatus.IN_USE)
+        Item.objects.filter(pk=instance.item_id).update(available=F("available") - 1)
+        borrow = Borrow.objects.create(
+            item=instance.item,
+            item_instance=instance,
+            borrower=borrower or self.borrower,
+            due_date=fields.pop("due_date", timezone.now() + timedelta(days=3)),
+            status=status,
+            **fields,
+        )
+        if borrow_date is not None:
+            # auto_now_add ignores the value passed to create()
+            Borrow.objects.filter(pk=borrow.pk).update(borrow_date=borrow_date)
+            borrow.borrow_date = borrow_date
+        with self.captureOnCommitCallbacks(execute=True):
+            borrow_counters.record_transition(None, status)
+        return borrow
+
+    def counter(self, borrow_status):
+        return BorrowStatusCounter.objects.get(status=borrow_status).count
+
+
+class BorrowDecisionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_item()
+        self.borrow = self.make_borrow(self.item.instances.first())
+
+    def decide(self, decision):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f"/api/borrow-requests/{self.borrow.id}/{decision}/", {}, format="json")
+
+    def test_second_approve_conflicts_and_counts_once(self):
+        self.assertEqual(self.decide("approve").status_code, 200)
+        self.assertEqual(self.decide("approve").status_code, 409)
+        self.assertEqual(self.counter(Borrow.Status.PENDING), 0)
+        self.assertEqual(self.counter(Borrow.Status.ACTIVE), 1)
+
+    def test_approve_after_reject_keeps_released_instance(self):
+        self.assertEqual(self.decide("reject").status_code, 200)
+        self.assertEqual(self.decide("approve").status_code, 409)
+        self.borrow.refresh_from_db()
+        self.assertEqual(self.borrow.status, Borrow.Status.REJECTED)
+        self.assertEqual(self.borrow.item_instance.status, ItemInstance.ItemStatus.AVAILABLE)
+        self.assertEqual(self.counter(Borrow.Status.ACTIVE), 0)
+
+    def test_unknown_borrow_is_404(self):
+        response = self.client.post("/api/borrow-requests/999999/approve/", {}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+
+class ReservationTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_item(instances=2)
+        self.client.force_authenticate(self.borrower)
+
+    def request_borrow(self, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/borrower/request-borrow/", {"item_id": self.item.id}, format="json")
+
+    def test_each_request_gets_a_distinct_instance_until_none_are_left(self):
+        other = self.make_user("other", UserProfile.Roles.STUDENT)
+        third = self.make_user("third", UserProfile.Roles.STUDENT)
+        self.assertEqual(self.request_borrow().status_code, 201)
+        self.assertEqual(self.request_borrow(other).status_code, 201)
+        self.assertEqual(self.request_borrow(third).status_code, 400)
+
+        instances = Borrow.objects.values_list("item_instance_id", flat=True)
+        self.assertEqual(len(set(instances)), 2)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.available, 0)
+        self.assertEqual(self.counter(Borrow.Status.PENDING), 2)
+
+    def test_deltas_land_in_the_reserving_transaction(self):
+        with self.captureOnCommitCallbacks():
+            self.client.post("/api/borrower/request-borrow/", {"item_id": self.item.id}, format="json")
+            self.item.refresh_from_db()
+            self.assertEqual(self.item.available, 1)
+            self.assertEqual(self.counter(Borrow.Status.PENDING), 1)
+
+
+class NotificationStreamTests(ApiTestCase):
+    def notify(self, notification_id):
+        return Notification.objects.create(
+            id=notification_id, user=self.borrower, kind=Notification.Kind.APPROVED, title="Approved", message="ok"
+        )
+
+    async def test_late_committed_lower_id_is_still_delivered(self):
+        broadcaster = NotificationBroadcaster(poll_interval=60)
+        queue = await broadcaster.subscribe(self.borrower.id)
+        try:
+            await sync_to_async(self.notify)(10)
+            await broadcaster.poll_once()
+            # Id 5 was taken before 10 but its transaction committed later
+            await sync_to_async(self.notify)(5)
+            await broadcaster.poll_once()
+            await broadcaster.poll_once()
+            delivered = [queue.get_nowait()["id"] for _ in range(queue.qsize())]
+            self.assertEqual(delivered, [10, 5])
+        finally:
+            broadcaster.unsubscribe(self.borrower.id, queue)
+            broadcaster._task.cancel()
+
+
+class NotificationCountTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.borrower)
+        self.ids = [
+            Notification.objects.create(user=self.borrower, kind=kind, title=kind, message="").id
+            for kind in (Notification.Kind.APPROVED, Notification.Kind.OVERDUE)
+        ]
+
+    def test_cached_count_follows_mark_read(self):
+        self.assertEqual(self.client.get("/api/borrower/notifications/count/").data["unread_count"], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/borrower/notifications/read/", {"ids": self.ids[:1]}, format="json")
+        self.assertEqual(response.data["marked_read"], 1)
+        counts = self.client.get("/api/borrower/notifications/count/").data
+        self.assertEqual((counts["unread_count"], counts["approved"], counts["overdue"]), (1, 0, 1))
+
+
+class BorrowExportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.make_user("admin", UserProfile.Roles.ADMIN))
+
+    def test_impossible_date_is_400(self):
+        for bound in ("start=2024-13-45", "end=2024-02-30", "start=2024-01-01T25:00:00", "start=yesterday"):
+            with self.subTest(bound=bound):
+                response = self.client.get(f"/api/admin/borrows/export/?{bound}")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Invalid date", response.data["detail"])
+
+    async def test_asgi_response_streams_before_the_export_is_read(self):
+        admin = await sync_to_async(User.objects.get)(username="admin")
+        token = await sync_to_async(Token.objects.create)(user=admin)
+        item = await sync_to_async(self.make_item)(instances=6)
+        for instance in await sync_to_async(list)(item.instances.all()):
+            await sync_to_async(self.make_borrow)(instance)
+
+        rows_read, read_at_first_body = [], []
+        real_iter_rows = borrow_export.iter_rows
+
+        def counting_iter_rows(*args, **kwargs):
+            for row in real_iter_rows(*args, **kwargs):
+                rows_read.append(row)
+                yield row
+
+        requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            # The client stays connected until the response is done
+            await asyncio.Event().wait()
+
+        bodies = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.assertEqual(message["status"], 200)
+            elif message["type"] == "http.response.body" and message.get("body"):
+                if not bodies:
+                    read_at_first_body.append(len(rows_read))
+                bodies.append(message["body"])
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/admin/borrows/export/",
+            "raw_path": b"/api/admin/borrows/export/",
+            "query_string": b"output=ndjson",
+            "headers": [(b"host", b"testserver"), (b"authorization", f"Token {token.key}".encode())],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 1234),
+        }
+        with mock.patch.object(borrow_export, "iter_rows", counting_iter_rows), \
+                mock.patch.object(borrow_export, "ASYNC_BATCH_LINES", 2):
+            await get_asgi_application()(scope, receive, send)
+
+        self.assertEqual(len(b"".join(bodies).splitlines()), 6)
+        self.assertGreater(len(bodies), 1)
+        # The first lines went out before the query had been read to the end
+        self.assertLess(read_at_first_body[0], 6)
+
+    def test_valid_range_streams_csv(self):
+        self.make_borrow(self.make_item().instances.first())
+        response = self.client.get("/api/admin/borrows/export/?start=2000-01-01&end=2999-12-31")
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+
+class WalkinCheckoutTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_item(instances=3)
+        self.instance_ids = list(self.item.instances.values_list("id", flat=True))
+
+    def checkout(self, instance_ids, due_date="2099-01-31"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/borrow-walkin/checkout/",
+                {"item_instance_ids": instance_ids, "borrower_id": self.borrower.id, "due_date": due_date},
+                format="json",
+            )
+
+    def test_impossible_due_date_is_400(self):
+        for due_date in ("2024-02-30", "2024-01-01T24:61:00", "soon"):
+            with self.subTest(due_date=due_date):
+                response = self.checkout(self.instance_ids, due_date)
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(Borrow.objects.exists())
+
+    def test_one_unavailable_instance_fails_the_whole_cart(self):
+        taken = self.item.instances.get(id=self.instance_ids[1])
+        self.make_borrow(taken, status=Borrow.Status.ACTIVE)
+
+        response = self.checkout(self.instance_ids)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["unavailable"], [taken.id])
+        self.assertEqual(Borrow.objects.count(), 1)
+        self.assertEqual(
+            ItemInstance.objects.filter(status=ItemInstance.ItemStatus.AVAILABLE).count(), 2
+        )
+
+    def test_checkout_borrows_every_instance(self):
+        response = self.checkout(self.instance_ids)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["borrows"]), 3)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.available, 0)
+        self.assertEqual(self.counter(Borrow.Status.ACTIVE), 3)
+
+
+class KeysetPaginationTests(ApiTestCase):
+    url = "/api/admin/borrows/all/"
+
+    @staticmethod
+    def cursor(values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    def test_walks_ties_on_borrow_date_without_gaps_or_repeats(self):
+        item = self.make_item(instances=5)
+        same_time = timezone.now()
+        for instance in item.instances.all():
+            self.make_borrow(instance, borrow_date=same_time)
+
+        seen, cursor = [], None
+        while True:
+            query = f"?page_size=2&cursor={cursor}" if cursor else "?page_size=2"
+            response = self.client.get(self.url + query)
+            self.assertEqual(response.status_code, 200)
+            seen += [borrow["id"] for borrow in response.data["borrows"]]
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen, sorted(Borrow.objects.values_list("id", flat=True), reverse=True))
+
+    def test_tampered_cursor_is_400(self):
+        cursors = {
+            "wrong types": self.cursor(["x", 1]),
+            "non-integer id": self.cursor([timezone.now().isoformat(), "abc"]),
+            "wrong length": self.cursor([1]),
+            "not json": "bm90IGpzb24",
+            "not base64": "%%%",
+        }
+        for label, cursor in cursors.items():
+            with self.subTest(label):
+                response = self.client.get(f"{self.url}?cursor={cursor}")
+                self.assertEqual(response.status_code, 400)
+
+    def test_bad_page_size_is_400(self):
+        for page_size in ("0", "-3", "ten"):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.client.get(f"{self.url}?page_size={page_size}").status_code, 400)
+
+
+class QueryCountTests(ApiTestCase):
+    """Endpoints run the same number of queries for N and 2N borrows"""
+
+    admin_urls = [
+        "/api/admin/dashboard/stats/",
+        "/api/admin/inventory/",
+        "/api/admin/borrows/active/",
+        "/api/admin/borrows/archived/",
+        "/api/admin/borrows/all/",
+        "/api/admin/categories/",
+        "/api/admin/reports/analytics/",
+        "/api/borrow-requests/",
+    ]
+    borrower_urls = [
+        "/api/borrower/stats/",
+        "/api/borrower/my-borrows/",
+        "/api/borrower/categories/",
+    ]
+    statuses = [Borrow.Status.PENDING, Borrow.Status.ACTIVE, Borrow.Status.LATE, Borrow.Status.RETURNED]
+
+    def setUp(self):
+        super().setUp()
+        self.admin = self.make_user("admin", UserProfile.Roles.ADMIN)
+        self.category = Category.objects.create(name=Category.CategoryType.DEVICES)
+        self.added = 0
+
+    def add_borrows(self, n):
+        """``n`` borrows, each on its own item, spread over new borrowers and every status"""
+        for _ in range(n):
+            self.added += 1
+            item = self.make_item(f"Item {self.added}", instances=1, prefix=f"Q{self.added:03d}-", category=self.category)
+            borrower = self.make_user(f"borrower{self.added}", UserProfile.Roles.STUDENT)
+            status = self.statuses[self.added % len(self.statuses)]
+            self.make_borrow(item.instances.get(), status=status, borrower=borrower)
+            # The borrower under test owns a share of them too
+            if self.added % 2:
+                self.make_borrow(
+                    ItemInstance.objects.create(item=item, reference_id=f"Q{self.added:03d}-B"),
+                    status=status,
+                )
+
+    def count_queries(self, user, url):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_borrows(self):
+        cases = [(self.admin, url) for url in self.admin_urls] + [(self.borrower, url) for url in self.borrower_urls]
+        cases += [
+            (self.admin, f"/api/admin/categories/{self.category.id}/items/"),
+            (self.borrower, f"/api/borrower/categories/{self.category.id}/items/"),
+        ]
+        self.add_borrows(4)
+        baseline = {url: self.count_queries(user, url) for user, url in cases}
+
+        self.add_borrows(4)
+        for user, url in cases:
+            with self.subTest(url=url):
+                self.client.force_authenticate(user)
+                with self.assertNumQueries(baseline[url]):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class ConditionalGetTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name=Category.CategoryType.DEVICES)
+        self.item = self.make_item(category=self.category)
+        self.client.force_authenticate(self.borrower)
+        self.url = f"/api/borrower/categories/{self.category.id}/items/"
+
+    def test_unchanged_catalog_is_304_without_rebuilding(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_reservation_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/borrower/request-borrow/", {"item_id": self.item.id}, format="json")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["items"][0]["available_count"], 1)
+
+    def test_query_string_is_part_of_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.assertEqual(self.client.get(f"{self.url}?view=compact", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class BatchDecisionTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        item = self.make_item(instances=3)
+        self.pending, self.other, self.active = [
+            self.make_borrow(instance, status=status)
+            for instance, status in zip(
+                item.instances.order_by("id"),
+                (Borrow.Status.PENDING, Borrow.Status.PENDING, Borrow.Status.ACTIVE),
+            )
+        ]
+
+    def decide(self, borrow_ids, decision="approve"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/borrow-requests/batch/", {"borrow_ids": borrow_ids, "decision": decision}, format="json"
+            )
+
+    def test_unprocessable_ids_are_reported_without_failing_the_batch(self):
+        response = self.decide([self.pending.id, self.active.id, 999999, self.other.id])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["outcome"] for result in response.data["results"]],
+            ["approved", "already_active", "not_found", "approved"],
+        )
+        self.assertEqual(response.data["processed"], 2)
+        self.assertEqual(self.counter(Borrow.Status.PENDING), 0)
+        self.assertEqual(self.counter(Borrow.Status.ACTIVE), 3)
+
+    def test_rejecting_releases_the_instances(self):
+        response = self.decide([self.pending.id, self.other.id], decision="reject")
+        self.assertEqual(response.data["processed"], 2)
+        self.assertEqual(ItemInstance.objects.filter(status=ItemInstance.ItemStatus.AVAILABLE).count(), 2)
+        self.assertEqual(Item.objects.get().available, 2)
+
+    def test_bad_decision_is_400(self):
+        self.assertEqual(self.decide([self.pending.id], decision="maybe").status_code, 400)
+        self.assertEqual(self.decide("not-a-list").status_code, 400)
+        self.assertEqual(Borrow.objects.get(id=self.pending.id).status, Borrow.Status.PENDING)
+
+
+class CounterDriftTests(ApiTestCase):
+    """Stored counters match a recount after every kind of transition"""
+
+    def post(self, url, data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data, format="json")
+        self.assertLess(response.status_code, 300, response.data)
+        return response
+
+    def assert_no_drift(self):
+        self.assertEqual(borrow_counters.rebuild(dry_run=True), {})
+        self.assertEqual(inventory_state.reconcile(dry_run=True), {})
+
+    def test_lifecycle_leaves_no_drift(self):
+        item = self.make_item(instances=6)
+        other = self.make_user("other", UserProfile.Roles.STUDENT)
+
+        self.client.force_authenticate(self.borrower)
+        self.post("/api/borrower/request-borrow/", {"item_id": item.id})
+        self.client.force_authenticate(other)
+        self.post("/api/borrower/request-borrow/", {"item_id": item.id})
+        self.assert_no_drift()
+
+        self.client.force_authenticate(self.handler)
+        borrow_ids = list(Borrow.objects.order_by("id").values_list("id", flat=True))
+        self.post(f"/api/borrow-requests/{borrow_ids[0]}/approve/", {})
+        self.post(f"/api/borrow-requests/{borrow_ids[1]}/reject/", {})
+        self.assert_no_drift()
+
+        free = list(item.instances.filter(status=ItemInstance.ItemStatus.AVAILABLE).values_list("id", flat=True))
+        self.post(
+            "/api/borrow-walkin/checkout/",
+            {"item_instance_ids": free[:3], "borrower_id": other.id, "due_date": "2099-01-31"},
+        )
+        Borrow.objects.filter(item_instance_id=free[0]).update(due_date=timezone.now() - timedelta(days=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(overdue.mark_overdue(), 1)
+        self.assert_no_drift()
+
+        returned = list(ItemInstance.objects.filter(id__in=free[:2]).values_list("reference_id", flat=True))
+        self.post("/api/borrow-returns/", {"reference_ids": returned})
+        self.assert_no_drift()
+        self.assertEqual(borrow_counters.status_counts()["total_borrows"], Borrow.objects.count())
+
+    def test_rebuild_and_reconcile_with_a_transition_pending_commit(self):
+        item = self.make_item(instances=2)
+        self.client.force_authenticate(self.borrower)
+        # The request's on_commit work has not run yet when the repairs recount
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post("/api/borrower/request-borrow/", {"item_id": item.id}, format="json")
+            self.assertEqual(borrow_counters.rebuild(), {})
+            self.assertEqual(inventory_state.reconcile(), {})
+        for callback in callbacks:
+            callback()
+        self.assert_no_drift()
+        self.assertEqual(self.counter(Borrow.Status.PENDING), 1)
+        self.assertEqual(Item.objects.get(id=item.id).available, 1)
+
+    def test_rebuild_repairs_drift(self):
+        self.make_borrow(self.make_item().instances.first())
+        BorrowStatusCounter.objects.filter(status=Borrow.Status.PENDING).update(count=7)
+        self.assertEqual(borrow_counters.rebuild(), {Borrow.Status.PENDING: (7, 1)})
+        self.assert_no_drift()
+
+
+class BorrowRollupTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = self.make_item(instances=6)
+        self.instances = iter(self.item.instances.order_by("id"))
+        self.today = timezone.make_aware(datetime(2026, 3, 10))
+
+    def borrow_at(self, when):
+        return self.make_borrow(next(self.instances), borrow_date=when)
+
+    def rolled_up(self, day):
+        return sum(BorrowDailyRollup.objects.filter(day=day).values_list("count", flat=True))
+
+    def test_late_commit_on_a_covered_day_is_picked_up(self):
+        yesterday = (self.today - timedelta(days=1)).date()
+        self.borrow_at(self.today - timedelta(hours=5))
+        # First run just after midnight
+        borrow_rollup.refresh(now=self.today + timedelta(minutes=5))
+        self.assertEqual(self.rolled_up(yesterday), 1)
+
+        # Stamped before midnight, committed after that run had read the day
+        self.borrow_at(self.today - timedelta(minutes=2))
+        result = borrow_rollup.refresh(now=self.today + timedelta(minutes=20))
+        self.assertEqual(result["days"], 1)
+        self.assertEqual(self.rolled_up(yesterday), 2)
+
+    def test_rerun_with_overlapping_window_does_not_double_count(self):
+        yesterday = (self.today - timedelta(days=1)).date()
+        for hours in (1, 2, 3):
+            self.borrow_at(self.today - timedelta(hours=hours))
+        for minutes in (5, 6, 7):
+            borrow_rollup.refresh(now=self.today + timedelta(minutes=minutes))
+        self.assertEqual(self.rolled_up(yesterday), 3)
+        self.assertEqual(BorrowerRollup.objects.get(borrower=self.borrower).count, 3)
+
+    def test_deleted_borrows_are_only_caught_with_verify(self):
+        doomed = self.borrow_at(self.today - timedelta(days=2))
+        self.borrow_at(self.today - timedelta(days=1))
+        borrow_rollup.refresh(now=self.today)
+        doomed.delete()
+
+        self.assertFalse(borrow_rollup.refresh(now=self.today + timedelta(hours=1))["drifted"])
+        result = borrow_rollup.refresh(verify=True, now=self.today + timedelta(hours=2))
+        self.assertTrue(result["drifted"])
+        self.assertEqual(sum(BorrowDailyRollup.objects.values_list("count", flat=True)), 1)
+
+
+class OverdueSweepTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        first, second = self.make_item(instances=2).instances.order_by("id")
+        self.past_due = self.make_borrow(first, Borrow.Status.ACTIVE, due_date=timezone.now() - timedelta(days=1))
+        self.on_time = self.make_borrow(second, Borrow.Status.ACTIVE)
+
+    def sweep(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return overdue.mark_overdue()
+
+    def stats(self):
+        self.client.force_authenticate(self.borrower)
+        return self.client.get("/api/borrower/stats/").data
+
+    def test_sweep_marks_past_due_active_borrows_late(self):
+        self.assertEqual(self.sweep(), 1)
+        self.assertEqual(Borrow.objects.get(pk=self.past_due.pk).status, Borrow.Status.LATE)
+        self.assertEqual(Borrow.objects.get(pk=self.on_time.pk).status, Borrow.Status.ACTIVE)
+        self.assertEqual((self.counter(Borrow.Status.ACTIVE), self.counter(Borrow.Status.LATE)), (1, 1))
+        self.assertTrue(BorrowLog.objects.filter(borrow=self.past_due, action=BorrowLog.ActionType.MARKED_LATE).exists())
+        self.assertEqual(Notification.objects.filter(user=self.borrower, kind=Notification.Kind.OVERDUE).count(), 1)
+        self.assertEqual(self.sweep(), 0)
+
+    def test_borrower_stats_match_before_and_after_the_sweep(self):
+        expected = {"active_borrows": 2, "pending_requests": 0, "overdue_items": 1, "total_borrowed": 2}
+        self.assertEqual(self.stats(), expected)
+        self.sweep()
+        self.assertEqual(self.stats(), expected)
+
+
+class ReferenceIndexTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item = self.make_item(instances=3)
+        self.index = ReferenceIndex()
+        self.index.lookup(["LAP000"])
+
+    def test_updates_load_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_state.set_status(self.item.instances.get(reference_id="LAP001"), ItemInstance.ItemStatus.FAULTY)
+        matches, missing = self.index.lookup(["LAP001", "NOPE"])
+        self.assertEqual((matches[0]["status"], missing), (ItemInstance.ItemStatus.FAULTY, ["NOPE"]))
+        self.assertEqual((self.index.full_loads, self.index.incremental_loads), (1, 1))
+
+    def test_delete_loads_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_state.delete_instance(self.item.instances.get(reference_id="LAP002"))
+        matches, missing = self.index.lookup(["LAP000", "LAP002"])
+        self.assertEqual(([match["reference_id"] for match in matches], missing), (["LAP000"], ["LAP002"]))
+        self.assertEqual((self.index.full_loads, self.index.incremental_loads), (1, 1))
+
+    def test_reused_reference_survives_the_old_tombstone(self):
+        other = self.make_item(name="Camera", instances=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_state.delete_instance(self.item.instances.get(reference_id="LAP002"))
+            ItemInstance.objects.create(item=other, reference_id="LAP002")
+        matches, _ = self.index.lookup(["LAP002"])
+        self.assertEqual(matches[0]["item_name"], "Camera")
+
+    def test_only_changed_items_are_reread(self):
+        # A row stamped before the last load (less the overlap) is not re-read
+        last_hour = timezone.now() - timedelta(hours=1)
+        Item.objects.filter(pk=self.item.pk).update(name="Stale name", updated_at=last_hour)
+        other = self.make_item(name="Tablet", instances=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.name = "Tablet Pro"
+            other.save()
+        matches, _ = self.index.lookup(["LAP000", "TAB000"])
+        self.assertEqual([match["item_name"] for match in matches], ["Laptop", "Tablet Pro"])
+        self.assertEqual((self.index.full_loads, self.index.incremental_loads), (1, 1))
+
+    def test_index_older_than_tombstone_retention_reloads(self):
+        self.index._loaded_at -= reference_index.TOMBSTONE_RETENTION
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory_state.set_status(self.item.instances.get(reference_id="LAP001"), ItemInstance.ItemStatus.FAULTY)
+        self.index.lookup(["LAP001"])
+        self.assertEqual((self.index.full_loads, self.index.incremental_loads), (2, 0))
+
+    def test_unchanged_version_costs_one_query(self):
+        with self.assertNumQueries(1):
+            self.index.lookup(["LAP000", "LAP001"])
+
+
+class RFIDResolveTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        rfid.card_cache.clear()
+        self.card = RFIDCard.objects.create(uid="04:a2:19:ff", user=self.borrower)
+
+    def test_scanner_formats_share_one_cached_entry(self):
+        self.assertEqual(rfid.resolve("04a219ff"), self.borrower)
+        with self.assertNumQueries(0):
+            self.assertEqual(rfid.resolve("04-A2-19-FF"), self.borrower)
+
+    def test_reassigned_card_resolves_to_the_new_owner(self):
+        rfid.resolve("04A219FF")
+        self.card.user = self.handler
+        self.card.save()
+        self.assertEqual(rfid.resolve("04A219FF"), self.handler)
+
+    def test_unknown_badge_is_remembered_briefly(self):
+        with self.assertNumQueries(2):
+            self.assertIsNone(rfid.resolve("DEADBEEF"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(rfid.resolve("DEADBEEF"))
+        with mock.patch.object(rfid, "negative_ttl", -1):
+            rfid.card_cache.clear()
+            rfid.resolve("DEADBEEF")
+            with self.assertNumQueries(2):
+                rfid.resolve("DEADBEEF")
+
+    def test_issuing_a_card_drops_the_cached_miss(self):
+        self.assertIsNone(rfid.resolve("DEADBEEF"))
+        RFIDCard.objects.create(uid="DEADBEEF", user=self.handler)
+        self.assertEqual(rfid.resolve("DEADBEEF"), self.handler)
+
+    def test_username_fallback(self):
+        with override_settings(RFID_USERNAME_FALLBACK=False):
+            self.assertIsNone(rfid.resolve("student"))
+        self.assertEqual(rfid.resolve("student"), self.borrower)
+        self.assertIsNone(rfid.resolve("newcomer"))
+        newcomer = self.make_user("newcomer", UserProfile.Roles.STUDENT)
+        self.assertEqual(rfid.resolve("newcomer"), newcomer)
+
+
+class InstanceImportTests(ApiTestCase):
+    url = "/api/admin/item-instances/import/"
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.make_user("admin", UserProfile.Roles.ADMIN))
+        self.item = self.make_item(instances=1)
+
+    def post(self, body):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, body, format="json")
+
+    def test_valid_rows_are_created_and_counted(self):
+        response = self.post({"instances": [
+            {"item": self.item.id, "reference_id": "LAP101"},
+            {"item": "Laptop", "reference_id": "LAP102", "status": "faulty"},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["created"], response.data["errors"]), (2, []))
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.available), (3, 2))
+
+    def test_duplicate_reference_ids_are_skipped(self):
+        response = self.post({"instances": [
+            {"item": "Laptop", "reference_id": "LAP000"},
+            {"item": "Laptop", "reference_id": "LAP201"},
+            {"item": "Laptop", "reference_id": "LAP201"},
+            {"item": "Laptop", "reference_id": "LAP202"},
+        ]})
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(
+            [(error["row"], error["detail"]) for error in response.data["errors"]],
+            [
+                (1, "Reference ID already exists."),
+                (2, "Reference ID appears more than once in the import."),
+                (3, "Reference ID appears more than once in the import."),
+            ],
+        )
+        self.assertEqual(ItemInstance.objects.filter(reference_id__startswith="LAP2").count(), 1)
+
+    def test_malformed_body_is_400(self):
+        self.assertEqual(self.post([{"item": "Laptop", "reference_id": "LAP301"}]).status_code, 400)
+        self.assertEqual(self.post({"instances": "LAP301"}).status_code, 400)
+        self.assertFalse(ItemInstance.objects.filter(reference_id="LAP301").exists())
+
+    @mock.patch("api.services.instance_import.MAX_ROWS", 2)
+    def test_oversized_body_is_400(self):
+        rows = [{"item": "Laptop", "reference_id": f"LAP40{n}"} for n in range(3)]
+        response = self.post({"instances": rows})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "At most 2 rows per import.")
+        self.assertEqual(ItemInstance.objects.count(), 1)
+
+
+class StubSession:
+    """Stands in for requests.Session: replays ``outcomes`` (responses or exceptions)"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        return response
+
+
+@mock.patch("api.services.ai_transport.logger")
+@mock.patch("api.services.ai_transport.time.sleep")
+class ProviderTransportTests(TestCase):
+    def transport(self, *outcomes, **options):
+        transport = ProviderTransport("stub", max_retries=2, **options)
+        transport.session = StubSession(*outcomes)
+        return transport
+
+    def test_connect_failures_are_retried_with_backoff(self, sleep, logger):
+        transport = self.transport(
+            requests.exceptions.ConnectTimeout(), requests.exceptions.ConnectionError(), 200
+        )
+        self.assertEqual(transport.post("https://ai.test").status_code, 200)
+        self.assertEqual(transport.session.calls, 3)
+        self.assertEqual(sleep.call_count, 2)
+        # Full jitter under an exponential cap: 0.5s, then 1s
+        self.assertLessEqual(sleep.call_args_list[0].args[0], 0.5)
+        self.assertLessEqual(sleep.call_args_list[1].args[0], 1.0)
+        self.assertEqual(transport.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_read_timeout_is_not_retried(self, sleep, logger):
+        transport = self.transport(requests.exceptions.ReadTimeout(), 200)
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            transport.post("https://ai.test")
+        self.assertEqual(transport.session.calls, 1)
+        sleep.assert_not_called()
+
+    def test_only_unprocessed_statuses_are_retried(self, sleep, logger):
+        transport = self.transport(429, 503, 200)
+        self.assertEqual(transport.post("https://ai.test").status_code, 200)
+        self.assertEqual(transport.session.calls, 3)
+
+        transport = self.transport(500, 200)
+        self.assertEqual(transport.post("https://ai.test").status_code, 500)
+        self.assertEqual(transport.session.calls, 1)
+        self.assertEqual(transport.breaker.failures, 1)
+
+    def test_retry_budget_spent_raises_the_last_error(self, sleep, logger):
+        transport = self.transport(*[requests.exceptions.ConnectionError()] * 3)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            transport.post("https://ai.test")
+        self.assertEqual(transport.session.calls, 3)
+
+    def test_circuit_opens_half_opens_and_closes(self, sleep, logger):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        transport = self.transport(500, 500, 500, 200, breaker=breaker)
+        with mock.patch("api.services.ai_transport.time.monotonic", return_value=1000.0):
+            transport.post("https://ai.test")
+            transport.post("https://ai.test")
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            with self.assertRaises(CircuitOpenError):
+                transport.post("https://ai.test")
+            self.assertEqual(transport.session.calls, 2)
+
+        with mock.patch("api.services.ai_transport.time.monotonic", return_value=1061.0):
+            # The trial call fails: open again
+            transport.post("https://ai.test")
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with mock.patch("api.services.ai_transport.time.monotonic", return_value=1122.0):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())  # one trial at a time
+            breaker.record_success()
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class AIResponseCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = AIService()
+        self.service._cache = AIResponseCache(DjangoCacheBackend(ttl=60))
+        self.provider = mock.Mock()
+        self.provider.complete.side_effect = ["first answer", "second answer"]
+
+    def analyze(self, prompt="How is the inventory?", refresh=False):
+        return self.service._analyze(self.provider, prompt, {}, refresh=refresh)
+
+    def test_repeat_prompt_is_a_hit(self):
+        self.assertEqual(self.analyze(), "first answer")
+        # Whitespace does not change the key
+        self.assertEqual(self.analyze("How  is the\ninventory?"), "first answer")
+        self.assertEqual(self.provider.complete.call_count, 1)
+        stats = self.service.cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["shared"]), (1, 1, True))
+
+    def test_refresh_bypasses_and_replaces_the_entry(self):
+        self.analyze()
+        self.assertEqual(self.analyze(refresh=True), "second answer")
+        self.assertEqual(self.analyze(), "second answer")
+        self.assertEqual(self.service.cache_stats()["refreshes"], 1)
+
+    def test_clear_reaches_other_workers(self):
+        self.analyze()
+        other_worker = AIResponseCache(DjangoCacheBackend(ttl=60))
+        key = AIResponseCache.make_key(self.service.active_provider, "How is the inventory?")
+        self.assertEqual(other_worker.get(key), "first answer")
+
+        admin = self.make_user("admin", UserProfile.Roles.ADMIN)
+        self.client.force_authenticate(admin)
+        with mock.patch.object(ai_service, "_cache", other_worker):
+            response = self.client.delete("/api/admin/ai/cache/")
+        self.assertEqual(response.data["message"], "AI response cache cleared")
+        self.assertIsNone(self.service.cache.get(key))
+        self.assertEqual(self.analyze(), "second answer")
+
+    def test_local_backend_says_clearing_is_per_worker(self):
+        self.client.force_authenticate(self.make_user("admin", UserProfile.Roles.ADMIN))
+        with mock.patch.object(ai_service, "_cache", AIResponseCache(InProcessBackend(60, 10))):
+            response = self.client.delete("/api/admin/ai/cache/")
+        self.assertIn("this worker only", response.data["message"])
+        self.assertFalse(response.data["cache"]["shared"])
+
+
+@mock.patch("api.services.ai_jobs.logger")
+@mock.patch("api.services.ai_jobs.ai_service")
+class AIJobTests(ApiTestCase):
+    def enqueue(self):
+        return ai_jobs.enqueue(AnalysisJob.Kind.INVENTORY, {"total_items": 1})
+
+    def make_stale(self, job):
+        AnalysisJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+    def test_jobs_are_claimed_oldest_first_and_once(self, service, logger):
+        first, second = self.enqueue(), self.enqueue()
+        claimed = ai_jobs.claim_next()
+        self.assertEqual((claimed.id, claimed.status, claimed.attempts), (first.id, AnalysisJob.JobStatus.RUNNING, 1))
+        self.assertEqual(ai_jobs.claim_next().id, second.id)
+        self.assertIsNone(ai_jobs.claim_next())
+
+    def test_run_job_records_the_result_or_the_error(self, service, logger):
+        service.analyze_inventory.return_value = "Restock laptops."
+        self.enqueue()
+        job = ai_jobs.run_job(ai_jobs.claim_next())
+        self.assertEqual((job.status, job.result["ai_analysis"]), (AnalysisJob.JobStatus.SUCCEEDED, "Restock laptops."))
+
+        service.analyze_inventory.side_effect = RuntimeError("provider down")
+        self.enqueue()
+        job = ai_jobs.run_job(ai_jobs.claim_next())
+        self.assertEqual((job.status, job.error), (AnalysisJob.JobStatus.FAILED, "provider down"))
+
+    def test_stale_job_is_retried_up_to_max_attempts(self, service, logger):
+        job = self.enqueue()
+        for attempt in range(1, ai_jobs.MAX_ATTEMPTS):
+            self.assertEqual(ai_jobs.claim_next().attempts, attempt)
+            self.make_stale(job)
+            self.assertEqual(ai_jobs.requeue_stale(timedelta(minutes=5)), 1)
+        self.assertEqual(ai_jobs.claim_next().attempts, ai_jobs.MAX_ATTEMPTS)
+        self.make_stale(job)
+        self.assertEqual(ai_jobs.requeue_stale(timedelta(minutes=5)), 0)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (AnalysisJob.JobStatus.FAILED, "Worker did not finish the job."))
+
+    def test_running_job_within_the_deadline_is_left_alone(self, service, logger):
+        job = self.enqueue()
+        ai_jobs.claim_next()
+        self.assertEqual(ai_jobs.requeue_stale(timedelta(minutes=5)), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.JobStatus.RUNNING)
+
+    def test_worker_drains_the_queue_once(self, service, logger):
+        service.analyze_inventory.return_value = "Restock laptops."
+        jobs = [self.enqueue(), self.enqueue()]
+        call_command("run_ai_jobs", "--once", stdout=StringIO())
+        self.assertEqual(
+            [AnalysisJob.objects.get(pk=job.pk).status for job in jobs],
+            [AnalysisJob.JobStatus.SUCCEEDED] * 2,
+        )
+
+
+class TokenAuthenticationTests(ApiTestCase):
+    url = "/api/auth/me/"
+
+    def setUp(self):
+        super().setUp()
+        principal_cache.clear()
+        self.addCleanup(principal_cache.clear)
+        self.token = Token.objects.create(user=self.borrower)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return len(captured)
+
+    def test_second_request_skips_the_token_lookup(self):
+        cold = self.queries()
+        self.assertEqual(self.queries(), cold - 1)
+
+    def test_revoked_token_is_rejected_at_once(self):
+        self.queries()
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivated_user_is_rejected_at_once(self):
+        self.queries()
+        self.borrower.is_active = False
+        self.borrower.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_change_from_another_worker_lands_within_the_ttl(self):
+        self.queries()
+        # No signal reaches this process, as with a write on another worker
+        User.objects.filter(pk=self.borrower.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        later = time.monotonic() + principal_cache.ttl + 1
+        with mock.patch("api.services.ttl_cache.time.monotonic", return_value=later):
+            self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_requests_do_not_share_the_cached_user(self):
+        self.queries()
+        first = CachedTokenAuthentication().authenticate_credentials(self.token.key)[0]
+        first.profile.role = UserProfile.Roles.ADMIN
+        second = CachedTokenAuthentication().authenticate_credentials(self.token.key)[0]
+        self.assertEqual(second.profile.role, UserProfile.Roles.STUDENT)
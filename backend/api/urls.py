@@ -13,25 +13,34 @@ from .views import (
     admin_active_borrows,
     admin_archived_borrows,
     admin_all_borrows,
+    admin_export_borrows,
     admin_borrow_detail,
     admin_reports_analytics,
     admin_ai_recommendations,
     admin_ai_inventory_analysis,
     admin_ai_borrow_analysis,
     admin_ai_custom_analysis,
+    admin_ai_job_status,
+    admin_ai_cache,
     admin_categories,
     admin_category_items,
+    admin_item_instances,
     admin_add_item_instance,
+    admin_import_item_instances,
     admin_update_item_instance,
     admin_delete_item_instance,
     admin_create_item,
     pending_borrow_requests,
     approve_borrow_request,
     reject_borrow_request,
+    batch_decide_borrow_requests,
     create_borrow_request,
     scan_item_barcode,
+    scan_item_barcodes,
     scan_user_rfid,
+    process_borrow_returns,
     process_walkin_borrow,
+    process_walkin_checkout,
     borrower_stats,
     borrower_my_borrows,
     borrower_categories,
@@ -39,6 +48,8 @@ from .views import (
     borrower_request_borrow,
     borrower_notifications,
     borrower_notification_count,
+    borrower_mark_notifications_read,
+    borrower_notification_stream,
 )
 
 urlpatterns = [
@@ -54,28 +65,37 @@ urlpatterns = [
     path("admin/borrows/active/", admin_active_borrows, name="admin-active-borrows"),
     path("admin/borrows/archived/", admin_archived_borrows, name="admin-archived-borrows"),
     path("admin/borrows/all/", admin_all_borrows, name="admin-all-borrows"),
+    path("admin/borrows/export/", admin_export_borrows, name="admin-export-borrows"),
     path("admin/borrows/<int:borrow_id>/", admin_borrow_detail, name="admin-borrow-detail"),
     path("admin/reports/analytics/", admin_reports_analytics, name="admin-reports-analytics"),
     path("admin/reports/recommendations/", admin_ai_recommendations, name="admin-ai-recommendations"),
     path("admin/ai/inventory-analysis/", admin_ai_inventory_analysis, name="admin-ai-inventory-analysis"),
     path("admin/ai/borrow-analysis/", admin_ai_borrow_analysis, name="admin-ai-borrow-analysis"),
     path("admin/ai/custom-analysis/", admin_ai_custom_analysis, name="admin-ai-custom-analysis"),
+    path("admin/ai/jobs/<int:job_id>/", admin_ai_job_status, name="admin-ai-job-status"),
+    path("admin/ai/cache/", admin_ai_cache, name="admin-ai-cache"),
     # New inventory management endpoints
     path("admin/categories/", admin_categories, name="admin-categories"),
     path("admin/categories/<int:category_id>/items/", admin_category_items, name="admin-category-items"),
     path("admin/categories/<int:category_id>/items/create/", admin_create_item, name="admin-create-item"),
+    path("admin/items/<int:item_id>/instances/", admin_item_instances, name="admin-item-instances"),
     path("admin/items/<int:item_id>/instances/add/", admin_add_item_instance, name="admin-add-item-instance"),
+    path("admin/item-instances/import/", admin_import_item_instances, name="admin-import-item-instances"),
     path("admin/item-instances/<int:instance_id>/", admin_update_item_instance, name="admin-update-item-instance"),
     path("admin/item-instances/<int:instance_id>/delete/", admin_delete_item_instance, name="admin-delete-item-instance"),
     # Borrow request endpoints
     path("borrow-requests/", pending_borrow_requests, name="pending-borrow-requests"),
     path("borrow-requests/<int:borrow_id>/approve/", approve_borrow_request, name="approve-borrow-request"),
     path("borrow-requests/<int:borrow_id>/reject/", reject_borrow_request, name="reject-borrow-request"),
+    path("borrow-requests/batch/", batch_decide_borrow_requests, name="batch-decide-borrow-requests"),
     path("borrow-requests/create/", create_borrow_request, name="create-borrow-request"),
     # Scanning and walk-in borrow endpoints
+    path("scan-items/", scan_item_barcodes, name="scan-item-barcodes"),
     path("scan-item/<str:barcode>/", scan_item_barcode, name="scan-item-barcode"),
     path("scan-rfid/<str:rfid>/", scan_user_rfid, name="scan-user-rfid"),
+    path("borrow-returns/", process_borrow_returns, name="process-borrow-returns"),
     path("borrow-walkin/", process_walkin_borrow, name="process-walkin-borrow"),
+    path("borrow-walkin/checkout/", process_walkin_checkout, name="process-walkin-checkout"),
     # Borrower endpoints (Students & Personnel)
     path("borrower/stats/", borrower_stats, name="borrower-stats"),
     path("borrower/my-borrows/", borrower_my_borrows, name="borrower-my-borrows"),
@@ -84,4 +104,6 @@ urlpatterns = [
     path("borrower/request-borrow/", borrower_request_borrow, name="borrower-request-borrow"),
     path("borrower/notifications/", borrower_notifications, name="borrower-notifications"),
     path("borrower/notifications/count/", borrower_notification_count, name="borrower-notification-count"),
+    path("borrower/notifications/read/", borrower_mark_notifications_read, name="borrower-mark-notifications-read"),
+    path("borrower/notifications/stream/", borrower_notification_stream, name="borrower-notification-stream"),
 ]
@@ -1,5 +1,8 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Q, F
+from django.db import transaction
+from django.db.models import Q, F
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from rest_framework.authtoken.models import Token
@@ -7,7 +10,8 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
-from .models import UserProfile, Borrow, Item, BorrowLog, Category, ItemInstance
+from .models import UserProfile, Borrow, Item, BorrowLog, Category, ItemInstance, AnalysisJob
+from .pagination import InvalidCursor, KeysetPaginator
 from .serializers import (
     ApprovalSerializer,
     LoginSerializer,
@@ -16,7 +20,10 @@ from .serializers import (
     BorrowSerializer,
     BorrowDetailSerializer,
 )
+from .services import ai_jobs, borrow_counters, borrow_export, data_version, inventory_state, notifications
 from .services.ai_service import ai_service
+from .services.borrow_stats import borrow_status_counts, select_counts
+from .services.inventory_stats import INVENTORY_SORTS, instance_status_counts, inventory_availability
 
 User = get_user_model()
 
@@ -40,6 +47,43 @@ def _is_handler_or_admin(user):
     return user.profile.role in [UserProfile.Roles.ADMIN, UserProfile.Roles.HANDLER]
 
 
+def _borrow_list_response(request, borrows, ordering, key="borrows"):
+    """Serialize a borrow listing, one keyset page at a time when ?cursor/?page_size is given"""
+    if not KeysetPaginator.requested(request):
+        return Response({key: BorrowSerializer(borrows, many=True).data})
+
+    paginator = KeysetPaginator(ordering)
+    try:
+        page, next_cursor = paginator.paginate(borrows, request)
+    except InvalidCursor as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        key: BorrowSerializer(page, many=True).data,
+        "next_cursor": next_cursor,
+    })
+
+
+
+def _conditional_response(request, scopes, build):
+    """Answer a read-only GET with an ETag from the data versions of ``scopes``.
+
+    A matching If-None-Match returns 304 before ``build`` (which does the
+    aggregation and returns a Response) is called at all.
+    """
+    etag = data_version.etag_for(request, scopes)
+    if data_version.matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+    response["ETag"] = etag
+    # Cached per user, but always revalidated with the server
+    response["Cache-Control"] = "private, no-cache"
+    response["Vary"] = "Authorization"
+    return response
+
+
 @api_view(["GET"])
 def health_check(request):
     return Response({"status": "ok", "service": "django-backend"})
@@ -178,49 +222,29 @@ def admin_dashboard_stats(request):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    total_borrows = Borrow.objects.count()
-    active_borrows = Borrow.objects.filter(status=Borrow.Status.ACTIVE).count()
-    late_borrows = Borrow.objects.filter(status=Borrow.Status.LATE).count()
-    returned_borrows = Borrow.objects.filter(status=Borrow.Status.RETURNED).count()
-    not_returned_borrows = Borrow.objects.filter(status=Borrow.Status.NOT_RETURNED).count()
-
-    return Response({
-        "total_borrows": total_borrows,
-        "active_borrows": active_borrows,
-        "late_borrows": late_borrows,
-        "returned_borrows": returned_borrows,
-        "not_returned_borrows": not_returned_borrows,
-    })
+    counts = borrow_counters.status_counts()
+    return Response(select_counts(counts))
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def admin_inventory(request):
-    """Get all inventory items with availability"""
+    """Get all inventory items with availability, optionally sorted with ?sort=[-]utilization"""
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    items = Item.objects.all()
-    items_data = []
-    
-    for item in items:
-        borrowed_count = Borrow.objects.filter(
-            item=item,
-            status__in=[Borrow.Status.ACTIVE, Borrow.Status.LATE]
-        ).count()
-        
-        available = item.quantity - borrowed_count
-        utilization = ((item.quantity - available) / item.quantity * 100) if item.quantity > 0 else 0
-        
-        items_data.append({
-            "id": item.id,
-            "name": item.name,
-            "quantity": item.quantity,
-            "available": available,
-            "utilization": round(utilization, 1),
-        })
-    
-    return Response({"items": items_data})
+    sort = request.query_params.get("sort")
+    if sort and sort not in INVENTORY_SORTS:
+        return Response(
+            {"detail": f"Invalid sort. Use one of: {', '.join(INVENTORY_SORTS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return _conditional_response(
+        request,
+        (data_version.CATALOG, data_version.BORROWS),
+        lambda: Response({"items": inventory_availability(sort)}),
+    )
 
 
 @api_view(["GET"])
@@ -231,10 +255,9 @@ def admin_active_borrows(request):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
     borrows = Borrow.objects.filter(status=Borrow.Status.ACTIVE).select_related(
-        "item", "borrower", "handler"
+        "item", "item_instance", "borrower", "handler"
     ).order_by("-borrow_date")
-    serializer = BorrowSerializer(borrows, many=True)
-    return Response({"borrows": serializer.data})
+    return _borrow_list_response(request, borrows, ("-borrow_date", "-id"))
 
 
 @api_view(["GET"])
@@ -247,14 +270,14 @@ def admin_archived_borrows(request):
     status_filter = request.query_params.get("status")
     
     borrows = Borrow.objects.exclude(status=Borrow.Status.ACTIVE).select_related(
-        "item", "borrower", "handler"
+        "item", "item_instance", "borrower", "handler"
     ).order_by("-return_date", "-due_date")
     
     if status_filter:
         borrows = borrows.filter(status=status_filter)
     
-    serializer = BorrowSerializer(borrows, many=True)
-    return Response({"borrows": serializer.data})
+    # Paged requests walk (borrow_date, id) since return_date is nullable
+    return _borrow_list_response(request, borrows, ("-borrow_date", "-id"))
 
 
 
@@ -269,8 +292,37 @@ def admin_all_borrows(request):
         "item", "item_instance", "borrower", "handler"
     ).order_by("-borrow_date")
     
-    serializer = BorrowSerializer(borrows, many=True)
-    return Response({"borrows": serializer.data})
+    return _borrow_list_response(request, borrows, ("-borrow_date", "-id"))
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_export_borrows(request):
+    """Stream borrow or borrow log history as CSV/NDJSON for audits"""
+    if not _is_admin_user(request.user):
+        return Response({"detail": "Admin access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    dataset = params.get("dataset", "borrows")
+    output = params.get("output", "csv")
+    try:
+        lines = borrow_export.stream_export(
+            dataset,
+            output,
+            start=params.get("start"),
+            end=params.get("end"),
+            statuses=borrow_export.parse_statuses(params.get("status")),
+        )
+    except borrow_export.ExportError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if isinstance(request._request, ASGIRequest):
+        lines = borrow_export.aiter_lines(lines)
+    response = StreamingHttpResponse(lines, content_type=borrow_export.FORMATS[output])
+    response["Content-Disposition"] = f'attachment; filename="{dataset}.{output}"'
+    return response
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def admin_borrow_detail(request, borrow_id):
@@ -298,50 +350,14 @@ def admin_reports_analytics(request):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    from django.utils import timezone
-    from datetime import timedelta
-    from django.db.models import Count, Q
-
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-    year_ago = now - timedelta(days=365)
-
-    # Most borrowed items by period
-    week_items = (
-        Borrow.objects.filter(borrow_date__gte=week_ago)
-        .values("item__name", "item__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
+    from .services import borrow_rollup
 
-    month_items = (
-        Borrow.objects.filter(borrow_date__gte=month_ago)
-        .values("item__name", "item__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
-
-    year_items = (
-        Borrow.objects.filter(borrow_date__gte=year_ago)
-        .values("item__name", "item__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
-
-    # Users with most borrows
-    top_borrowers = (
-        Borrow.objects.values("borrower__username", "borrower__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
+    # Most borrowed items by period and users with most borrows, from the daily rollup
+    top_items = borrow_rollup.window_top_items()
+    top_borrowers = borrow_rollup.top_borrowers()
 
     # Borrow statistics
-    total_borrows = Borrow.objects.count()
-    active_borrows = Borrow.objects.filter(status=Borrow.Status.ACTIVE).count()
-    returned_borrows = Borrow.objects.filter(status=Borrow.Status.RETURNED).count()
-    late_borrows = Borrow.objects.filter(status=Borrow.Status.LATE).count()
-    not_returned_borrows = Borrow.objects.filter(status=Borrow.Status.NOT_RETURNED).count()
+    counts = borrow_counters.status_counts()
 
     # Item availability
     items = Item.objects.all()
@@ -359,17 +375,9 @@ def admin_reports_analytics(request):
     ]
 
     return Response({
-        "week_items": list(week_items),
-        "month_items": list(month_items),
-        "year_items": list(year_items),
-        "top_borrowers": list(top_borrowers),
-        "stats": {
-            "total_borrows": total_borrows,
-            "active_borrows": active_borrows,
-            "returned_borrows": returned_borrows,
-            "late_borrows": late_borrows,
-            "not_returned_borrows": not_returned_borrows,
-        },
+        **top_items,
+        "top_borrowers": top_borrowers,
+        "stats": select_counts(counts),
         "items": low_stock_items,
     })
 
@@ -473,49 +481,9 @@ def admin_ai_recommendations(request):
 
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def admin_ai_inventory_analysis(request):
-    """Get AI-powered inventory analysis"""
-    if not _is_handler_or_admin(request.user):
-        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
-
-    # Check if AI is available
-    if not ai_service.is_ai_available():
-        return Response({
-            "ai_available": False,
-            "message": "AI service not configured. Please set HUGGINGFACE_API_KEY environment variable.",
-        })
-
-    # Get analytics data
-    from django.utils import timezone
-    from datetime import timedelta
-
-    now = timezone.now()
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-    year_ago = now - timedelta(days=365)
-
-    week_items = (
-        Borrow.objects.filter(borrow_date__gte=week_ago)
-        .values("item__name", "item__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
-
-    month_items = (
-        Borrow.objects.filter(borrow_date__gte=month_ago)
-        .values("item__name", "item__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
-
-    year_items = (
-        Borrow.objects.filter(borrow_date__gte=year_ago)
-        .values("item__name", "item__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
+def _inventory_analytics_data():
+    """Top borrowed items per period plus per-item utilization for the AI prompt"""
+    from .services import borrow_rollup
 
     items = Item.objects.all()
     items_data = [
@@ -531,15 +499,66 @@ def admin_ai_inventory_analysis(request):
         for item in items
     ]
 
-    analytics_data = {
-        "week_items": list(week_items),
-        "month_items": list(month_items),
-        "year_items": list(year_items),
+    return {
+        **borrow_rollup.window_top_items(),
         "items": items_data,
     }
 
+
+def _borrow_analytics_data():
+    """Status counters and top borrowers for the AI prompt"""
+    from .services import borrow_rollup
+
+    counts = borrow_counters.status_counts()
+
+    return {
+        "stats": select_counts(counts),
+        "top_borrowers": borrow_rollup.top_borrowers(),
+    }
+
+
+def _wants_async(request):
+    """AI endpoints queue a background job instead of blocking when ?mode=async"""
+    return request.query_params.get("mode") == "async"
+
+
+def _wants_refresh(request):
+    """?refresh=1 bypasses the AI response cache and stores a fresh answer"""
+    return request.query_params.get("refresh", "").lower() in ("1", "true")
+
+
+def _enqueue_analysis(request, kind, payload):
+    job = ai_jobs.enqueue(kind, payload, user=request.user, refresh=_wants_refresh(request))
+    return Response({
+        "ai_available": True,
+        "job_id": job.id,
+        "status": job.status,
+        "poll_url": f"/api/admin/ai/jobs/{job.id}/",
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_ai_inventory_analysis(request):
+    """Get AI-powered inventory analysis (?mode=async queues a background job)"""
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    # Check if AI is available
+    if not ai_service.is_ai_available():
+        return Response({
+            "ai_available": False,
+            "message": "AI service not configured. Please set HUGGINGFACE_API_KEY environment variable.",
+        })
+
+    # Get analytics data
+    analytics_data = _inventory_analytics_data()
+
+    if _wants_async(request):
+        return _enqueue_analysis(request, AnalysisJob.Kind.INVENTORY, analytics_data)
+
     # Get AI analysis
-    ai_analysis = ai_service.analyze_inventory(analytics_data)
+    ai_analysis = ai_service.analyze_inventory(analytics_data, refresh=_wants_refresh(request))
 
     return Response({
         "ai_available": True,
@@ -551,7 +570,7 @@ def admin_ai_inventory_analysis(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def admin_ai_borrow_analysis(request):
-    """Get AI-powered borrow pattern analysis"""
+    """Get AI-powered borrow pattern analysis (?mode=async queues a background job)"""
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -562,31 +581,13 @@ def admin_ai_borrow_analysis(request):
         })
 
     # Get borrow data
-    total_borrows = Borrow.objects.count()
-    active_borrows = Borrow.objects.filter(status=Borrow.Status.ACTIVE).count()
-    returned_borrows = Borrow.objects.filter(status=Borrow.Status.RETURNED).count()
-    late_borrows = Borrow.objects.filter(status=Borrow.Status.LATE).count()
-    not_returned_borrows = Borrow.objects.filter(status=Borrow.Status.NOT_RETURNED).count()
-
-    top_borrowers = (
-        Borrow.objects.values("borrower__username", "borrower__id")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
+    borrow_data = _borrow_analytics_data()
 
-    borrow_data = {
-        "stats": {
-            "total_borrows": total_borrows,
-            "active_borrows": active_borrows,
-            "returned_borrows": returned_borrows,
-            "late_borrows": late_borrows,
-            "not_returned_borrows": not_returned_borrows,
-        },
-        "top_borrowers": list(top_borrowers),
-    }
+    if _wants_async(request):
+        return _enqueue_analysis(request, AnalysisJob.Kind.BORROW_PATTERNS, borrow_data)
 
     # Get AI analysis
-    ai_analysis = ai_service.analyze_borrow_patterns(borrow_data)
+    ai_analysis = ai_service.analyze_borrow_patterns(borrow_data, refresh=_wants_refresh(request))
 
     return Response({
         "ai_available": True,
@@ -598,7 +599,7 @@ def admin_ai_borrow_analysis(request):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def admin_ai_custom_analysis(request):
-    """Get custom AI analysis for any data"""
+    """Get custom AI analysis for any data (?mode=async queues a background job)"""
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -616,7 +617,12 @@ def admin_ai_custom_analysis(request):
             "error": "analysis_type is required"
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    ai_analysis = ai_service.generate_custom_analysis(analysis_type, data)
+    if _wants_async(request):
+        return _enqueue_analysis(
+            request, AnalysisJob.Kind.CUSTOM, {"analysis_type": analysis_type, "data": data}
+        )
+
+    ai_analysis = ai_service.generate_custom_analysis(analysis_type, data, refresh=_wants_refresh(request))
 
     return Response({
         "ai_available": True,
@@ -625,6 +631,39 @@ def admin_ai_custom_analysis(request):
     })
 
 
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAuthenticated])
+def admin_ai_cache(request):
+    """GET: AI response cache metrics and provider circuit state. DELETE: drop every cached analysis."""
+    if not _is_admin_user(request.user):
+        return Response({"detail": "Admin access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    if request.method == "DELETE":
+        ai_service.clear_cache()
+        stats = ai_service.cache_stats()
+        message = "AI response cache cleared" if stats["shared"] else (
+            "AI response cache cleared on this worker only (AI_CACHE_BACKEND=local)"
+        )
+        return Response({"message": message, "cache": stats})
+
+    return Response({"cache": ai_service.cache_stats(), "providers": ai_service.provider_health()})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_ai_job_status(request, job_id):
+    """Poll a queued AI analysis job; ``result`` holds the analysis once it has succeeded"""
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        job = AnalysisJob.objects.get(id=job_id)
+    except AnalysisJob.DoesNotExist:
+        return Response({"detail": "Analysis job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(ai_jobs.serialize_job(job))
+
+
 # ============================================
 # INVENTORY MANAGEMENT ENDPOINTS
 # ============================================
@@ -636,84 +675,79 @@ def admin_categories(request):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    from .models import Category
-    
-    categories = Category.objects.all()
-    categories_data = []
-    
-    for category in categories:
-        items = Item.objects.filter(category=category)
-        total_instances = sum(item.instances.count() for item in items)
-        available_instances = sum(
-            item.instances.filter(status='AVAILABLE').count() 
-            for item in items
-        )
-        
-        categories_data.append({
-            "id": category.id,
-            "name": category.name,
-            "display_name": category.get_name_display(),
-            "description": category.description,
-            "item_count": items.count(),
-            "total_instances": total_instances,
-            "available_instances": available_instances,
-        })
-    
-    return Response({"categories": categories_data})
+    from .services.inventory_stats import category_summaries
+
+    return _conditional_response(
+        request, (data_version.CATALOG,), lambda: Response({"categories": category_summaries()})
+    )
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def admin_category_items(request, category_id):
-    """Get all items in a category with their instances"""
+    """Get all items in a category with their instances.
+
+    ?summary=1 returns per-status counts only; instances can then be paged
+    per item through admin/items/<item_id>/instances/.
+    """
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    from .models import Category, ItemInstance
+    from .models import Category
+    from .services.inventory_stats import category_item_rows
     
     try:
         category = Category.objects.get(id=category_id)
     except Category.DoesNotExist:
         return Response({"detail": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
     
-    items = Item.objects.filter(category=category)
-    items_data = []
-    
-    for item in items:
-        instances = ItemInstance.objects.filter(item=item)
-        instances_data = []
-        
-        for instance in instances:
-            instances_data.append({
-                "id": instance.id,
-                "reference_id": instance.reference_id,
-                "status": instance.status,
-                "status_display": instance.get_status_display(),
-                "notes": instance.notes,
-                "created_at": instance.created_at,
-                "updated_at": instance.updated_at,
-            })
-        
-        items_data.append({
-            "id": item.id,
-            "name": item.name,
-            "description": item.description,
-            "total_quantity": instances.count(),
-            "available_count": instances.filter(status='AVAILABLE').count(),
-            "in_use_count": instances.filter(status='IN_USE').count(),
-            "faulty_count": instances.filter(status='FAULTY').count(),
-            "in_repair_count": instances.filter(status='IN_REPAIR').count(),
-            "out_of_stock_count": instances.filter(status='OUT_OF_STOCK').count(),
-            "instances": instances_data,
-        })
-    
+    summary = request.query_params.get("summary", "").lower() in ("1", "true")
     return Response({
         "category": {
             "id": category.id,
             "name": category.name,
             "display_name": category.get_name_display(),
         },
-        "items": items_data
+        "items": category_item_rows(category, include_instances=not summary)
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_item_instances(request, item_id):
+    """Keyset-paginated instances of one item, filtered by ?status= and ?reference_id= prefix"""
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    from .services.inventory_stats import serialize_instance
+
+    try:
+        item = Item.objects.get(id=item_id)
+    except Item.DoesNotExist:
+        return Response({"detail": "Item not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    instances = ItemInstance.objects.filter(item=item)
+
+    status_filter = request.query_params.get("status")
+    if status_filter:
+        if status_filter not in ItemInstance.ItemStatus.values:
+            return Response({"detail": "Invalid status."}, status=status.HTTP_400_BAD_REQUEST)
+        instances = instances.filter(status=status_filter)
+
+    reference_prefix = request.query_params.get("reference_id", "").strip()
+    if reference_prefix:
+        instances = instances.filter(reference_id__startswith=reference_prefix)
+
+    paginator = KeysetPaginator(("reference_id",))
+    try:
+        page, next_cursor = paginator.paginate(instances, request)
+    except InvalidCursor as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "item": {"id": item.id, "name": item.name},
+        "instances": [serialize_instance(instance) for instance in page],
+        "next_cursor": next_cursor,
     })
 
 
@@ -741,18 +775,14 @@ def admin_add_item_instance(request, item_id):
     if ItemInstance.objects.filter(reference_id=reference_id).exists():
         return Response({"detail": "Reference ID already exists."}, status=status.HTTP_400_BAD_REQUEST)
     
-    instance = ItemInstance.objects.create(
-        item=item,
+    # Creates the instance and bumps item quantity/available in one transaction
+    instance = inventory_state.create_instance(
+        item,
         reference_id=reference_id,
         status='AVAILABLE',
         notes=notes
     )
     
-    # Update item quantity
-    item.quantity = item.instances.count()
-    item.available = item.instances.filter(status='AVAILABLE').count()
-    item.save()
-    
     return Response({
         "id": instance.id,
         "reference_id": instance.reference_id,
@@ -762,6 +792,42 @@ def admin_add_item_instance(request, item_id):
     }, status=status.HTTP_201_CREATED)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def admin_import_item_instances(request):
+    """Register many item instances at once.
+
+    Accepts a CSV/JSON upload in ``file`` (columns item, reference_id, status,
+    notes) or a JSON body ``{"instances": [...]}``. Invalid rows are reported
+    in ``errors`` and skipped; ?dry_run=1 only validates.
+    """
+    if not _is_admin_user(request.user):
+        return Response({"detail": "Admin access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    from .services import instance_import
+
+    upload = request.FILES.get("file")
+    try:
+        if upload is not None:
+            fmt = request.data.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+            rows = instance_import.parse_rows(upload.read().decode("utf-8-sig"), fmt)
+        else:
+            rows = request.data.get("instances") if isinstance(request.data, dict) else None
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise instance_import.InstanceImportError("Provide a file upload or an 'instances' list.")
+        if len(rows) > instance_import.MAX_ROWS:
+            raise instance_import.InstanceImportError(f"At most {instance_import.MAX_ROWS} rows per import.")
+    except UnicodeDecodeError:
+        return Response({"detail": "File must be UTF-8 encoded."}, status=status.HTTP_400_BAD_REQUEST)
+    except instance_import.InstanceImportError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true")
+    result = instance_import.import_instances(rows, dry_run=dry_run)
+    result["dry_run"] = dry_run
+    return Response(result, status=status.HTTP_201_CREATED if result["created"] and not dry_run else status.HTTP_200_OK)
+
+
 @api_view(["PATCH"])
 @permission_classes([IsAuthenticated])
 def admin_update_item_instance(request, instance_id):
@@ -776,21 +842,15 @@ def admin_update_item_instance(request, instance_id):
     except ItemInstance.DoesNotExist:
         return Response({"detail": "Item instance not found."}, status=status.HTTP_404_NOT_FOUND)
     
-    # Update status if provided
-    new_status = request.data.get("status")
-    if new_status and new_status in dict(ItemInstance.ItemStatus.choices):
-        instance.status = new_status
-    
     # Update notes if provided
     if "notes" in request.data:
         instance.notes = request.data.get("notes", "")
     
-    instance.save()
-    
-    # Update parent item availability count
-    item = instance.item
-    item.available = item.instances.filter(status='AVAILABLE').count()
-    item.save()
+    # Update status if provided; parent item availability moves with it
+    new_status = request.data.get("status")
+    if not (new_status and new_status in dict(ItemInstance.ItemStatus.choices)):
+        new_status = instance.status
+    inventory_state.set_status(instance, new_status)
     
     return Response({
         "id": instance.id,
@@ -823,13 +883,8 @@ def admin_delete_item_instance(request, instance_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    item = instance.item
-    instance.delete()
-    
-    # Update parent item counts
-    item.quantity = item.instances.count()
-    item.available = item.instances.filter(status='AVAILABLE').count()
-    item.save()
+    # Deletes the instance and decrements parent item counts
+    inventory_state.delete_instance(instance)
     
     return Response({"message": "Item instance deleted successfully"})
 
@@ -880,11 +935,28 @@ def pending_borrow_requests(request):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
     pending_borrows = Borrow.objects.filter(status=Borrow.Status.PENDING).select_related(
-        "item", "borrower", "item_instance"
+        "item", "borrower", "item_instance", "handler"
     ).order_by("-created_at")
     
-    serializer = BorrowSerializer(pending_borrows, many=True)
-    return Response({"requests": serializer.data})
+    return _borrow_list_response(request, pending_borrows, ("-created_at", "-id"), key="requests")
+
+
+def _lock_pending_borrow(borrow_id):
+    """Lock a borrow for a decision; returns ``(borrow, None)`` or ``(None, error response)``.
+
+    Must run inside ``transaction.atomic``. The status is re-read under the
+    lock, so a request decided concurrently gets 409 instead of a second
+    transition.
+    """
+    borrow = Borrow.objects.select_for_update().filter(id=borrow_id).first()
+    if borrow is None:
+        return None, Response({"detail": "Borrow request not found."}, status=status.HTTP_404_NOT_FOUND)
+    if borrow.status != Borrow.Status.PENDING:
+        return None, Response(
+            {"detail": f"Borrow request already processed (status: {borrow.status})."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    return borrow, None
 
 
 @api_view(["POST"])
@@ -894,24 +966,27 @@ def approve_borrow_request(request, borrow_id):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    try:
-        borrow = Borrow.objects.get(id=borrow_id, status=Borrow.Status.PENDING)
-    except Borrow.DoesNotExist:
-        return Response({"detail": "Borrow request not found or already processed."}, status=status.HTTP_404_NOT_FOUND)
-
-    # Update status to ACTIVE and assign handler
-    borrow.status = Borrow.Status.ACTIVE
-    borrow.handler = request.user
-    borrow.save()
-
-    # Create log entry
-    BorrowLog.objects.create(
-        borrow=borrow,
-        action=BorrowLog.ActionType.APPROVED,
-        performed_by=request.user,
-        description=f"Borrow request approved by {request.user.username}",
-        metadata={"approved_at": borrow.updated_at.isoformat()}
-    )
+    with transaction.atomic():
+        # Lock the row so a concurrent approve/reject (or batch) cannot decide it twice
+        borrow, error = _lock_pending_borrow(borrow_id)
+        if error is not None:
+            return error
+
+        # Update status to ACTIVE and assign handler
+        borrow.status = Borrow.Status.ACTIVE
+        borrow.handler = request.user
+        borrow.save()
+        borrow_counters.record_transition(Borrow.Status.PENDING, Borrow.Status.ACTIVE)
+
+        # Create log entry
+        BorrowLog.objects.create(
+            borrow=borrow,
+            action=BorrowLog.ActionType.APPROVED,
+            performed_by=request.user,
+            description=f"Borrow request approved by {request.user.username}",
+            metadata={"approved_at": borrow.updated_at.isoformat()}
+        )
+        notifications.notify_for_borrows([borrow.id], notifications.Kind.APPROVED)
 
     return Response({
         "message": "Borrow request approved successfully",
@@ -926,27 +1001,32 @@ def reject_borrow_request(request, borrow_id):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    try:
-        borrow = Borrow.objects.get(id=borrow_id, status=Borrow.Status.PENDING)
-    except Borrow.DoesNotExist:
-        return Response({"detail": "Borrow request not found or already processed."}, status=status.HTTP_404_NOT_FOUND)
-
     reason = request.data.get("reason", "No reason provided")
 
-    # Update status to REJECTED
-    borrow.status = Borrow.Status.REJECTED
-    borrow.handler = request.user
-    borrow.notes = f"Rejected: {reason}"
-    borrow.save()
-
-    # Create log entry
-    BorrowLog.objects.create(
-        borrow=borrow,
-        action=BorrowLog.ActionType.REJECTED,
-        performed_by=request.user,
-        description=f"Borrow request rejected by {request.user.username}",
-        metadata={"reason": reason, "rejected_at": borrow.updated_at.isoformat()}
-    )
+    with transaction.atomic():
+        borrow, error = _lock_pending_borrow(borrow_id)
+        if error is not None:
+            return error
+
+        # Update status to REJECTED
+        borrow.status = Borrow.Status.REJECTED
+        borrow.handler = request.user
+        borrow.notes = f"Rejected: {reason}"
+        borrow.save()
+
+        # Free the unit reserved for this request, then move the counters
+        inventory_state.release_instance(borrow.item_instance_id, exclude_borrow_id=borrow.id)
+        borrow_counters.record_transition(Borrow.Status.PENDING, Borrow.Status.REJECTED)
+
+        # Create log entry
+        BorrowLog.objects.create(
+            borrow=borrow,
+            action=BorrowLog.ActionType.REJECTED,
+            performed_by=request.user,
+            description=f"Borrow request rejected by {request.user.username}",
+            metadata={"reason": reason, "rejected_at": borrow.updated_at.isoformat()}
+        )
+        notifications.notify_for_borrows([borrow.id], notifications.Kind.REJECTED, notes=borrow.notes)
 
     return Response({
         "message": "Borrow request rejected successfully",
@@ -954,6 +1034,65 @@ def reject_borrow_request(request, borrow_id):
     })
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def batch_decide_borrow_requests(request):
+    """Approve or reject many pending borrow requests in one transaction.
+
+    Body: ``{"borrow_ids": [...], "decision": "approve" | "reject", "reason": "..."}``.
+    Returns one outcome per ID; IDs that are missing or no longer pending are
+    reported rather than failing the batch.
+    """
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    from .services import borrow_batch
+
+    decision = str(request.data.get("decision", "")).lower()
+    reason = request.data.get("reason") or "No reason provided"
+    try:
+        borrow_ids = borrow_batch.parse_borrow_ids(request.data.get("borrow_ids"))
+        results = borrow_batch.decide(borrow_ids, decision, request.user, reason=reason)
+    except borrow_batch.BatchDecisionError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    processed = sum(1 for result in results if result["outcome"] in ("approved", "rejected"))
+    return Response({
+        "message": f"{processed} of {len(results)} borrow request(s) processed",
+        "decision": decision,
+        "processed": processed,
+        "results": results,
+    })
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def process_borrow_returns(request):
+    """Return a batch of scanned units in one transaction.
+
+    Body: ``{"reference_ids": [...], "notes": "..."}``. Each scanned unit's
+    open (ACTIVE or LATE) borrow is marked RETURNED and the unit made
+    available again; units without an open borrow are reported per ID.
+    """
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    from .services import borrow_returns
+
+    try:
+        reference_ids = borrow_returns.parse_reference_ids(request.data.get("reference_ids"))
+    except borrow_returns.ReturnError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    results = borrow_returns.process_returns(reference_ids, request.user, notes=request.data.get("notes", ""))
+    returned = sum(1 for result in results if result["outcome"] == "returned")
+    return Response({
+        "message": f"{returned} of {len(results)} item(s) returned",
+        "returned": returned,
+        "results": results,
+    })
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def create_borrow_request(request):
@@ -976,37 +1115,31 @@ def create_borrow_request(request):
     except Item.DoesNotExist:
         return Response({"detail": "Item not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    # Check if item has available instances
-    available_instance = ItemInstance.objects.filter(
-        item=item,
-        status=ItemInstance.ItemStatus.AVAILABLE
-    ).first()
+    with transaction.atomic():
+        # Lock and reserve a free instance; concurrent requests skip locked rows
+        available_instance = inventory_state.reserve_available(item.id)
+        if not available_instance:
+            return Response({"detail": "No available instances for this item."}, status=status.HTTP_400_BAD_REQUEST)
 
-    if not available_instance:
-        return Response({"detail": "No available instances for this item."}, status=status.HTTP_400_BAD_REQUEST)
-
-    # Create borrow request with PENDING status
-    borrow = Borrow.objects.create(
-        item=item,
-        item_instance=available_instance,
-        borrower=user,
-        due_date=due_date,
-        status=Borrow.Status.PENDING,
-        notes=notes
-    )
+        # Create borrow request with PENDING status
+        borrow = Borrow.objects.create(
+            item=item,
+            item_instance=available_instance,
+            borrower=user,
+            due_date=due_date,
+            status=Borrow.Status.PENDING,
+            notes=notes
+        )
+        borrow_counters.record_transition(None, Borrow.Status.PENDING)
 
-    # Update instance status to IN_USE (reserved)
-    available_instance.status = ItemInstance.ItemStatus.IN_USE
-    available_instance.save()
-
-    # Create log entry
-    BorrowLog.objects.create(
-        borrow=borrow,
-        action=BorrowLog.ActionType.CREATED,
-        performed_by=user,
-        description=f"Borrow request created by {user.username}",
-        metadata={"requested_at": borrow.created_at.isoformat()}
-    )
+        # Create log entry
+        BorrowLog.objects.create(
+            borrow=borrow,
+            action=BorrowLog.ActionType.CREATED,
+            performed_by=user,
+            description=f"Borrow request created by {user.username}",
+            metadata={"requested_at": borrow.created_at.isoformat()}
+        )
 
     return Response({
         "message": "Borrow request created successfully. Waiting for approval.",
@@ -1022,21 +1155,38 @@ def scan_item_barcode(request, barcode):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    try:
-        from .models import ItemInstance
-        instance = ItemInstance.objects.select_related('item', 'item__category').get(reference_id=barcode)
-        
-        return Response({
-            "id": instance.id,
-            "reference_id": instance.reference_id,
-            "item_name": instance.item.name,
-            "item_id": instance.item.id,
-            "category": instance.item.category.get_name_display() if instance.item.category else "N/A",
-            "status": instance.status,
-            "notes": instance.notes,
-        })
-    except ItemInstance.DoesNotExist:
+    from .services.reference_index import index
+
+    matches, _ = index.lookup([barcode])
+    if not matches:
         return Response({"detail": "Item not found with this barcode."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(matches[0])
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def scan_item_barcodes(request):
+    """Resolve a tray of scanned barcodes in one request.
+
+    Body: ``{"barcodes": [...]}``. Returns the matching instances in scan
+    order and the barcodes that matched nothing in ``missing``.
+    """
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    from .services.reference_index import MAX_BATCH_SIZE, index
+
+    barcodes = request.data.get("barcodes")
+    if not isinstance(barcodes, list) or not barcodes:
+        return Response({"detail": "barcodes must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(barcodes) > MAX_BATCH_SIZE:
+        return Response(
+            {"detail": f"At most {MAX_BATCH_SIZE} barcodes per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    matches, missing = index.lookup(dict.fromkeys(str(barcode).strip() for barcode in barcodes))
+    return Response({"items": matches, "missing": missing})
 
 
 @api_view(["GET"])
@@ -1046,23 +1196,23 @@ def scan_user_rfid(request, rfid):
     if not _is_handler_or_admin(request.user):
         return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    try:
-        # For now, we'll use username as RFID. In production, add an rfid field to UserProfile
-        user = User.objects.get(username=rfid)
-        
-        if not hasattr(user, 'profile') or not user.profile.is_approved:
-            return Response({"detail": "User not approved."}, status=status.HTTP_403_FORBIDDEN)
-        
-        return Response({
-            "id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "role": user.profile.role,
-            "is_approved": user.profile.is_approved,
-        })
-    except User.DoesNotExist:
+    from .services import rfid as rfid_cards
+
+    user = rfid_cards.resolve(rfid)
+    if user is None:
         return Response({"detail": "User not found with this RFID."}, status=status.HTTP_404_NOT_FOUND)
 
+    if not hasattr(user, 'profile') or not user.profile.is_approved:
+        return Response({"detail": "User not approved."}, status=status.HTTP_403_FORBIDDEN)
+
+    return Response({
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "role": user.profile.role,
+        "is_approved": user.profile.is_approved,
+    })
+
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -1087,39 +1237,38 @@ def process_walkin_borrow(request):
         instance = ItemInstance.objects.select_related('item').get(id=item_instance_id)
         borrower = User.objects.get(id=borrower_id)
 
-        # Check if instance is available
-        if instance.status != ItemInstance.ItemStatus.AVAILABLE:
-            return Response(
-                {"detail": f"Item instance is not available. Current status: {instance.status}"},
-                status=status.HTTP_400_BAD_REQUEST
+        with transaction.atomic():
+            # Check and reserve the scanned instance under a row lock
+            if not inventory_state.reserve_instance(instance):
+                instance.refresh_from_db(fields=["status"])
+                return Response(
+                    {"detail": f"Item instance is not available. Current status: {instance.status}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Create borrow with ACTIVE status (walk-in is immediate)
+            borrow = Borrow.objects.create(
+                item=instance.item,
+                item_instance=instance,
+                borrower=borrower,
+                handler=request.user,
+                due_date=due_date,
+                status=Borrow.Status.ACTIVE,  # Walk-in is immediately active
+                notes=notes
+            )
+            borrow_counters.record_transition(None, Borrow.Status.ACTIVE)
+
+            # Create log entry
+            BorrowLog.objects.create(
+                borrow=borrow,
+                action=BorrowLog.ActionType.CREATED,
+                performed_by=request.user,
+                description=f"Walk-in borrow processed by {request.user.username}",
+                metadata={
+                    "borrow_type": "walk-in",
+                    "processed_at": borrow.created_at.isoformat()
+                }
             )
-
-        # Create borrow with ACTIVE status (walk-in is immediate)
-        borrow = Borrow.objects.create(
-            item=instance.item,
-            item_instance=instance,
-            borrower=borrower,
-            handler=request.user,
-            due_date=due_date,
-            status=Borrow.Status.ACTIVE,  # Walk-in is immediately active
-            notes=notes
-        )
-
-        # Update instance status
-        instance.status = ItemInstance.ItemStatus.IN_USE
-        instance.save()
-
-        # Create log entry
-        BorrowLog.objects.create(
-            borrow=borrow,
-            action=BorrowLog.ActionType.CREATED,
-            performed_by=request.user,
-            description=f"Walk-in borrow processed by {request.user.username}",
-            metadata={
-                "borrow_type": "walk-in",
-                "processed_at": borrow.created_at.isoformat()
-            }
-        )
 
         return Response({
             "message": "Walk-in borrow processed successfully",
@@ -1134,6 +1283,43 @@ def process_walkin_borrow(request):
         return Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def process_walkin_checkout(request):
+    """Check out a scanned cart of item instances to one borrower in one transaction.
+
+    Body: ``{"item_instance_ids": [...], "borrower_id": ..., "due_date": ..., "notes": ...}``.
+    Either every instance is borrowed or none is; unavailable instances are
+    listed in ``unavailable``.
+    """
+    if not _is_handler_or_admin(request.user):
+        return Response({"detail": "Admin or Handler access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    from .services import walkin_checkout
+
+    borrower_id = request.data.get("borrower_id")
+    notes = request.data.get("notes") or "Walk-in borrow"
+    if not borrower_id:
+        return Response({"detail": "borrower_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        instance_ids = walkin_checkout.parse_instance_ids(request.data.get("item_instance_ids"))
+        due_date = walkin_checkout.parse_due_date(request.data.get("due_date"))
+        borrows = walkin_checkout.checkout(instance_ids, borrower_id, request.user, due_date, notes=notes)
+    except walkin_checkout.InstancesUnavailable as exc:
+        return Response(
+            {"detail": str(exc), "unavailable": exc.instance_ids},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except walkin_checkout.CheckoutError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        "message": f"Walk-in checkout processed: {len(borrows)} item(s)",
+        "borrows": BorrowSerializer(borrows, many=True).data,
+    }, status=status.HTTP_201_CREATED)
+
+
 # ============================================================================
 # BORROWER ENDPOINTS (Students & Personnel)
 # ============================================================================
@@ -1155,34 +1341,16 @@ def borrower_stats(request):
 
     user = request.user
     
-    # Get active borrows
-    active_borrows = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.ACTIVE
-    ).count()
-    
-    # Get pending requests
-    pending_requests = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.PENDING
-    ).count()
-    
-    # Get overdue items
-    from django.utils import timezone
-    overdue_items = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.ACTIVE,
-        due_date__lt=timezone.now()
-    ).count()
-    
-    # Get total borrowed (all time)
-    total_borrowed = Borrow.objects.filter(borrower=user).count()
+    # Active, pending, overdue and all-time totals in one query
+    counts = borrow_status_counts(Borrow.objects.filter(borrower=user))
     
     return Response({
-        "active_borrows": active_borrows,
-        "pending_requests": pending_requests,
-        "overdue_items": overdue_items,
-        "total_borrowed": total_borrowed
+        # Overdue (LATE) items are still out with the borrower
+        "active_borrows": counts["active_borrows"] + counts["late_borrows"],
+        "pending_requests": counts["pending_borrows"],
+        # LATE plus ACTIVE borrows past due that the sweep has not marked yet
+        "overdue_items": counts["late_borrows"] + counts["overdue_borrows"],
+        "total_borrowed": counts["total_borrows"]
     })
 
 
@@ -1204,7 +1372,7 @@ def borrower_my_borrows(request):
     
     # Apply status filter
     if status_filter == 'active':
-        borrows_query = borrows_query.filter(status=Borrow.Status.ACTIVE)
+        borrows_query = borrows_query.filter(status__in=[Borrow.Status.ACTIVE, Borrow.Status.LATE])
     elif status_filter == 'pending':
         borrows_query = borrows_query.filter(status=Borrow.Status.PENDING)
     elif status_filter == 'history':
@@ -1241,30 +1409,25 @@ def borrower_categories(request):
     if not _is_borrower(request.user):
         return Response({"detail": "Borrower access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    categories = Category.objects.all()
-    
-    categories_data = []
-    for category in categories:
-        # Count available instances in this category
-        available_count = ItemInstance.objects.filter(
-            item__category=category,
-            status=ItemInstance.ItemStatus.AVAILABLE
-        ).count()
-        
-        # Count total instances
-        total_instances = ItemInstance.objects.filter(
-            item__category=category
-        ).count()
-        
-        categories_data.append({
-            "id": category.id,
-            "name": category.name,
-            "display_name": category.get_name_display(),
-            "available_count": available_count,
-            "total_instances": total_instances
-        })
-    
-    return Response({"categories": categories_data})
+    def build():
+        totals = {}
+        for entry in instance_status_counts().values():
+            available, total = totals.get(entry["category_id"], (0, 0))
+            totals[entry["category_id"]] = (available + entry["available_count"], total + entry["total_quantity"])
+
+        categories_data = []
+        for category in Category.objects.all():
+            available_count, total_instances = totals.get(category.id, (0, 0))
+            categories_data.append({
+                "id": category.id,
+                "name": category.name,
+                "display_name": category.get_name_display(),
+                "available_count": available_count,
+                "total_instances": total_instances
+            })
+        return Response({"categories": categories_data})
+
+    return _conditional_response(request, (data_version.CATALOG,), build)
 
 
 @api_view(["GET"])
@@ -1274,31 +1437,28 @@ def borrower_category_items(request, category_id):
     if not _is_borrower(request.user):
         return Response({"detail": "Borrower access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    try:
-        category = Category.objects.get(id=category_id)
-    except Category.DoesNotExist:
-        return Response({"detail": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
-    
-    items = Item.objects.filter(category=category)
-    
-    items_data = []
-    for item in items:
-        # Count instances by status
-        available_count = item.instances.filter(status=ItemInstance.ItemStatus.AVAILABLE).count()
-        in_use_count = item.instances.filter(status=ItemInstance.ItemStatus.IN_USE).count()
-        faulty_count = item.instances.filter(status=ItemInstance.ItemStatus.FAULTY).count()
-        
-        items_data.append({
-            "id": item.id,
-            "name": item.name,
-            "description": item.description or "",
-            "available_count": available_count,
-            "in_use_count": in_use_count,
-            "faulty_count": faulty_count,
-            "total_quantity": item.quantity
-        })
-    
-    return Response({"items": items_data})
+    def build():
+        try:
+            category = Category.objects.get(id=category_id)
+        except Category.DoesNotExist:
+            return Response({"detail": "Category not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        counts = instance_status_counts(category_id=category.id)
+        items_data = []
+        for item in Item.objects.filter(category=category):
+            item_counts = counts.get(item.id, {})
+            items_data.append({
+                "id": item.id,
+                "name": item.name,
+                "description": item.description or "",
+                "available_count": item_counts.get("available_count", 0),
+                "in_use_count": item_counts.get("in_use_count", 0),
+                "faulty_count": item_counts.get("faulty_count", 0),
+                "total_quantity": item.quantity
+            })
+        return Response({"items": items_data})
+
+    return _conditional_response(request, (data_version.CATALOG,), build)
 
 
 @api_view(["POST"])
@@ -1325,12 +1485,6 @@ def borrower_request_borrow(request):
     except Item.DoesNotExist:
         return Response({"detail": "Item not found."}, status=status.HTTP_404_NOT_FOUND)
     
-    # Check if there are available instances
-    available_instance = item.instances.filter(status=ItemInstance.ItemStatus.AVAILABLE).first()
-    
-    if not available_instance:
-        return Response({"detail": "No available instances of this item."}, status=status.HTTP_400_BAD_REQUEST)
-    
     # Check if user already has a pending request for this item
     existing_request = Borrow.objects.filter(
         borrower=user,
@@ -1345,23 +1499,31 @@ def borrower_request_borrow(request):
     from django.utils import timezone
     from datetime import timedelta
     
-    borrow = Borrow.objects.create(
-        borrower=user,
-        item_instance=available_instance,
-        status=Borrow.Status.PENDING,
-        borrow_date=timezone.now(),
-        due_date=timezone.now() + timedelta(days=3),  # Default 3 days
-        notes=notes
-    )
-    
-    # Create log entry
-    BorrowLog.objects.create(
-        borrow=borrow,
-        action=BorrowLog.ActionType.REQUESTED,
-        performed_by=user,
-        description=f"Borrow request submitted by {user.username}",
-        metadata={"item": item.name, "requested_at": borrow.borrow_date.isoformat()}
-    )
+    with transaction.atomic():
+        # Lock and reserve a free instance; concurrent requests skip locked rows
+        available_instance = inventory_state.reserve_available(item.id)
+        if not available_instance:
+            return Response({"detail": "No available instances of this item."}, status=status.HTTP_400_BAD_REQUEST)
+
+        borrow = Borrow.objects.create(
+            item=item,
+            borrower=user,
+            item_instance=available_instance,
+            status=Borrow.Status.PENDING,
+            borrow_date=timezone.now(),
+            due_date=timezone.now() + timedelta(days=3),  # Default 3 days
+            notes=notes
+        )
+        borrow_counters.record_transition(None, Borrow.Status.PENDING)
+        
+        # Create log entry
+        BorrowLog.objects.create(
+            borrow=borrow,
+            action=BorrowLog.ActionType.REQUESTED,
+            performed_by=user,
+            description=f"Borrow request submitted by {user.username}",
+            metadata={"item": item.name, "requested_at": borrow.borrow_date.isoformat()}
+        )
     
     return Response({
         "message": "Borrow request submitted successfully",
@@ -1375,138 +1537,94 @@ def borrower_request_borrow(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def borrower_notifications(request):
-    """Get borrower's notifications"""
+    """Get borrower's notifications, newest first (?unread=1 for unread only)"""
     if not _is_borrower(request.user):
         return Response({"detail": "Borrower access required."}, status=status.HTTP_403_FORBIDDEN)
 
+    from .models import Notification
+
     user = request.user
-    
-    # Get recent borrow status changes (approved/rejected in last 30 days)
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    
-    # Get recently approved borrows (exclude those without item_instance)
-    approved_borrows = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.ACTIVE,
-        updated_at__gte=thirty_days_ago,
-        item_instance__isnull=False
-    ).select_related('item_instance', 'item_instance__item').order_by('-updated_at')[:10]
-    
-    # Get recently rejected borrows (exclude those without item_instance)
-    rejected_borrows = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.REJECTED,
-        updated_at__gte=thirty_days_ago,
-        item_instance__isnull=False
-    ).select_related('item_instance', 'item_instance__item').order_by('-updated_at')[:10]
-    
-    # Get overdue items (exclude those without item_instance)
-    overdue_borrows = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.ACTIVE,
-        due_date__lt=timezone.now(),
-        item_instance__isnull=False
-    ).select_related('item_instance', 'item_instance__item').order_by('due_date')
-    
-    notifications = []
-    
-    # Add approved notifications
-    for borrow in approved_borrows:
-        notifications.append({
-            "id": f"approved_{borrow.id}",
-            "type": "APPROVED",
-            "title": "Request Approved",
-            "message": f"Your request for {borrow.item_instance.item.name} has been approved. Pick it up at the lab.",
-            "item_name": borrow.item_instance.item.name,
-            "reference_id": borrow.item_instance.reference_id,
-            "timestamp": borrow.updated_at,
-            "read": False,
-            "borrow_id": borrow.id
-        })
-    
-    # Add rejected notifications
-    for borrow in rejected_borrows:
-        notifications.append({
-            "id": f"rejected_{borrow.id}",
-            "type": "REJECTED",
-            "title": "Request Rejected",
-            "message": f"Your request for {borrow.item_instance.item.name} was rejected. {borrow.notes}",
-            "item_name": borrow.item_instance.item.name,
-            "timestamp": borrow.updated_at,
-            "read": False,
-            "borrow_id": borrow.id
-        })
-    
-    # Add overdue notifications
-    for borrow in overdue_borrows:
-        days_overdue = (timezone.now() - borrow.due_date).days
-        notifications.append({
-            "id": f"overdue_{borrow.id}",
-            "type": "OVERDUE",
-            "title": "Item Overdue",
-            "message": f"{borrow.item_instance.item.name} ({borrow.item_instance.reference_id}) is {days_overdue} day(s) overdue. Please return it ASAP.",
-            "item_name": borrow.item_instance.item.name,
-            "reference_id": borrow.item_instance.reference_id,
-            "timestamp": borrow.due_date,
-            "read": False,
-            "borrow_id": borrow.id,
-            "days_overdue": days_overdue
-        })
-    
-    # Sort by timestamp (newest first)
-    notifications.sort(key=lambda x: x['timestamp'], reverse=True)
-    
+    inbox = Notification.objects.filter(user=user)
+    if request.query_params.get("unread", "").lower() in ("1", "true"):
+        inbox = inbox.filter(read=False)
+
     return Response({
-        "notifications": notifications,
-        "unread_count": len(notifications)
+        "notifications": [notifications.serialize(n) for n in inbox.order_by("-created_at")[:50]],
+        "unread_count": notifications.unread_counts(user.id)["unread_count"]
     })
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def borrower_notification_count(request):
-    """Get count of unread notifications"""
+    """Get count of unread notifications (cached per user)"""
     if not _is_borrower(request.user):
         return Response({"detail": "Borrower access required."}, status=status.HTTP_403_FORBIDDEN)
 
-    user = request.user
-    
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    
-    # Count recent status changes (exclude those without item_instance)
-    approved_count = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.ACTIVE,
-        updated_at__gte=thirty_days_ago,
-        item_instance__isnull=False
-    ).count()
-    
-    rejected_count = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.REJECTED,
-        updated_at__gte=thirty_days_ago,
-        item_instance__isnull=False
-    ).count()
-    
-    # Count overdue items (exclude those without item_instance)
-    overdue_count = Borrow.objects.filter(
-        borrower=user,
-        status=Borrow.Status.ACTIVE,
-        due_date__lt=timezone.now(),
-        item_instance__isnull=False
-    ).count()
-    
-    total_count = approved_count + rejected_count + overdue_count
-    
+    return Response(notifications.unread_counts(request.user.id))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def borrower_mark_notifications_read(request):
+    """Mark notifications read: ``{"ids": [...]}``, or all of them when ids is omitted"""
+    if not _is_borrower(request.user):
+        return Response({"detail": "Borrower access required."}, status=status.HTTP_403_FORBIDDEN)
+
+    ids = request.data.get("ids")
+    if ids is not None:
+        try:
+            ids = [int(value) for value in ids]
+        except (TypeError, ValueError):
+            return Response({"detail": "ids must be a list of notification IDs."}, status=status.HTTP_400_BAD_REQUEST)
+
+    updated = notifications.mark_read(request.user.id, ids)
     return Response({
-        "unread_count": total_count,
-        "approved": approved_count,
-        "rejected": rejected_count,
-        "overdue": overdue_count
+        "marked_read": updated,
+        **notifications.unread_counts(request.user.id)
     })
+
+
+def _stream_principal(request):
+    """Resolve the borrower for the notification stream.
+
+    EventSource cannot send headers, so the token may also come as ?token=.
+    """
+    from rest_framework import exceptions
+    from .authentication import CachedTokenAuthentication
+
+    header = request.headers.get("Authorization", "")
+    key = header[len("Token "):] if header.startswith("Token ") else request.GET.get("token", "")
+    if not key:
+        return None
+    try:
+        user, _ = CachedTokenAuthentication().authenticate_credentials(key)
+    except exceptions.AuthenticationFailed:
+        return None
+    return user if _is_borrower(user) else None
+
+
+async def borrower_notification_stream(request):
+    """Server-sent events: pushes each new notification as it is written.
+
+    Reconnecting clients send Last-Event-ID (or ?last_event_id=) and get the
+    notifications they missed. Needs an ASGI server (config.asgi).
+    """
+    from asgiref.sync import sync_to_async
+    from .services.notification_stream import event_stream
+
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed."}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    user = await sync_to_async(_stream_principal)(request)
+    if user is None:
+        return JsonResponse({"detail": "Borrower access required."}, status=status.HTTP_401_UNAUTHORIZED)
+
+    raw_last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    last_event_id = int(raw_last_id) if raw_last_id and raw_last_id.isdigit() else None
+
+    response = StreamingHttpResponse(event_stream(user.id, last_event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -4,4 +4,6 @@ set -o errexit
 
 pip install -r requirements.txt
 
-python manage.py collectstatic --no-input
\ No newline at end of file
+python manage.py collectstatic --no-input
+
+python manage.py createcachetable
\ No newline at end of file
@@ -79,14 +79,31 @@ WSGI_APPLICATION = "config.wsgi.application"
 supabase_database_url = os.getenv("SUPABASE_DB_URL")
 database_url = os.getenv("DATABASE_URL", supabase_database_url)
 
+# Persistent connections save a TLS handshake to the remote database per
+# request. Health checks drop a connection that died while idle (under ASGI
+# each worker thread keeps its own) instead of failing the next request.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+
 DATABASES = {
     "default": dj_database_url.parse(
         database_url or f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
         ssl_require=bool(database_url),
     )
 }
 
+# Cache shared by every worker process, so an invalidation in one is seen by
+# all (unread notification counts; AI responses with AI_CACHE_BACKEND=django).
+# The database backend needs 'manage.py createcachetable'; point CACHE_BACKEND
+# and CACHE_LOCATION at Redis or Memcached instead where one is available.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "gearguard_cache"),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -121,9 +138,39 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
 }
+
+# Per-process cache of token -> user/profile lookups (seconds / entries)
+AUTH_PRINCIPAL_CACHE_TTL = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "5"))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "2048"))
+
+# AI response cache: "django" (CACHES[AI_CACHE_ALIAS], shared by all workers),
+# "local" (per-process LRU; clearing only reaches one worker) or "none"
+AI_CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "django")
+AI_CACHE_ALIAS = os.getenv("AI_CACHE_ALIAS", "default")
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", "900"))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "256"))
+
+# Seconds a borrower's cached unread notification counts may live
+NOTIFICATION_COUNT_CACHE_TTL = int(os.getenv("NOTIFICATION_COUNT_CACHE_TTL", "300"))
+
+# Notification SSE stream: shared poll interval and keep-alive comment interval (seconds)
+NOTIFICATION_STREAM_POLL_INTERVAL = float(os.getenv("NOTIFICATION_STREAM_POLL_INTERVAL", "2"))
+NOTIFICATION_STREAM_HEARTBEAT = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT", "15"))
+
+# Per-process cache of RFID badge -> user lookups (entries / seconds, and
+# seconds an unknown badge is remembered); set RFID_USERNAME_FALLBACK=false
+# once every borrower has an RFIDCard
+RFID_CACHE_SIZE = int(os.getenv("RFID_CACHE_SIZE", "1024"))
+RFID_CACHE_TTL = int(os.getenv("RFID_CACHE_TTL", "300"))
+RFID_NEGATIVE_CACHE_TTL = float(os.getenv("RFID_NEGATIVE_CACHE_TTL", "5"))
+RFID_USERNAME_FALLBACK = os.getenv("RFID_USERNAME_FALLBACK", "True").lower() == "true"
+
+# Keyset pagination for borrow listings (?cursor= / ?page_size=)
+API_DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", "50"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
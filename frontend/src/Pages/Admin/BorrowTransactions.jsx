@@ -176,30 +176,31 @@ export function AdminBorrowTransactions() {
     }
 
     try {
-      // Process each item as a separate borrow
-      const promises = scannedItems.map(item =>
-        fetch(`${API_BASE_URL}/api/borrow-walkin/`, {
-          method: 'POST',
-          headers: {
-            Authorization: `Token ${token}`,
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({
-            item_instance_id: item.id,
-            borrower_id: scannedBorrower.id,
-            due_date: dueDate,
-            notes: notes || 'Walk-in borrow',
-          }),
-        })
-      );
-
-      const responses = await Promise.all(promises);
-      
-      // Check if all succeeded
-      const allSucceeded = responses.every(res => res.ok);
-      
-      if (!allSucceeded) {
-        throw new Error('Some items failed to process');
+      // Check out the whole cart in one request; it succeeds or fails as a unit
+      const response = await fetch(`${API_BASE_URL}/api/borrow-walkin/checkout/`, {
+        method: 'POST',
+        headers: {
+          Authorization: `Token ${token}`,
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          item_instance_ids: scannedItems.map(item => item.id),
+          borrower_id: scannedBorrower.id,
+          due_date: dueDate,
+          notes: notes || 'Walk-in borrow',
+        }),
+      });
+
+      if (!response.ok) {
+        const data = await response.json().catch(() => ({}));
+        const unavailable = scannedItems
+          .filter(item => (data.unavailable || []).includes(item.id))
+          .map(item => item.reference_id);
+        throw new Error(
+          unavailable.length
+            ? `Not available: ${unavailable.join(', ')}. No items were checked out.`
+            : data.detail || 'Failed to process walk-in borrow'
+        );
       }
 
       alert(`Successfully processed ${scannedItems.length} item(s) for walk-in borrow!`);
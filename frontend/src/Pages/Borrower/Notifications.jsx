@@ -1,7 +1,7 @@
 import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { getToken, getStoredUser, clearSession } from '../../lib/auth.js';
-import { NotificationBadge } from '../../components/NotificationBadge.jsx';
+import { NotificationBadge, publishUnreadCounts } from '../../components/NotificationBadge.jsx';
 import '../../CSS/AdminDashboard.css';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000';
@@ -46,6 +46,22 @@ export function Notifications() {
 
       const data = await response.json();
       setNotifications(data.notifications || []);
+
+      // Opening the inbox marks the notifications shown here read; anything
+      // that arrived after this load stays unread
+      const unreadIds = (data.notifications || [])
+        .filter((notification) => !notification.read)
+        .map((notification) => notification.id);
+      if (unreadIds.length > 0) {
+        fetch(`${API_BASE_URL}/api/borrower/notifications/read/`, {
+          method: 'POST',
+          headers: { Authorization: `Token ${token}`, 'Content-Type': 'application/json' },
+          body: JSON.stringify({ ids: unreadIds }),
+        })
+          .then((readResponse) => (readResponse.ok ? readResponse.json() : null))
+          .then((counts) => publishUnreadCounts(counts))
+          .catch(() => publishUnreadCounts(null));
+      }
     } catch (err) {
       setError(err.message);
     } finally {
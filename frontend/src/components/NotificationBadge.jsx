@@ -3,6 +3,13 @@ import { getToken } from '../lib/auth.js';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000';
 
+// Window event carrying fresh unread counts, e.g. after the inbox marks notifications read
+const UNREAD_EVENT = 'gearguard:unread-counts';
+
+export function publishUnreadCounts(counts) {
+  window.dispatchEvent(new CustomEvent(UNREAD_EVENT, { detail: counts }));
+}
+
 export function NotificationBadge() {
   const [count, setCount] = useState(0);
   const token = getToken();
@@ -36,17 +43,56 @@ export function NotificationBadge() {
 
     // Load immediately
     loadCount();
-    
-    // Refresh every 30 seconds
-    const interval = setInterval(() => {
-      if (isMountedRef.current) {
+
+    const onUnreadCounts = (event) => {
+      if (!isMountedRef.current) return;
+      if (event.detail && typeof event.detail.unread_count === 'number') {
+        setCount(event.detail.unread_count);
+      } else {
         loadCount();
       }
-    }, 30000);
+    };
+    window.addEventListener(UNREAD_EVENT, onUnreadCounts);
+
+    let interval = null;
+    const startPolling = () => {
+      if (interval) return;
+      // Refresh every 30 seconds
+      interval = setInterval(() => {
+        if (isMountedRef.current) {
+          loadCount();
+        }
+      }, 30000);
+    };
+
+    // Prefer the push stream; fall back to polling if it is unavailable
+    let source = null;
+    if (typeof EventSource !== 'undefined') {
+      source = new EventSource(
+        `${API_BASE_URL}/api/borrower/notifications/stream/?token=${encodeURIComponent(token)}`
+      );
+      const applyCount = (event) => {
+        if (!isMountedRef.current) return;
+        const data = JSON.parse(event.data);
+        setCount(data.unread_count || 0);
+      };
+      source.addEventListener('unread', applyCount);
+      source.addEventListener('notification', applyCount);
+      source.onerror = () => {
+        // EventSource retries on its own unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+          startPolling();
+        }
+      };
+    } else {
+      startPolling();
+    }
     
     return () => {
       isMountedRef.current = false;
-      clearInterval(interval);
+      window.removeEventListener(UNREAD_EVENT, onUnreadCounts);
+      if (source) source.close();
+      if (interval) clearInterval(interval);
     };
   }, [token]);
 